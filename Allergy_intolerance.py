@@ -1,73 +1,47 @@
 from typing import List, Literal, Optional, Union
 from pydantic import BaseModel,HttpUrl, Field # type: ignore
+from compat import ConfigDict, PYDANTIC_V2
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
 from datetime import datetime
 
 
-class Identifier(BaseModel):
-    system: Optional[str]
-    value: Optional[str]
-
-
-class Coding(BaseModel):
-    system: Optional[str]
-    version: Optional[str]
-    code: Optional[str]
-    display: Optional[str]
-    userSelected: Optional[bool]
-
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List[Coding]]
-    text: Optional[str]
-
-
-class Reference(BaseModel):
-    reference: Optional[str]
-    display: Optional[str]
-
-
-class Period(BaseModel):
-    start: Optional[datetime]
-    end: Optional[datetime]
-
-
 class Age(BaseModel):
-    value: Optional[float]
-    unit: Optional[str]
-    system: Optional[str]
-    code: Optional[str]
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    system: Optional[str] = None
+    code: Optional[str] = None
 
 
 class Range(BaseModel):
-    low: Optional[float]
-    high: Optional[float]
+    low: Optional[float] = None
+    high: Optional[float] = None
 
 
 class Quantity(BaseModel):
-    value: Optional[float]
-    unit: Optional[str]
-    system: Optional[str]
-    code: Optional[str]
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    system: Optional[str] = None
+    code: Optional[str] = None
 
 
 class Annotation(BaseModel):
-    authorReference: Optional[Reference]
-    authorString: Optional[str]
-    time: Optional[datetime]
+    authorReference: Optional[Reference] = None
+    authorString: Optional[str] = None
+    time: Optional[datetime] = None
     text: str
 
 
 class Extension(BaseModel):
     url: str
-    valueString: Optional[str]
-    valueBoolean: Optional[bool]
-    valueInteger: Optional[int]
-    valueDateTime: Optional[datetime]
-    valueDecimal: Optional[float]
+    valueString: Optional[str] = None
+    valueBoolean: Optional[bool] = None
+    valueInteger: Optional[int] = None
+    valueDateTime: Optional[datetime] = None
+    valueDecimal: Optional[float] = None
     valueUri: Optional[HttpUrl] = None
-    valueCode: Optional[str]
-    valueQuantity: Optional[Quantity]
-    valueReference: Optional[Reference]
+    valueCode: Optional[str] = None
+    valueQuantity: Optional[Quantity] = None
+    valueReference: Optional[Reference] = None
 
 
 class BackboneElement(BaseModel):
@@ -76,13 +50,13 @@ class BackboneElement(BaseModel):
 
 
 class Reaction(BackboneElement):
-    substance: Optional[CodeableConcept]
+    substance: Optional[CodeableConcept] = None
     manifestation: List[CodeableConcept]
-    description: Optional[str]
-    onset: Optional[datetime]
-    severity: Optional[str]  # mild | moderate | severe
-    exposureRoute: Optional[CodeableConcept]
-    note: Optional[List[Annotation]]
+    description: Optional[str] = None
+    onset: Optional[datetime] = None
+    severity: Optional[str] = None  # mild | moderate | severe
+    exposureRoute: Optional[CodeableConcept] = None
+    note: Optional[List[Annotation]] = None
 
 
 class Narrative(BaseModel):
@@ -91,53 +65,57 @@ class Narrative(BaseModel):
 
 
 class Meta(BaseModel):
-    versionId: Optional[str]
-    lastUpdated: Optional[datetime]
-    profile: Optional[List[HttpUrl]]
-    security: Optional[List[Coding]]
-    tag: Optional[List[Coding]]
+    versionId: Optional[str] = None
+    lastUpdated: Optional[datetime] = None
+    profile: Optional[List[HttpUrl]] = None
+    security: Optional[List[Coding]] = None
+    tag: Optional[List[Coding]] = None
 
 
 class Resource(BaseModel):
     resourceType: str
+    id: Optional[str] = None
 
 
 class AllergyIntolerance(BaseModel):
     resourceType: Literal["AllergyIntolerance"] = "AllergyIntolerance"
-    id: Optional[str]
-    meta: Optional[Meta]
+    id: Optional[str] = None
+    meta: Optional[Meta] = None
     implicitRules: Optional[HttpUrl] = None
-    language: Optional[str]
-    text: Optional[Narrative]
-    contained: Optional[List[Resource]]  # List of contained resources
-    extension: Optional[List[Extension]]
-    modifierExtension: Optional[List[Extension]]
-
-    identifier: Optional[List[Identifier]]
-    clinicalStatus: Optional[CodeableConcept]  # active | inactive | resolved
-    verificationStatus: Optional[CodeableConcept]  # unconfirmed | confirmed | refuted | entered-in-error
-    type: Optional[str]  # allergy | intolerance
-    category: Optional[List[str]]  # food | medication | environment | biologic
-    criticality: Optional[str]  # low | high | unable-to-assess
-    code: Optional[CodeableConcept]
+    language: Optional[str] = None
+    text: Optional[Narrative] = None
+    contained: Optional[List[Resource]] = None  # List of contained resources
+    extension: Optional[List[Extension]] = None
+    modifierExtension: Optional[List[Extension]] = None
+
+    identifier: Optional[List[Identifier]] = None
+    clinicalStatus: Optional[CodeableConcept] = None  # active | inactive | resolved
+    verificationStatus: Optional[CodeableConcept] = None  # unconfirmed | confirmed | refuted | entered-in-error
+    type: Optional[str] = None  # allergy | intolerance
+    category: Optional[List[str]] = None  # food | medication | environment | biologic
+    criticality: Optional[str] = None  # low | high | unable-to-assess
+    code: Optional[CodeableConcept] = None
     patient: Reference
-    encounter: Optional[Reference]
-
-    onsetDateTime: Optional[datetime]
-    onsetAge: Optional[Age]
-    onsetPeriod: Optional[Period]
-    onsetRange: Optional[Range]
-    onsetString: Optional[str]
-
-    recordedDate: Optional[datetime]
-    recorder: Optional[Reference]
-    asserter: Optional[Reference]
-    lastOccurrence: Optional[datetime]
-    note: Optional[List[Annotation]]
-    reaction: Optional[List[Reaction]]
-
-    class Config:
-        extra = "forbid"
+    encounter: Optional[Reference] = None
+
+    onsetDateTime: Optional[datetime] = None
+    onsetAge: Optional[Age] = None
+    onsetPeriod: Optional[Period] = None
+    onsetRange: Optional[Range] = None
+    onsetString: Optional[str] = None
+
+    recordedDate: Optional[datetime] = None
+    recorder: Optional[Reference] = None
+    asserter: Optional[Reference] = None
+    lastOccurrence: Optional[datetime] = None
+    note: Optional[List[Annotation]] = None
+    reaction: Optional[List[Reaction]] = None
+
+    if PYDANTIC_V2:
+        model_config = ConfigDict(extra="forbid")
+    else:
+        class Config:
+            extra = "forbid"
 
 
 # Example Usage
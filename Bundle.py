@@ -0,0 +1,209 @@
+import json
+import re
+from typing import IO, Any, Generator, Iterator, List, Literal, Optional, Union
+from pydantic import BaseModel # type: ignore
+import compat
+from datatypes import Identifier
+from enum import Enum
+from datetime import datetime
+
+import registry
+
+
+class BundleType(str, Enum):
+    document = "document"
+    message = "message"
+    transaction = "transaction"
+    transaction_response = "transaction-response"
+    batch = "batch"
+    batch_response = "batch-response"
+    history = "history"
+    searchset = "searchset"
+    collection = "collection"
+
+
+class BundleLink(BaseModel):
+    relation: str
+    url: str
+
+
+class BundleEntrySearch(BaseModel):
+    mode: Optional[str] = None  # match | include | outcome
+    score: Optional[float] = None
+
+
+class BundleEntryRequest(BaseModel):
+    method: str  # GET | HEAD | POST | PUT | DELETE | PATCH
+    url: str
+    ifNoneMatch: Optional[str] = None
+    ifModifiedSince: Optional[datetime] = None
+    ifMatch: Optional[str] = None
+    ifNoneExist: Optional[str] = None
+
+
+class BundleEntryResponse(BaseModel):
+    status: str
+    location: Optional[str] = None
+    etag: Optional[str] = None
+    lastModified: Optional[datetime] = None
+    outcome: Optional[Any] = None
+
+
+class BundleEntry(BaseModel):
+    link: Optional[List[BundleLink]] = None
+    fullUrl: Optional[str] = None
+    resource: Optional[Any] = None
+    search: Optional[BundleEntrySearch] = None
+    request: Optional[BundleEntryRequest] = None
+    response: Optional[BundleEntryResponse] = None
+
+    @compat.before_validator("resource")
+    def parse_resource(cls, value):
+        # Resources we have models for become model instances; anything else
+        # (Patient, Practitioner, ...) is kept as the raw dict.
+        if isinstance(value, dict) and registry.is_registered(value.get("resourceType")):
+            return registry.parse(value)
+        return value
+
+
+class Bundle(BaseModel):
+    resourceType: Literal["Bundle"] = "Bundle"
+    id: Optional[str] = None
+    identifier: Optional[Identifier] = None
+    type: BundleType
+    timestamp: Optional[datetime] = None
+    total: Optional[int] = None
+    link: Optional[List[BundleLink]] = None
+    entry: Optional[List[BundleEntry]] = None
+
+
+# Streaming entry iteration
+#
+# The scanner below walks the raw bytes of a Bundle and cuts out each element
+# of the top-level "entry" array as soon as its closing brace has been read.
+# Only the entry currently being read is buffered, so peak memory is bounded by
+# the largest single entry rather than the whole Bundle.
+
+_STRUCTURAL = re.compile(rb'["{}\[\]]')
+_STRING_END = re.compile(rb'["\\]')
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+# what the entry scanner yields when it needs the next chunk sent in
+NEED_DATA = object()
+
+
+def _iter_raw_entries(stream: IO, chunk_size: int) -> Iterator[bytes]:
+    scanner = scan_entries()
+    item = next(scanner)
+    while True:
+        if item is NEED_DATA:
+            try:
+                item = scanner.send(stream.read(chunk_size))
+            except StopIteration:
+                return
+        else:
+            yield item
+            item = next(scanner)
+
+
+def scan_entries() -> Generator[Any, Union[bytes, str, None], None]:
+    """Push-driven entry scanner: yields NEED_DATA when it wants the next chunk
+    sent in (an empty chunk ends the input), and each raw entry otherwise.
+    Lets callers that read asynchronously share the scanner."""
+    buf = b""
+    pos = 0
+    depth = 0
+    in_string = False
+    need_more = False
+    in_entries = False
+    entry_start = None  # offset of the entry being captured
+    key_start = None  # offset of a top-level string being read
+    last_key = b""
+
+    while True:
+        if need_more or pos >= len(buf):
+            chunk = yield NEED_DATA
+            if not chunk:
+                break
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            keep = min(x for x in (entry_start, key_start, pos) if x is not None)
+            buf = buf[keep:] + chunk
+            pos -= keep
+            if entry_start is not None:
+                entry_start -= keep
+            if key_start is not None:
+                key_start -= keep
+            need_more = False
+
+        if in_string:
+            match = _STRING_END.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                continue
+            i = match.start()
+            if buf[i] == 0x5C:  # backslash: skip the escaped byte
+                if i + 1 >= len(buf):
+                    pos = i
+                    need_more = True
+                    continue
+                pos = i + 2
+                continue
+            in_string = False
+            pos = i + 1
+            if key_start is not None:
+                last_key = buf[key_start:i]
+                key_start = None
+            continue
+
+        match = _STRUCTURAL.search(buf, pos)
+        if match is None:
+            pos = len(buf)
+            continue
+        i = match.start()
+        c = buf[i]
+        pos = i + 1
+        if c == 0x22:  # "
+            in_string = True
+            if depth == 1:
+                key_start = pos
+        elif c in (0x7B, 0x5B):  # { [
+            if c == 0x5B and depth == 1 and last_key == b"entry":
+                in_entries = True
+            elif c == 0x7B and depth == 2 and in_entries:
+                entry_start = i
+            depth += 1
+        else:  # } ]
+            depth -= 1
+            if in_entries:
+                if depth == 2 and entry_start is not None:
+                    yield buf[entry_start:pos]
+                    entry_start = None
+                elif depth == 1:
+                    in_entries = False
+
+
+def iter_entries(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[BundleEntry]:
+    """Yield each Bundle.entry as a BundleEntry while the Bundle is still being read.
+
+    `source` is a path or an open (text or binary) file object.
+    """
+    if hasattr(source, "read"):
+        yield from _parse_entries(source, chunk_size)
+    else:
+        with open(source, "rb") as stream:
+            yield from _parse_entries(stream, chunk_size)
+
+
+def _parse_entries(stream: IO, chunk_size: int) -> Iterator[BundleEntry]:
+    for raw in _iter_raw_entries(stream, chunk_size):
+        yield compat.validate(BundleEntry, json.loads(raw))
+
+
+def iter_resources(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    # entry.resource of every entry that has one
+    for entry in iter_entries(source, chunk_size):
+        if entry.resource is not None:
+            yield entry.resource
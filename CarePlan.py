@@ -1,6 +1,8 @@
 from typing import List, Literal, Optional, Union
 from observation import Timing
 from pydantic import BaseModel,HttpUrl, Field # type: ignore
+from compat import ConfigDict, PYDANTIC_V2
+from datatypes import CodeableConcept, Identifier, Period, Reference
 from enum import Enum
 from datetime import datetime
 
@@ -42,105 +44,81 @@ class CarePlanActivityStatus(str, Enum):
     entered_in_error = "entered-in-error"
 
 # Basic FHIR elements
-class Identifier(BaseModel):
-    use: Optional[str]
-    type: Optional['CodeableConcept']
-    system: Optional[str]
-    value: Optional[str]
-
-class Reference(BaseModel):
-    reference: Optional[str]
-    type: Optional[str]
-    identifier: Optional[Identifier]
-    display: Optional[str]
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List['Coding']]
-    text: Optional[str]
-
-class Coding(BaseModel):
-    system: Optional[str]
-    version: Optional[str]
-    code: Optional[str]
-    display: Optional[str]
-    userSelected: Optional[bool]
-
-class Period(BaseModel):
-    start: Optional[datetime]
-    end: Optional[datetime]
-
 class Annotation(BaseModel):
-    authorReference: Optional[Reference]
-    authorString: Optional[str]
-    time: Optional[datetime]
+    authorReference: Optional[Reference] = None
+    authorString: Optional[str] = None
+    time: Optional[datetime] = None
     text: str
 
 class SimpleQuantity(BaseModel):
-    value: Optional[float]
-    comparator: Optional[str]
-    unit: Optional[str]
-    system: Optional[str]
-    code: Optional[str]
+    value: Optional[float] = None
+    comparator: Optional[str] = None
+    unit: Optional[str] = None
+    system: Optional[str] = None
+    code: Optional[str] = None
 
 # BackboneElement: Activity.detail
 class CarePlanActivityDetail(BaseModel):
-    kind: Optional[CarePlanActivityKind]
-    instantiatesCanonical: Optional[List[str]]
-    instantiatesUri: Optional[List[HttpUrl]]
-    code: Optional[CodeableConcept]
-    reasonCode: Optional[List[CodeableConcept]]
-    reasonReference: Optional[List[Reference]]
-    goal: Optional[List[Reference]]
+    kind: Optional[CarePlanActivityKind] = None
+    instantiatesCanonical: Optional[List[str]] = None
+    instantiatesUri: Optional[List[HttpUrl]] = None
+    code: Optional[CodeableConcept] = None
+    reasonCode: Optional[List[CodeableConcept]] = None
+    reasonReference: Optional[List[Reference]] = None
+    goal: Optional[List[Reference]] = None
     status: CarePlanActivityStatus
-    statusReason: Optional[CodeableConcept]
-    doNotPerform: Optional[bool]
-    scheduledTiming: Optional['Timing']
-    scheduledPeriod: Optional[Period]
-    scheduledString: Optional[str]
-    location: Optional[Reference]
-    performer: Optional[List[Reference]]
-    productCodeableConcept: Optional[CodeableConcept]
-    productReference: Optional[Reference]
-    dailyAmount: Optional[SimpleQuantity]
-    quantity: Optional[SimpleQuantity]
-    description: Optional[str]
+    statusReason: Optional[CodeableConcept] = None
+    doNotPerform: Optional[bool] = None
+    scheduledTiming: Optional['Timing'] = None
+    scheduledPeriod: Optional[Period] = None
+    scheduledString: Optional[str] = None
+    location: Optional[Reference] = None
+    performer: Optional[List[Reference]] = None
+    productCodeableConcept: Optional[CodeableConcept] = None
+    productReference: Optional[Reference] = None
+    dailyAmount: Optional[SimpleQuantity] = None
+    quantity: Optional[SimpleQuantity] = None
+    description: Optional[str] = None
 
 # BackboneElement: Activity
 class CarePlanActivity(BaseModel):
-    outcomeCodeableConcept: Optional[List[CodeableConcept]]
-    outcomeReference: Optional[List[Reference]]
-    progress: Optional[List[Annotation]]
-    reference: Optional[Reference]
-    detail: Optional[CarePlanActivityDetail]
+    outcomeCodeableConcept: Optional[List[CodeableConcept]] = None
+    outcomeReference: Optional[List[Reference]] = None
+    progress: Optional[List[Annotation]] = None
+    reference: Optional[Reference] = None
+    detail: Optional[CarePlanActivityDetail] = None
 
 # Main CarePlan Model
 class CarePlan(BaseModel):
     resourceType: Literal["CarePlan"] ="CarePlan"
-    identifier: Optional[List[Identifier]]
-    instantiatesCanonical: Optional[List[str]]
-    instantiatesUri: Optional[List[HttpUrl]]
-    basedOn: Optional[List[Reference]]
-    replaces: Optional[List[Reference]]
-    partOf: Optional[List[Reference]]
+    identifier: Optional[List[Identifier]] = None
+    instantiatesCanonical: Optional[List[str]] = None
+    instantiatesUri: Optional[List[HttpUrl]] = None
+    basedOn: Optional[List[Reference]] = None
+    replaces: Optional[List[Reference]] = None
+    partOf: Optional[List[Reference]] = None
     status: RequestStatus
     intent: CarePlanIntent
-    category: Optional[List[CodeableConcept]]
-    title: Optional[str]
-    description: Optional[str]
+    category: Optional[List[CodeableConcept]] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
     subject: Reference
-    encounter: Optional[Reference]
-    period: Optional[Period]
-    created: Optional[datetime]
-    author: Optional[Reference]
-    contributor: Optional[List[Reference]]
-    careTeam: Optional[List[Reference]]
-    addresses: Optional[List[Reference]]
-    supportingInfo: Optional[List[Reference]]
-    goal: Optional[List[Reference]]
-    activity: Optional[List[CarePlanActivity]]
-    note: Optional[List[Annotation]]
-
-    class Config:
-        # Example: Enable orm_mode for SQLAlchemy integration
-        orm_mode = True
+    encounter: Optional[Reference] = None
+    period: Optional[Period] = None
+    created: Optional[datetime] = None
+    author: Optional[Reference] = None
+    contributor: Optional[List[Reference]] = None
+    careTeam: Optional[List[Reference]] = None
+    addresses: Optional[List[Reference]] = None
+    supportingInfo: Optional[List[Reference]] = None
+    goal: Optional[List[Reference]] = None
+    activity: Optional[List[CarePlanActivity]] = None
+    note: Optional[List[Annotation]] = None
+
+    if PYDANTIC_V2:
+        model_config = ConfigDict(from_attributes=True)
+    else:
+        class Config:
+            # Example: Enable orm_mode for SQLAlchemy integration
+            orm_mode = True
 
@@ -1,38 +1,10 @@
 from typing import List, Literal, Optional, Union
 from pydantic import BaseModel, Field # type: ignore
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
 from datetime import datetime
 
 
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
 # Definitions for reusable types
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    type: Optional['CodeableConcept'] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-    period: Optional['Period'] = None
-    assigner: Optional['Reference'] = None
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List['Coding']] = None
-    text: Optional[str] = None
-
-class Coding(BaseModel):
-    system: Optional[str] = None
-    version: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-    userSelected: Optional[bool] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
 class ContactPoint(BaseModel):
     system: Optional[str] = None
     value: Optional[str] = None
@@ -54,7 +26,6 @@ class CareTeamParticipant(BaseModel):
     period: Optional[Period] = None
 
 
-
 # Placeholder classes for elements not fully expanded in the example
 class Meta(BaseModel):
     versionId: Optional[str] = None
@@ -70,6 +41,7 @@ class Narrative(BaseModel):
 
 class Resource(BaseModel):
     resourceType: str
+    id: Optional[str] = None
 
 class Extension(BaseModel):
     url: str
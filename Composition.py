@@ -1,43 +1,10 @@
 from typing import List, Literal, Optional, Dict, Any, ForwardRef
 from pydantic import BaseModel, HttpUrl # type: ignore
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
 from datetime import date, datetime
 from enum import Enum
 
 
-
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
-
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-    period: Optional['Period'] = None  # Forward reference to Period
-    assigner: Optional['Reference'] = None  # Forward reference to Reference
-
-
-class Coding(BaseModel):
-    system: Optional[str] = None
-    version: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-    userSelected: Optional[bool] = None
-
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List[Coding]] = None
-    text: Optional[str] = None
-
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
-
 class Extension(BaseModel):
     url: str
     valueString: Optional[str] = None
@@ -1,5 +1,7 @@
 from typing import List, Literal, Optional, Union, Dict, Any
 from pydantic import BaseModel, conint, constr, HttpUrl # type: ignore
+from compat import ConfigDict, PYDANTIC_V2
+from datatypes import CodeableConcept, Identifier, Period, Reference
 from datetime import datetime, date
 from enum import Enum
 
@@ -25,35 +27,7 @@ class Extension(BaseModel):
     # valueAttachment: Optional[Dict[str, Any]] = None
     # valueReference: Optional[Dict[str, Any]] = None
 
-class Coding(BaseModel):
-    system: Optional[str] = None
-    version: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-    userSelected: Optional[bool] = None
-
 # Reusable models from the FHIR spec
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-    period: Optional['Period'] = None
-    assigner: Optional['Reference'] = None
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List['Coding']] = None
-    text: Optional[str] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[ResourceType] = None  # Using ResourceType Enum
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
 class BackboneElement(BaseModel):
     extension: Optional[List[Extension]] = None  # Using the Extension class
     modifierExtension: Optional[List[Extension]] = None  # Using the Extension class
@@ -74,15 +48,15 @@ class CoverageClass(BackboneElement):
     value: Optional[str] = None  # 1..1 string
     name: Optional[str] = None
 
+class Exception(BackboneElement):
+    type: CodeableConcept
+    period: Optional[Period] = None
+
 class CostToBeneficiary(BackboneElement):
     type: Optional[CodeableConcept] = None
     valueQuantity: Optional[SimpleQuantity] = None
     valueMoney: Optional[Money] = None
-    exception: Optional[List['Exception']] = None
-
-class Exception(BackboneElement):
-    type: CodeableConcept
-    period: Optional[Period] = None
+    exception: Optional[List[Exception]] = None
 
 # Main Coverage model
 class Coverage(BaseModel):
@@ -107,7 +81,10 @@ class Coverage(BaseModel):
     extension: Optional[List[Extension]] = None  # Adding extension field
     modifierExtension: Optional[List[Extension]] = None  # Adding modifierExtension field
 
-    class Config:
-        allow_population_by_field_name = True
+    if PYDANTIC_V2:
+        model_config = ConfigDict(populate_by_name=True)
+    else:
+        class Config:
+            allow_population_by_field_name = True
 
 
@@ -1,5 +1,6 @@
 from typing import List, Literal, Optional, Union
 from pydantic import BaseModel, Field, PositiveInt,HttpUrl # type: ignore
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
 from datetime import date, datetime
 from enum import Enum
 
@@ -16,34 +17,6 @@ class EligibilityRequestPurpose(str, Enum):
     discovery = "discovery"
     validation = "validation"
 
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-    period: Optional["Period"] = None
-    assigner: Optional["Reference"] = None
-
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List["Coding"]] = None
-    text: Optional[str] = None
-
-class Coding(BaseModel):
-    system: Optional[str] = None
-    version: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-    userSelected: Optional[bool] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
 class BackboneElement(BaseModel):
     modifierExtension: Optional[List["Extension"]] = None
 
@@ -1,5 +1,6 @@
-from typing import List, Optional, Union
-from pydantic import BaseModel, Field # type: ignore
+from typing import List, Literal, Optional, Union
+from pydantic import BaseModel # type: ignore
+from datatypes import CodeableConcept, Identifier, Period, Reference
 from enum import Enum
 from datetime import date, datetime
 
@@ -21,23 +22,6 @@ class RemittanceOutcome(str, Enum):
     error = "error"
     partial = "partial"
 
-class CodeableConcept(BaseModel):
-    coding: Optional[List[str]] = None
-    text: Optional[str] = None
-
-class Identifier(BaseModel):
-    system: Optional[str] = None
-    value: Optional[str] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-
-class Period(BaseModel):
-    start: Optional[date] = None
-    end: Optional[date] = None
-
 class Money(BaseModel):
     value: Optional[float] = None
     currency: Optional[str] = None
@@ -80,7 +64,7 @@ class CoverageEligibilityResponseError(BaseModel):
     code: CodeableConcept
 
 class CoverageEligibilityResponse(BaseModel):
-    resourceType: str = Field("CoverageEligibilityResponse", const=True)
+    resourceType: Literal["CoverageEligibilityResponse"] = "CoverageEligibilityResponse"
     identifier: Optional[List[Identifier]] = None
     status: FinancialResourceStatusCodes
     purpose: List[EligibilityResponsePurpose]
@@ -1,21 +1,10 @@
 from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, AnyUrl # type: ignore
+from datatypes import CodeableConcept, Identifier, Reference
 from enum import Enum
 from datetime import date, datetime
 
 
-class Identifier(BaseModel):
-    system: Optional[str] = None
-    value: Optional[str] = None
-
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
-
 class UDIEntryType(str, Enum):
     barcode = "barcode"
     rfid = "rfid"
@@ -29,11 +18,6 @@ class FHIRDeviceStatus(str, Enum):
     unknown = "unknown"
 
 
-class CodeableConcept(BaseModel):
-    coding: Optional[List[str]] = None
-    text: Optional[str] = None
-
-
 class BackboneElement(BaseModel):
     modifierExtension: Optional[List[str]] = None
 
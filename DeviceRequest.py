@@ -1,5 +1,6 @@
 from typing import List, Literal, Optional, Union
 from pydantic import BaseModel, Field, AnyUrl # type: ignore
+from datatypes import CodeableConcept, Identifier, Period, Reference
 from enum import Enum
 from datetime import datetime
 
@@ -34,23 +35,6 @@ class RequestPriority(str, Enum):
 
 
 # Basic Structures
-class Identifier(BaseModel):
-    system: Optional[str] = None
-    value: Optional[str] = None
-
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List[str]] = None
-    text: Optional[str] = None
-
-
 class BackboneElement(BaseModel):
     modifierExtension: Optional[List[str]] = None
 
@@ -67,11 +51,6 @@ class Range(BaseModel):
     high: Optional[Quantity] = None
 
 
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
-
 class Timing(BaseModel):
     event: Optional[List[datetime]] = None
 
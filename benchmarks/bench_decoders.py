@@ -0,0 +1,63 @@
+# Compiled decoders (decoders.decode) against pydantic validation, both starting
+# from raw JSON bytes.
+#
+#   python benchmarks/bench_decoders.py [--records N]
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import decoders  # noqa: E402
+from CarePlan import CarePlan  # noqa: E402
+from CoverageEligibilityResponse import CoverageEligibilityResponse  # noqa: E402
+from observation import Observation  # noqa: E402
+from payloads import care_plan, eligibility_response, observation  # noqa: E402
+
+
+def timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled decoder benchmark")
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+
+    cases = [
+        (Observation, observation),
+        (CarePlan, care_plan),
+        (CoverageEligibilityResponse, eligibility_response),
+    ]
+    for model, payload in cases:
+        rows = [json.dumps(payload(i)).encode("utf-8") for i in range(args.records)]
+        dicts = [json.loads(r) for r in rows]
+        decode = decoders.get_decoder(model)  # compile (or load from cache) up front
+        assert decode(dicts[0]) == decoders.decode(model, rows[0]) == compat.validate(model, dicts[0])
+
+        # the decoder alone, on already-parsed JSON
+        base = timed(lambda: [compat.validate(model, d) for d in dicts])
+        fast = timed(lambda: [decode(d) for d in dicts])
+        # from raw bytes, JSON parsing and per-call dispatch included
+        base_raw = timed(lambda: [compat.validate(model, json.loads(r)) for r in rows])
+        fast_raw = timed(lambda: [decoders.decode(model, r) for r in rows])
+        print(
+            f"{model.__name__:<30} validate {args.records / base:10,.0f} rec/s"
+            f"   decoder {args.records / fast:10,.0f} rec/s   {base / fast:5.1f}x"
+            f"   from bytes {base_raw / fast_raw:5.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# HL7 v2 -> FHIR conversion throughput on a generated corpus of ADT^A01/A03
+# and ORU^R01 messages (see payloads.hl7_adt / hl7_oru), written to a file
+# and streamed back through hl7v2.convert. The target is 50k messages/s on
+# one core.
+#
+#   python benchmarks/bench_hl7v2.py [--messages N] [--corpus FILE]
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import hl7v2  # noqa: E402
+import registry  # noqa: E402
+import serialize  # noqa: E402
+from payloads import hl7_adt, hl7_oru  # noqa: E402
+
+TARGET = 50_000
+
+
+def timed(label, messages, fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    print(f"{label:<30}{elapsed:8.3f} s {messages / elapsed:12,.0f} messages/s")
+    return messages / elapsed, result
+
+
+def write_corpus(path, messages):
+    with open(path, "w", newline="") as f:
+        for i in range(messages):
+            f.write(hl7_oru(i) if i % 2 else hl7_adt(i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HL7 v2 conversion benchmark")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--corpus", help="corpus file to write/read (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.corpus or os.path.join(tempfile.mkdtemp(), "corpus.hl7")
+    if not os.path.exists(path):
+        write_corpus(path, args.messages)
+    print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MiB, {args.messages:,} messages (half ADT, half ORU^R01)")
+
+    try:
+        timed("split messages", args.messages, lambda: sum(1 for _ in hl7v2.split_messages(path)))
+        timed("index segments", args.messages, lambda: sum(len(m) for m in hl7v2.iter_messages(path)))
+        rate, resources = timed("convert to FHIR models", args.messages, lambda: list(hl7v2.convert(path)))
+        print(f"{len(resources):,} resources; target {TARGET:,} messages/s: {'met' if rate >= TARGET else 'NOT met'}")
+
+        # the constructed models are what validation would have produced
+        for resource in resources[:200]:
+            assert compat.validate(type(resource), serialize.to_fhir_dict(resource)) == resource
+        sample = resources[:20_000]
+        timed("  (validating the same JSON)", len(sample) * args.messages // len(resources),
+              lambda: [registry.parse(serialize.dumps(r)) for r in sample])
+    finally:
+        if args.corpus is None:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
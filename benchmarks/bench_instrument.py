@@ -0,0 +1,85 @@
+# Cost of instrument.enable(): parsing and serializing the same resources with
+# instrumentation off, on with the default profiling rates, on with a JSON
+# log sink, and profiling every call.
+#
+#   python benchmarks/bench_instrument.py [--records N]
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrument  # noqa: E402
+import registry  # noqa: E402
+import serialize  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+
+def timed(fn, repeat=3):
+    gc.collect()
+    gc.disable()
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark")
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = [json.dumps(observation(i) if i % 4 else encounter(i)) for i in range(args.records)]
+    models = [registry.parse(r) for r in rows]
+
+    def workload():
+        for r in rows:
+            registry.parse(r)
+        for m in models:
+            serialize.dumps(m)
+
+    calls = 2 * len(rows)
+    baseline = timed(workload)
+    print(f"{'disabled':<40}{baseline / calls * 1e6:8.2f} us/call")
+    with open(os.devnull, "w") as devnull:
+        for label, sinks, kwargs in (
+            ("MemorySink, default profiling", [instrument.MemorySink()], {}),
+            ("MemorySink, no profiling", [instrument.MemorySink()], {"field_every": 0, "allocation_every": 0}),
+            ("JSONLogSink", [instrument.JSONLogSink(devnull)], {}),
+            ("MemorySink, fields on every call", [instrument.MemorySink()], {"field_every": 1, "allocation_every": 0}),
+        ):
+            instrument.enable(*sinks, **kwargs)
+            try:
+                elapsed = timed(workload)
+            finally:
+                instrument.disable()
+            print(f"{label:<40}{elapsed / calls * 1e6:8.2f} us/call  {elapsed / baseline - 1:+7.1%}")
+
+    # about ten allocation samples per operation, whatever --records is
+    every = max(1, args.records // 10)
+    sink = instrument.MemorySink()
+    instrument.enable(sink, field_every=min(100, every), allocation_every=every)
+    workload()
+    instrument.disable()
+    summary = sink.summary()["parse"]["Observation"]
+    slowest = sorted(summary["fields"].items(), key=lambda kv: -kv[1]["mean"])[:3]
+    print("slowest Observation fields to validate:", ", ".join(f"{k} {v['mean'] * 1e6:.1f} us" for k, v in slowest))
+    allocations = summary.get("allocations")
+    if allocations is None:
+        print("Observation parse allocations: no sample taken")
+    else:
+        print(f"Observation parse allocations: {allocations['blocks']:.0f} blocks, {allocations['bytes']:.0f} bytes kept, "
+              f"{allocations['peak_bytes']:.0f} bytes peak ({allocations['samples']} samples)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Lazy resources (lazy.load + reading a few fields) against full validation,
+# both starting from raw JSON bytes.
+#
+#   python benchmarks/bench_lazy.py [--records N]
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lazy  # noqa: E402
+import registry  # noqa: E402
+from payloads import eligibility_response, observation  # noqa: E402
+
+
+def timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lazy resource benchmark")
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # (payload, fields a typical consumer reads)
+    cases = [
+        (observation, ("status", "subject", "code")),
+        (eligibility_response, ("status", "patient")),
+    ]
+    for payload, fields in cases:
+        rows = [json.dumps(payload(i)).encode("utf-8") for i in range(args.records)]
+        name = registry.parse(rows[0]).resourceType
+
+        def full():
+            for r in rows:
+                resource = registry.parse(r)
+                for f in fields:
+                    getattr(resource, f)
+
+        def lazily():
+            for r in rows:
+                resource = lazy.load(r)
+                for f in fields:
+                    getattr(resource, f)
+
+        base = timed(full)
+        fast = timed(lazily)
+        print(
+            f"{name:<30} {'/'.join(fields):<22} full {args.records / base:10,.0f} rec/s"
+            f"   lazy {args.records / fast:10,.0f} rec/s   {base / fast:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Memory held by N parsed Observations, with and without interning of
+# repeated Coding/CodeableConcept values (interning.InternPool). Each mode runs
+# in a fresh interpreter and reports resident memory growth.
+#
+#   python benchmarks/bench_memory.py [--records N]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import gc, json, sys, time
+sys.path.insert(0, "benchmarks")
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+import registry
+from interning import InternPool
+from payloads import observation
+
+records, mode = int(sys.argv[1]), sys.argv[2]
+pool = InternPool() if mode == "interned" else None
+registry.get_model("Observation")
+gc.collect()
+before = rss_kb()
+t0 = time.perf_counter()
+kept = []
+for i in range(records):
+    # through JSON text, so every record has its own strings as in a real stream
+    resource = registry.parse(json.dumps(observation(i)))
+    if pool is not None:
+        resource = pool.intern(resource)
+    kept.append(resource)
+elapsed = time.perf_counter() - t0
+gc.collect()
+print(json.dumps({
+    "rss_kb": rss_kb() - before,
+    "elapsed_s": elapsed,
+    "pooled": len(pool) if pool is not None else 0,
+}))
+"""
+
+
+def run(records, mode):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, str(records), mode],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Observation memory benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.records:,} Observations")
+    results = {mode: run(args.records, mode) for mode in ("plain", "interned")}
+    for mode, r in results.items():
+        print(
+            f"{mode:<10}{r['rss_kb'] / 1024:10.1f} MiB {r['rss_kb'] * 1024 / args.records:8.0f} B/rec"
+            f"{args.records / r['elapsed_s']:10,.0f} rec/s   pooled values {r['pooled']}"
+        )
+    print(f"memory saved {1 - results['interned']['rss_kb'] / results['plain']['rss_kb']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
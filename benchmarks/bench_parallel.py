@@ -0,0 +1,65 @@
+# Throughput of parallel.validate_parallel against worker count, with the
+# single-process ndjson.read_ndjson as the baseline.
+#
+#   python benchmarks/bench_parallel.py [--records N] [--workers 1,2,4,8]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ndjson import read_ndjson  # noqa: E402
+from parallel import validate_parallel  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+
+def write_corpus(path, records):
+    with open(path, "w") as f:
+        for i in range(records):
+            f.write(json.dumps(encounter(i) if i % 4 == 0 else observation(i)))
+            f.write("\n")
+
+
+def timed(label, records, iterator):
+    t0 = time.perf_counter()
+    count = sum(1 for _ in iterator)
+    elapsed = time.perf_counter() - t0
+    assert count == records, (count, records)
+    print(f"{label:<24}{elapsed:8.2f} s {records / elapsed:12,.0f} rec/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel validation throughput benchmark")
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--workers", default=None, help="comma-separated worker counts")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--unordered", action="store_true")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        counts = sorted({1, 2, 4, 8, 16, 32, 64, cpus} & set(range(1, cpus + 1)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.ndjson")
+        write_corpus(path, args.records)
+        print(f"{args.records:,} records, {cpus} CPUs, batch size {args.batch_size}")
+        base = timed("read_ndjson", args.records, read_ndjson(path))
+        for n in counts:
+            elapsed = timed(
+                f"validate_parallel x{n}",
+                args.records,
+                validate_parallel(path, workers=n, batch_size=args.batch_size, ordered=not args.unordered),
+            )
+            print(f"{'':<24}speedup {base / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# patch.apply_patch against rebuilding the resource from its JSON and
+# re-validating it whole, for the edits our services make most.
+#
+#   python benchmarks/bench_patch.py [--repeat N]
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import patch  # noqa: E402
+import registry  # noqa: E402
+import serialize  # noqa: E402
+from payloads import care_plan, eligibility_response  # noqa: E402
+
+
+def timed(fn, repeat):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - t0) / repeat
+    finally:
+        gc.enable()
+
+
+def rebuild(resource, ops):
+    # what callers did before: dump, edit the dict, validate everything again
+    data = serialize.to_fhir_dict(resource)
+    for op in ops:
+        *parents, last = op["path"].lstrip("/").split("/")
+        node = data
+        for token in parents:
+            node = node[int(token)] if isinstance(node, list) else node[token]
+        if last == "-":
+            node.append(op["value"])
+        else:
+            node[int(last) if isinstance(node, list) else last] = op["value"]
+    return compat.validate(type(resource), data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental patch benchmark")
+    parser.add_argument("--repeat", type=int, default=2_000)
+    args = parser.parse_args()
+
+    cases = [
+        ("CarePlan activity status", registry.parse(care_plan(1)),
+         [{"op": "replace", "path": "/activity/0/detail/status", "value": "completed"}]),
+        ("CoverageEligibilityResponse disposition", registry.parse(eligibility_response(1)),
+         [{"op": "add", "path": "/disposition", "value": "Policy is currently in-force."}]),
+        ("CarePlan append activity", registry.parse(care_plan(1)),
+         [{"op": "add", "path": "/activity/-", "value": serialize.to_fhir_dict(registry.parse(care_plan(2)).activity[0])}]),
+    ]
+    for label, resource, ops in cases:
+        assert patch.apply_patch(resource, ops) == rebuild(resource, ops)
+        base = timed(lambda: rebuild(resource, ops), args.repeat)
+        fast = timed(lambda: patch.apply_patch(resource, ops), args.repeat)
+        print(f"{label:<42} rebuild {base * 1e6:9.1f} us   patch {fast * 1e6:9.1f} us   {base / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
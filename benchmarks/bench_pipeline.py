@@ -0,0 +1,86 @@
+# Event-loop responsiveness while ingesting NDJSON: validating inline in a
+# coroutine (what the gateway did) against pipeline.Pipeline with thread and
+# process executors. A ticker coroutine measures how late the loop wakes it.
+#
+#   python benchmarks/bench_pipeline.py [--records N] [--workers N]
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import registry  # noqa: E402
+from pipeline import Histogram, Pipeline  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+TICK = 0.001
+
+
+class Reader:
+    # stands in for an asyncio.StreamReader
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    async def read(self, n):
+        await asyncio.sleep(0)
+        return self._stream.read(n)
+
+
+async def ticker(lag: Histogram, done: asyncio.Event):
+    while not done.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lag.record(time.perf_counter() - t0 - TICK)
+
+
+async def measure(label, records, ingest):
+    lag, done = Histogram(), asyncio.Event()
+    tick = asyncio.ensure_future(ticker(lag, done))
+    t0 = time.perf_counter()
+    await ingest()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await tick
+    print(f"{label:<22}{records / elapsed:10,.0f} rec/s   loop lag p50 {lag.percentile(50) * 1e3:7.2f} ms"
+          f"  p99 {lag.percentile(99) * 1e3:7.2f} ms  max {lag.max * 1e3:7.1f} ms")
+
+
+async def main(args):
+    lines = [json.dumps(observation(i) if i % 4 else encounter(i)) for i in range(args.records)]
+    data = ("\n".join(lines) + "\n").encode()
+    written = []
+
+    async def inline():
+        reader = Reader(data)
+        pending = b""
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                break
+            *complete, pending = (pending + chunk).split(b"\n")
+            for line in complete:
+                d = json.loads(line)
+                written.append(compat.validate(registry.get_model(d["resourceType"]), d))
+
+    await measure("inline", args.records, inline)
+    await measure("pipeline, threads", args.records,
+                  lambda: Pipeline.from_ndjson(Reader(data), written.extend, workers=args.workers).run())
+    with ProcessPoolExecutor(args.workers) as executor:
+        await measure("pipeline, processes", args.records,
+                      lambda: Pipeline.from_ndjson(Reader(data), written.extend, executor=executor,
+                                                   workers=args.workers).run())
+    assert len(written) == 3 * args.records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="asyncio ingestion pipeline benchmark")
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    asyncio.run(main(parser.parse_args()))
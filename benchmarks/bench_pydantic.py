@@ -0,0 +1,95 @@
+# Validation and serialization throughput of the resource models under the
+# installed pydantic, or side by side under several interpreters (e.g. one
+# environment with pydantic 1.x and one with 2.x) via --python.
+#
+#   python benchmarks/bench_pydantic.py [--records N] [--python PY ...]
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+from CarePlan import CarePlan  # noqa: E402
+from CoverageEligibilityResponse import CoverageEligibilityResponse  # noqa: E402
+from encounter import Encounter  # noqa: E402
+from observation import Observation  # noqa: E402
+from payloads import care_plan, eligibility_response, encounter, observation  # noqa: E402
+
+CASES = [
+    (Observation, observation),
+    (Encounter, encounter),
+    (CarePlan, care_plan),
+    (CoverageEligibilityResponse, eligibility_response),
+]
+
+
+def timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+
+def run(records):
+    # {model: {operation: records per second}}
+    results = {}
+    for model, payload in CASES:
+        dicts = [payload(i) for i in range(records)]
+        raws = [json.dumps(d).encode("utf-8") for d in dicts]
+        instances = [compat.validate(model, d) for d in dicts]
+        results[model.__name__] = {
+            op: records / timed(fn)
+            for op, fn in (
+                ("validate", lambda: [compat.validate(model, d) for d in dicts]),
+                ("validate_json", lambda: [compat.validate_json(model, r) for r in raws]),
+                ("to_dict", lambda: [compat.to_dict(m, by_alias=True, exclude_none=True) for m in instances]),
+                ("to_json", lambda: [compat.to_json(m, by_alias=True, exclude_none=True) for m in instances]),
+            )
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pydantic validation / serialization benchmark")
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--python", action="append", default=[],
+                        help="interpreter to run under (repeatable); default: this one")
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)  # child mode
+    args = parser.parse_args()
+
+    if args.json or not args.python:
+        import pydantic
+        results = {"pydantic": pydantic.VERSION, "models": run(args.records)}
+        if args.json:
+            print(json.dumps(results))
+            return
+        runs = [results]
+    else:
+        runs = []
+        for python in args.python:
+            out = subprocess.run(
+                [python, os.path.abspath(__file__), "--json", "--records", str(args.records)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            runs.append(json.loads(out))
+
+    ops = ["validate", "validate_json", "to_dict", "to_json"]
+    print(f"{args.records:,} records per model, rec/s")
+    print(f"{'pydantic':<10}{'model':<30}" + "".join(f"{op:>15}" for op in ops))
+    for results in runs:
+        for name, rates in results["models"].items():
+            print(f"{results['pydantic']:<10}{name:<30}" + "".join(f"{rates[op]:15,.0f}" for op in ops))
+
+
+if __name__ == "__main__":
+    main()
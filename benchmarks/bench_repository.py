@@ -0,0 +1,103 @@
+# Insert and query throughput of repository.Repository on a file database.
+# Rows are generated and written as a stream, so memory stays flat at any
+# --rows; the default 10M rows need about 40 GB of disk.
+#
+#   python benchmarks/bench_repository.py [--rows N] [--batch-size N] [--path FILE]
+
+import argparse
+import gc
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import repository  # noqa: E402
+import trusted  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+
+POOL = 10_000
+
+# Building models costs more than storing them, so rows cycle through a pool
+# of prebuilt ones under distinct keys; four Observations per Encounter, as
+# in our feeds. Each subject therefore recurs every POOL rows.
+_pool = [trusted.parse(encounter(i // 5) if i % 5 == 0 else observation(i)) for i in range(POOL)]
+
+
+def row(i):
+    return f"{'Encounter' if i % 5 == 0 else 'Observation'}/{i}", _pool[i % POOL]
+
+
+def load(repo, indexes, chunk=100_000):
+    # upsert_many returns every key, so feed it a chunk at a time
+    indexes = iter(indexes)
+    while True:
+        rows = [row(i) for i in itertools.islice(indexes, chunk)]
+        if not rows:
+            return
+        repo.upsert_many([r for _, r in rows], [k for k, _ in rows])
+
+
+def timed(fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - t0, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite repository benchmark")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=repository.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--path", help="database file (default: a temporary file, removed afterwards)")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.mkdtemp(), "bench.db")
+    repo = repository.Repository(path, batch_size=args.batch_size)
+    try:
+        elapsed, _ = timed(lambda: load(repo, range(args.rows)))
+        size = os.path.getsize(path) / 2**30
+        print(f"upsert_many {args.rows:>12,} rows {elapsed:9.1f} s {args.rows / elapsed:10,.0f} rows/s   ({size:.1f} GiB)")
+
+        rng = random.Random(0)
+        sample = [row(i)[0] for i in rng.sample(range(args.rows), min(args.queries, args.rows))]
+        subjects = [f"Patient/{rng.randrange(1000)}" for _ in range(args.queries)]  # payloads use 1000 patients
+
+        def report(label, n, elapsed, rows):
+            print(f"{label:<34}{n / elapsed:10,.0f} queries/s {elapsed / n * 1e3:9.3f} ms/query   ({rows:,} rows)")
+
+        elapsed, _ = timed(lambda: [repo.get(k) for k in sample])
+        report("get by key", len(sample), elapsed, len(sample))
+        elapsed, rows = timed(lambda: sum(len(list(repo.find(subject=s, limit=20, newest_first=True))) for s in subjects))
+        report("find by subject, newest 20", len(subjects), elapsed, rows)
+        elapsed, rows = timed(lambda: sum(
+            repo.count("Observation", subject=s, since="2024-01-10", until="2024-01-20") for s in subjects
+        ))
+        report("count Observation by subject+date", len(subjects), elapsed, rows)
+        elapsed, rows = timed(lambda: repo.count("Encounter", status="finished"))
+        report("count Encounter by status", 1, elapsed, rows)
+        elapsed, rows = timed(lambda: len(list(repo.find("Observation", limit=1000, newest_first=True))))
+        report("newest 1000 Observations", 1, elapsed, rows)
+
+        updates = range(0, args.rows, max(args.rows // 100_000, 1))
+        elapsed, _ = timed(lambda: load(repo, updates))
+        print(f"upsert_many (updates) {len(updates):>10,} rows {elapsed:9.1f} s {len(updates) / elapsed:10,.0f} rows/s")
+    finally:
+        repo.close()
+        if args.path is None:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# FHIR search through SearchStore's parameter indexes against filtering the
+# same resources with list comprehensions, plus the cost of indexing.
+#
+#   python benchmarks/bench_search.py [--records N] [--repeat N]
+
+import argparse
+import gc
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search  # noqa: E402
+import trusted  # noqa: E402
+from payloads import observation  # noqa: E402
+
+
+def timed(fn, repeat=1):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return (time.perf_counter() - t0) / repeat, result
+    finally:
+        gc.enable()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search-parameter index benchmark")
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    resources = [trusted.parse(observation(i)) for i in range(args.records)]
+    store = search.SearchStore()
+    elapsed, _ = timed(lambda: [store.insert(r) for r in resources])
+    print(f"index {args.records:,} Observations  {elapsed:8.3f} s {args.records / elapsed:12,.0f} rec/s")
+
+    subject = resources[len(resources) // 2].subject.reference
+    since = datetime(2024, 1, 20, tzinfo=timezone.utc)
+
+    def components(o):
+        return [c.valueQuantity.value for c in o.component or () if c.valueQuantity is not None]
+
+    cases = [
+        ("subject", f"subject={subject}",
+         lambda: [o for o in resources if o.subject.reference == subject]),
+        ("code + date", "code=http://loinc.org|85354-9&date=ge2024-01-20",
+         lambda: [o for o in resources
+                  if any(c.system == "http://loinc.org" and c.code == "85354-9" for c in o.code.coding)
+                  and o.effectiveDateTime >= since]),
+        ("quantity range", "component-value-quantity=gt130",
+         lambda: [o for o in resources if any(v > 130 for v in components(o))]),
+        ("date, sorted, first page", "date=ge2024-01-20&_sort=-date&_count=20",
+         lambda: sorted((o for o in resources if o.effectiveDateTime >= since),
+                        key=lambda o: o.effectiveDateTime, reverse=True)),
+    ]
+    for label, query, scan in cases:
+        store.search("Observation", query)  # build the sorted arrays outside the timing
+        base, expected = timed(scan, args.repeat)
+        if "_count" not in query:
+            query += "&_count=1000000"  # every match, as the scan returns
+        fast, result = timed(lambda: store.search("Observation", query), args.repeat)
+        assert result.total == len(expected), (label, result.total, len(expected))
+        print(f"{label:<26} scan {base * 1e3:9.2f} ms   search {fast * 1e3:9.2f} ms   {base / fast:7.1f}x"
+              f"   ({result.total:,} matches)")
+
+
+if __name__ == "__main__":
+    main()
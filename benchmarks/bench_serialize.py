@@ -0,0 +1,61 @@
+# serialize.dumps (orjson and stdlib backends) against pydantic's own JSON dump on a
+# large searchset Bundle.
+#
+#   python benchmarks/bench_serialize.py [--entries N] [--repeat R]
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import serialize  # noqa: E402
+from Bundle import Bundle  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+
+def timed(label, repeat, fn):
+    gc.collect()
+    gc.disable()
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+    finally:
+        gc.enable()
+    print(f"{label:<36}{best * 1000:10.1f} ms {len(out) / best / 1e6:8.1f} MB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FHIR JSON serialization benchmark")
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = compat.validate(Bundle, {
+        "resourceType": "Bundle",
+        "type": "searchset",
+        "total": args.entries,
+        "entry": [
+            {"fullUrl": f"urn:uuid:{i}", "resource": encounter(i) if i % 4 == 0 else observation(i), "search": {"mode": "match"}}
+            for i in range(args.entries)
+        ],
+    })
+    print(f"Bundle with {args.entries:,} entries")
+
+    base = timed("to_json(by_alias, exclude_none)", args.repeat, lambda: compat.to_json(bundle, by_alias=True, exclude_none=True))
+    for backend in sorted(serialize.BACKENDS):
+        # compared after re-validation: v2 writes UTC as "Z", the backends as "+00:00"
+        assert compat.validate_json(Bundle, serialize.dumps(bundle, backend)) == bundle, backend
+        elapsed = timed(f"serialize.dumps[{backend}]", args.repeat, lambda: serialize.dumps(bundle, backend))
+        print(f"{'':<36}speedup {base / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
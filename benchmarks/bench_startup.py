@@ -0,0 +1,101 @@
+# Cold-start benchmark: import time and resident memory before/after importing
+# every resource module. Each run happens in a fresh interpreter.
+#
+#   python benchmarks/bench_startup.py [--runs N]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESOURCE_MODULES = [
+    "Allergy_intolerance",
+    "CarePlan",
+    "CareTeam",
+    "Composition",
+    "Coverage",
+    "CoverageEligibilityRequest",
+    "CoverageEligibilityResponse",
+    "Device",
+    "DeviceRequest",
+    "encounter",
+    "observation",
+]
+
+CHILD = r"""
+import importlib, json, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+import pydantic
+before = rss_kb()
+t0 = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - t0
+after = rss_kb()
+
+models = set()
+per_type = {}
+for name in sys.argv[1:]:
+    for obj in vars(sys.modules[name]).values():
+        if isinstance(obj, type) and issubclass(obj, pydantic.BaseModel):
+            models.add(obj)
+for cls in models:
+    per_type.setdefault(cls.__name__, set()).add(cls)
+
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_before_kb": before,
+    "rss_after_kb": after,
+    "model_classes": len(models),
+    "datatype_classes": {
+        n: len(per_type.get(n, ()))
+        for n in ("Coding", "CodeableConcept", "Reference", "Identifier", "Period")
+    },
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, *RESOURCE_MODULES],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resource module cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    times = [r["import_s"] * 1000 for r in results]
+    before = statistics.median(r["rss_before_kb"] for r in results)
+    after = statistics.median(r["rss_after_kb"] for r in results)
+
+    print(f"modules imported:     {len(RESOURCE_MODULES)}")
+    print(f"import time (ms):     median {statistics.median(times):.1f}  min {min(times):.1f}  max {max(times):.1f}")
+    print(f"RSS before (MiB):     {before / 1024:.1f}")
+    print(f"RSS after (MiB):      {after / 1024:.1f}  (+{(after - before) / 1024:.1f})")
+    print(f"model classes:        {results[0]['model_classes']}")
+    for name, count in results[0]["datatype_classes"].items():
+        print(f"  {name + ':':<20}{count} definition(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# ValueSet membership: a large code list loaded from CSV (a SNOMED-sized
+# subset), checked through terminology.Expansion against scanning the list of
+# concepts, plus what enabling the binding hook adds to validation.
+#
+#   python benchmarks/bench_terminology.py [--codes N] [--lookups N] [--records N]
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import registry  # noqa: E402
+import terminology  # noqa: E402
+from datatypes import Coding  # noqa: E402
+from payloads import encounter, observation  # noqa: E402
+
+SNOMED = "http://snomed.info/sct"
+URL = "http://example.org/ValueSet/findings"
+
+
+def timed(label, n, fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    print(f"{label:<36}{elapsed * 1e3:10.1f} ms {elapsed / n * 1e6:10.3f} us each")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ValueSet membership benchmark")
+    parser.add_argument("--codes", type=int, default=300_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--records", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    codes = [str(100000000 + 7919 * i) for i in range(args.codes)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "findings.tsv")
+        with open(path, "w") as f:
+            f.write("id\tactive\treferencedComponentId\n")
+            f.writelines(f"{i}\t1\t{code}\n" for i, code in enumerate(codes))
+        terms = terminology.Terminology()
+        timed("load CSV", args.codes, lambda: terms.load_csv(path, URL, system=SNOMED,
+                                                             code_column="referencedComponentId"))
+    expansion = timed("expand (first use)", args.codes, lambda: terms.expand(URL))
+
+    # half members, half not
+    probes = [Coding(system=SNOMED, code=rng.choice(codes) if i % 2 else str(i)) for i in range(args.lookups)]
+    hits = timed("Coding in Expansion", args.lookups, lambda: sum(c in expansion for c in probes))
+    concepts = [{"code": code} for code in codes]  # the concept list load_csv builds
+    sample = probes[:50]
+    scanned = timed("scanning the concept list (50)", len(sample),
+                    lambda: sum(any(c.system == SNOMED and c.code == x["code"] for x in concepts) for c in sample))
+    assert scanned == sum(c in expansion for c in sample) and hits == args.lookups // 2
+
+    rows = [json.dumps(observation(i) if i % 2 else encounter(i)) for i in range(args.records)]
+    [registry.parse(r) for r in rows[:100]]  # warm up
+    timed("validate", args.records, lambda: [registry.parse(r) for r in rows])
+    terminology.enable(terms)
+    try:
+        timed("validate + required bindings", args.records, lambda: [registry.parse(r) for r in rows])
+    finally:
+        terminology.disable()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# "Hourly mean heart rate per patient over 30 days": grouping a list of
+# Observations in Python against timeseries.TimeSeriesStore, in memory and
+# spilled to memory-mapped files.
+#
+#   python benchmarks/bench_timeseries.py [--patients N] [--interval MINUTES]
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeseries  # noqa: E402
+import trusted  # noqa: E402
+from payloads import heart_rate  # noqa: E402
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+END = START + timedelta(days=30)
+HOUR = timedelta(hours=1)
+
+
+def timed(label, fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    print(f"{label:<34}{elapsed * 1e3:10.1f} ms")
+    return result
+
+
+def by_hand(observations):
+    sums = defaultdict(lambda: [0.0, 0])
+    for obs in observations:
+        if obs.code.coding[0].code != "8867-4" or not START <= obs.effectiveDateTime < END:
+            continue
+        hour = obs.effectiveDateTime.replace(minute=0, second=0, microsecond=0)
+        acc = sums[(obs.subject.reference, hour)]
+        acc[0] += obs.valueQuantity.value
+        acc[1] += 1
+    return {key: total / n for key, (total, n) in sums.items()}
+
+
+def hourly(store):
+    return store.downsample_all("8867-4", HOUR, START, END)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-series store benchmark")
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--interval", type=int, default=10, help="minutes between a patient's samples")
+    args = parser.parse_args()
+
+    n = args.patients * 30 * 24 * 60 // args.interval
+    observations = [trusted.parse(heart_rate(i, args.patients, args.interval)) for i in range(n)]
+    print(f"{n:,} heart-rate Observations, {args.patients} patients, 30 days")
+
+    expected = timed("list of Observations", lambda: by_hand(observations))
+
+    store = timeseries.TimeSeriesStore()
+    timed("ingest", lambda: store.extend(observations))
+    timed("first query (merges appends)", lambda: hourly(store))
+    result = timed("hourly mean per patient", lambda: hourly(store))
+
+    got = {
+        (ref, buckets.start[i].astype(datetime).replace(tzinfo=timezone.utc)): buckets.mean[i]
+        for ref, buckets in result.items()
+        for i in range(len(buckets))
+    }
+    assert got.keys() == expected.keys()
+    assert all(abs(got[k] - expected[k]) < 1e-9 for k in expected)
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        spilled = timeseries.TimeSeriesStore(spill_dir=spill_dir, max_resident_points=n // 10)
+        timed("ingest, spilling", lambda: spilled.extend(observations))
+        hourly(spilled)
+        timed("hourly mean per patient, spilled", lambda: hourly(spilled))
+        spilled.close()
+
+
+if __name__ == "__main__":
+    main()
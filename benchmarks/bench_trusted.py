@@ -0,0 +1,50 @@
+# Trusted construction (trusted.construct) against validation on
+# realistic Observation payloads.
+#
+#   python benchmarks/bench_trusted.py [--records N]
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compat  # noqa: E402
+import trusted  # noqa: E402
+from observation import Observation  # noqa: E402
+from payloads import observation  # noqa: E402
+
+
+def timed(label, records, fn):
+    # like timeit, keep the cyclic GC out of the measurement
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    print(f"{label:<22}{elapsed:8.3f} s {records / elapsed:12,.0f} rec/s {elapsed / records * 1e6:8.1f} us/rec")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trusted vs validating construction benchmark")
+    parser.add_argument("--records", type=int, default=50_000)
+    args = parser.parse_args()
+
+    # round-trip through JSON, as a database read would
+    rows = [json.loads(json.dumps(observation(i))) for i in range(args.records)]
+    assert trusted.construct(Observation, rows[0]) == compat.validate(Observation, rows[0])
+
+    validated = timed("validate", args.records, lambda: [compat.validate(Observation, r) for r in rows])
+    fast = timed("trusted.construct", args.records, lambda: [trusted.construct(Observation, r) for r in rows])
+    print(f"speedup {validated / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Mean systolic pressure over Observations whose units vary ("mmHg",
+# "mm[Hg]", "kPa"): parsing every unit string as it comes, ucum.normalize with
+# its cached parses, and ucum.convert_array over numeric.observation_arrays.
+#
+#   python benchmarks/bench_ucum.py [--records N]
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numeric  # noqa: E402
+import trusted  # noqa: E402
+import ucum  # noqa: E402
+from payloads import observation  # noqa: E402
+
+SPELLINGS = ("mmHg", "mm[Hg]", "kPa")
+
+
+def timed(label, n, fn):
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+    finally:
+        gc.enable()
+    print(f"{label:<34}{elapsed * 1e3:10.1f} ms {n / elapsed:14,.0f} values/s")
+    return result
+
+
+def mixed_units(i):
+    data = observation(i)
+    quantity = data["component"][0]["valueQuantity"]
+    unit = SPELLINGS[i % len(SPELLINGS)]
+    if unit == "kPa":
+        quantity["value"] = round(ucum.convert(quantity["value"], "mm[Hg]", "kPa"), 4)
+    quantity["unit"] = quantity["code"] = unit
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UCUM normalization benchmark")
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+
+    observations = [trusted.parse(mixed_units(i)) for i in range(args.records)]
+    quantities = [obs.component[0].valueQuantity for obs in observations]
+    uncached = ucum.parse.__wrapped__
+    n = len(quantities)
+
+    def ad_hoc():
+        total = 0.0
+        for q in quantities:
+            unit = uncached(q.code)
+            total += q.value * unit.factor + unit.offset
+        return total / n
+
+    def cached():
+        return sum(ucum.normalize(q).value for q in quantities) / n
+
+    def vectorized():
+        arrays = numeric.observation_arrays(observations, component_codes=["8480-6"])
+        values, _ = ucum.convert_array(arrays.component_value, arrays.component_unit)
+        return values.mean()
+
+    expected = timed("parse per value", n, ad_hoc)
+    assert abs(timed("ucum.normalize (cached)", n, cached) - expected) < 1e-6 * expected
+    assert abs(timed("observation_arrays + convert_array", n, vectorized) - expected) < 1e-6 * expected
+    arrays = numeric.observation_arrays(observations, component_codes=["8480-6"])
+    values, _ = timed("convert_array alone", n, lambda: ucum.convert_array(arrays.component_value,
+                                                                           arrays.component_unit, "mm[Hg]"))
+    print(f"mean systolic {values.mean():.2f} mm[Hg]; {ucum.parse.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
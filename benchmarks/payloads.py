@@ -0,0 +1,159 @@
+# Realistic resource payloads shared by the benchmarks.
+
+
+def observation(i=0):
+    # blood pressure panel, as sent by our vitals devices
+    return {
+        "resourceType": "Observation",
+        "status": "final",
+        "category": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/observation-category", "code": "vital-signs", "display": "Vital Signs"}]}],
+        "code": {"coding": [{"system": "http://loinc.org", "code": "85354-9", "display": "Blood pressure panel"}], "text": "Blood pressure"},
+        "subject": {"reference": f"Patient/{i % 1000}"},
+        "encounter": {"reference": f"Encounter/{i % 5000}"},
+        "effectiveDateTime": f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00+00:00",
+        "issued": "2024-01-01T12:05:00+00:00",
+        "performer": [{"reference": "Practitioner/7"}],
+        "interpretation": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/v3-ObservationInterpretation", "code": "N"}]}],
+        "bodySite": {"coding": [{"system": "http://snomed.info/sct", "code": "368209003", "display": "Right arm"}]},
+        "device": {"reference": f"Device/{i % 50}"},
+        "component": [
+            {
+                "code": {"coding": [{"system": "http://loinc.org", "code": "8480-6", "display": "Systolic blood pressure"}]},
+                "valueQuantity": {"value": 120.0 + i % 20, "unit": "mmHg", "system": "http://unitsofmeasure.org", "code": "mm[Hg]"},
+                "referenceRange": [{"low": {"value": 90.0, "unit": "mmHg"}, "high": {"value": 140.0, "unit": "mmHg"}}],
+            },
+            {
+                "code": {"coding": [{"system": "http://loinc.org", "code": "8462-4", "display": "Diastolic blood pressure"}]},
+                "valueQuantity": {"value": 80.0 + i % 10, "unit": "mmHg", "system": "http://unitsofmeasure.org", "code": "mm[Hg]"},
+                "referenceRange": [{"low": {"value": 60.0, "unit": "mmHg"}, "high": {"value": 90.0, "unit": "mmHg"}}],
+            },
+        ],
+    }
+
+
+def heart_rate(i=0, patients=1000, interval_minutes=1):
+    # device heart-rate sample; each patient's samples are interval_minutes apart
+    minutes = (i // patients) * interval_minutes
+    return {
+        "resourceType": "Observation",
+        "status": "final",
+        "category": [{"coding": [{"system": "http://terminology.hl7.org/CodeSystem/observation-category", "code": "vital-signs", "display": "Vital Signs"}]}],
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4", "display": "Heart rate"}]},
+        "subject": {"reference": f"Patient/{i % patients}"},
+        "effectiveDateTime": f"2024-01-{1 + minutes // 1440:02d}T{minutes // 60 % 24:02d}:{minutes % 60:02d}:00+00:00",
+        "device": {"reference": f"Device/{i % patients}"},
+        "valueQuantity": {"value": 60.0 + (i * 7) % 40, "unit": "beats/minute", "system": "http://unitsofmeasure.org", "code": "/min"},
+    }
+
+
+def encounter(i=0):
+    return {
+        "resourceType": "Encounter",
+        "status": "finished",
+        "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": "AMB"},
+        "subject": {"reference": f"Patient/{i % 1000}"},
+        "participant": [{"individual": {"reference": "Practitioner/7"}}],
+        "period": {"start": "2024-01-01T09:00:00", "end": "2024-01-01T10:00:00"},
+    }
+
+
+def care_plan(i=0):
+    return {
+        "resourceType": "CarePlan",
+        "status": "active",
+        "intent": "plan",
+        "category": [{"coding": [{"system": "http://snomed.info/sct", "code": "734163000", "display": "Care plan"}]}],
+        "subject": {"reference": f"Patient/{i % 1000}"},
+        "period": {"start": "2024-01-01T00:00:00+00:00", "end": "2024-06-30T00:00:00+00:00"},
+        "careTeam": [{"reference": f"CareTeam/{i % 100}"}],
+        "goal": [{"reference": f"Goal/{i}"}],
+        "activity": [
+            {
+                "detail": {
+                    "kind": "Appointment",
+                    "code": {"coding": [{"system": "http://snomed.info/sct", "code": "185389009", "display": "Follow-up visit"}]},
+                    "status": "scheduled",
+                    "scheduledPeriod": {"start": f"2024-02-{1 + i % 28:02d}T09:00:00+00:00"},
+                    "performer": [{"reference": "Practitioner/7"}],
+                    "description": "Follow-up",
+                }
+            }
+            for _ in range(3)
+        ],
+        "note": [{"authorReference": {"reference": "Practitioner/7"}, "text": "Reviewed with patient"}],
+    }
+
+
+def eligibility_response(i=0):
+    benefit = {"type": {"coding": [{"system": "http://terminology.hl7.org/CodeSystem/benefit-type", "code": "copay"}]},
+               "allowedMoney": {"value": 20.0, "currency": "USD"}, "usedMoney": {"value": 5.0, "currency": "USD"}}
+    return {
+        "resourceType": "CoverageEligibilityResponse",
+        "status": "active",
+        "purpose": ["benefits"],
+        "patient": {"reference": f"Patient/{i % 1000}"},
+        "created": "2024-01-01T00:00:00+00:00",
+        "request": {"reference": f"CoverageEligibilityRequest/{i}"},
+        "outcome": "complete",
+        "insurer": {"reference": "Organization/1"},
+        "insurance": [
+            {
+                "coverage": {"reference": f"Coverage/{i}"},
+                "inforce": True,
+                "benefitPeriod": {"start": "2024-01-01", "end": "2024-12-31"},
+                "item": [
+                    {
+                        "category": {"coding": [{"system": "http://terminology.hl7.org/CodeSystem/ex-benefitcategory", "code": str(30 + j)}]},
+                        "network": {"coding": [{"code": "in"}]},
+                        "unit": {"coding": [{"code": "individual"}]},
+                        "term": {"coding": [{"code": "annual"}]},
+                        "benefit": [benefit, benefit],
+                    }
+                    for j in range(5)
+                ],
+            }
+        ],
+    }
+
+
+def _pv1(fields):
+    return "|".join(["PV1", "1"] + [fields.get(n, "") for n in range(2, max(fields) + 1)])
+
+
+def hl7_adt(i=0):
+    # ADT^A01 admit / ADT^A03 discharge, CR-separated segments
+    event = "A03" if i % 2 else "A01"
+    day = 1 + i % 28
+    discharge = f"202401{day:02d}1630" if event == "A03" else ""
+    return "\r".join([
+        f"MSH|^~\\&|ADT1|GOOD HEALTH HOSPITAL|GHH LAB|GHH|202401{day:02d}0830||ADT^{event}^ADT_{event}|MSG{i:08d}|P|2.5.1",
+        f"EVN|{event}|202401{day:02d}0830",
+        f"PID|1||{i % 1000}^^^GHH^MR||Everywoman^Eve^E^^^^L||19620320|F|||2222 Home Street^^Greensboro^NC^27401||(555)555-2004",
+        _pv1({
+            2: "IEO"[i % 3],
+            3: "2000^2012^01^GHH",
+            7: f"{4000 + i % 50}^Osborne^Otto",
+            8: f"{5000 + i % 20}^Referrer^Rita",
+            10: "MED",
+            14: "7",
+            17: f"{6000 + i % 30}^Admitter^Adam",
+            19: f"V{i:08d}^^^GHH^VN",
+            36: "01" if event == "A03" else "",
+            44: f"202401{day:02d}0800",
+            45: discharge,
+        }),
+    ]) + "\r"
+
+
+def hl7_oru(i=0):
+    # ORU^R01 basic metabolic panel result, three OBX
+    day = 1 + i % 28
+    return "\r".join([
+        f"MSH|^~\\&|LAB|GHH|EHR|GHH|202401{day:02d}1200||ORU^R01^ORU_R01|LAB{i:08d}|P|2.5.1",
+        f"PID|1||{i % 1000}^^^GHH^MR||Everyman^Adam^A||19800101|M",
+        f"PV1|1|O|||||||||||||||||V{i:08d}^^^GHH^VN",
+        f"OBR|1|ORD{i:08d}|FIL{i:08d}|24323-8^Comprehensive metabolic panel^LN|||202401{day:02d}1100||||||||||||||202401{day:02d}1150|||F",
+        f"OBX|1|NM|2345-7^Glucose^LN||{70 + i % 60}|mg/dL^mg/dL^UCUM|70-99|{'H' if 70 + i % 60 > 99 else 'N'}|||F|||202401{day:02d}1100",
+        f"OBX|2|NM|2951-2^Sodium^LN||{135 + i % 10}|mmol/L^mmol/L^UCUM|135-145|N|||F|||202401{day:02d}1100",
+        "OBX|3|ST|8251-1^Service comment^LN||Specimen received \\T\\ processed||||||F",
+    ]) + "\r"
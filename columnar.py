@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Union
+
+from observation import Observation
+
+# pyarrow is optional; only the export functions below need it
+try:
+    import pyarrow as pa # type: ignore
+    import pyarrow.ipc # type: ignore
+    import pyarrow.parquet as pq # type: ignore
+except ImportError:  # pragma: no cover
+    pa = None
+
+DEFAULT_BATCH_SIZE = 1 << 16
+
+# One row per Observation component; Observations without components get a
+# single row with null component columns. `observation` is the position of the
+# Observation in the input stream and groups the exploded rows back together.
+COLUMNS = [
+    ("observation", "int64"),
+    ("status", "string"),
+    ("code_system", "string"),
+    ("code", "string"),
+    ("code_display", "string"),
+    ("subject_reference", "string"),
+    ("effective_datetime", "timestamp"),
+    ("value", "float64"),
+    ("value_unit", "string"),
+    ("component_code_system", "string"),
+    ("component_code", "string"),
+    ("component_value", "float64"),
+    ("component_unit", "string"),
+]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("columnar export requires pyarrow (pip install pyarrow)")
+
+
+def schema():
+    _require_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def _first_coding(concept):
+    if concept is None or not concept.coding:
+        return None
+    return concept.coding[0]
+
+
+def _utc(value):
+    # naive datetimes are taken as UTC; date-only values are not exported
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _rows(index: int, obs: Observation) -> Iterator[tuple]:
+    coding = _first_coding(obs.code)
+    quantity = obs.valueQuantity
+    head = (
+        index,
+        obs.status,
+        coding.system if coding else None,
+        coding.code if coding else None,
+        coding.display if coding else None,
+        obs.subject.reference if obs.subject else None,
+        _utc(obs.effectiveDateTime),
+        quantity.value if quantity else None,
+        quantity.unit if quantity else None,
+    )
+    if not obs.component:
+        yield head + (None, None, None, None)
+        return
+    for component in obs.component:
+        coding = _first_coding(component.code)
+        quantity = component.valueQuantity
+        yield head + (
+            coding.system if coding else None,
+            coding.code if coding else None,
+            quantity.value if quantity else None,
+            quantity.unit if quantity else None,
+        )
+
+
+def observation_batches(
+    observations: Iterable[Observation], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator["pa.RecordBatch"]:
+    """Flatten Observations into Arrow record batches of at most `batch_size` rows."""
+    _require_pyarrow()
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    arrow_schema = schema()
+    columns = [[] for _ in COLUMNS]
+
+    def flush():
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, arrow_schema)],
+            schema=arrow_schema,
+        )
+        for values in columns:
+            values.clear()
+        return batch
+
+    for index, obs in enumerate(observations):
+        for row in _rows(index, obs):
+            for values, cell in zip(columns, row):
+                values.append(cell)
+            if len(columns[0]) >= batch_size:
+                yield flush()
+    if columns[0]:
+        yield flush()
+
+
+def export_observations(
+    observations: Iterable[Observation],
+    sink: Union[str, IO],
+    format: str = "parquet",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Write Observations to `sink` as Parquet or Arrow IPC ("arrow"), batch by batch.
+
+    Only one batch is held in memory at a time. Returns the number of rows written.
+    """
+    _require_pyarrow()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema())
+    elif format == "arrow":
+        writer = pa.ipc.new_file(sink, schema())
+    else:
+        raise ValueError(f"unsupported format {format!r}, expected 'parquet' or 'arrow'")
+    rows = 0
+    with writer:
+        for batch in observation_batches(observations, batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
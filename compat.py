@@ -0,0 +1,191 @@
+"""pydantic v1 / v2 compatibility shim.
+
+The resource models are written to run natively on either major version of
+pydantic (on v2 they validate in pydantic-core). Code that needs to reach
+below the public model API -- validating, dumping, walking fields, building
+instances without validation -- goes through the helpers here instead of
+calling version-specific methods (`parse_obj` vs `model_validate`,
+`__fields__` vs `model_fields`, ...).
+"""
+
+from typing import Annotated, Any, Callable, Dict, List, NamedTuple, Set, Type, Union, get_args, get_origin
+import pydantic
+from pydantic import BaseModel, ValidationError # type: ignore
+
+PYDANTIC_V2 = pydantic.VERSION.startswith("2")
+
+if PYDANTIC_V2:
+    from pydantic import BeforeValidator, ConfigDict, field_validator # type: ignore
+    from pydantic_core import PydanticUndefined # type: ignore
+else:
+    from pydantic import validator # type: ignore
+    from pydantic.fields import SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SINGLETON # type: ignore
+
+    # only referenced behind `if PYDANTIC_V2`
+    ConfigDict = dict
+    BeforeValidator = None
+
+
+class FieldSpec(NamedTuple):
+    name: str
+    alias: str  # JSON key
+    type: Any  # element type, with Optional and List unwrapped
+    is_list: bool
+    required: bool
+    default: Any
+    allow_none: bool
+    has_validators: bool  # field-level validators or const
+    generic: bool  # shape the helpers do not unwrap (dicts, tuples, ...)
+
+
+_specs: Dict[type, List[FieldSpec]] = {}
+
+
+def before_validator(*fields: str):
+    """`@validator(..., pre=True)` on v1, `@field_validator(..., mode="before")` on v2."""
+    if PYDANTIC_V2:
+        return field_validator(*fields, mode="before")
+    return validator(*fields, pre=True, allow_reuse=True)
+
+
+def rebuild(*models: Type[BaseModel]) -> None:
+    # resolve forward references
+    for model in models:
+        if PYDANTIC_V2:
+            model.model_rebuild()
+        else:
+            model.update_forward_refs()
+
+
+# Called with every instance `validate` / `validate_json` (and the decoders)
+# return; a hook rejects the instance by raising ValueError. Empty unless
+# something opts in, e.g. terminology.enable().
+validation_hooks: List[Callable[[BaseModel], None]] = []
+
+
+def validate(model: Type[BaseModel], data: Any) -> BaseModel:
+    instance = model.model_validate(data) if PYDANTIC_V2 else model.parse_obj(data)
+    for hook in validation_hooks:
+        hook(instance)
+    return instance
+
+
+def validate_json(model: Type[BaseModel], raw: Union[str, bytes]) -> BaseModel:
+    instance = model.model_validate_json(raw) if PYDANTIC_V2 else model.parse_raw(raw)
+    for hook in validation_hooks:
+        hook(instance)
+    return instance
+
+
+def validate_field(instance: BaseModel, name: str, value: Any) -> None:
+    """Validate `value` for field `name` alone and store it on `instance`."""
+    model = type(instance)
+    if PYDANTIC_V2:
+        model.__pydantic_validator__.validate_assignment(instance, name, value)
+        return
+    field = model.__fields__[name]
+    value, errors = field.validate(value, instance.__dict__, loc=field.alias, cls=model)
+    if errors:
+        raise ValidationError([errors], model)
+    instance.__dict__[name] = value
+    instance.__fields_set__.add(name)
+
+
+def to_dict(instance: BaseModel, **kwargs) -> dict:
+    if PYDANTIC_V2:
+        return instance.model_dump(**kwargs)
+    return instance.dict(**kwargs)
+
+
+def to_json(instance: BaseModel, **kwargs) -> str:
+    if PYDANTIC_V2:
+        return instance.model_dump_json(**kwargs)
+    return instance.json(**kwargs)
+
+
+def fields_set(instance: BaseModel) -> Set[str]:
+    if PYDANTIC_V2:
+        return instance.model_fields_set
+    return instance.__fields_set__
+
+
+def construct(model: Type[BaseModel], values: dict, fields_set: Set[str]) -> BaseModel:
+    """Create an instance from already-converted `values` (every field, in order) without validation."""
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    if PYDANTIC_V2:
+        object.__setattr__(instance, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        if model.__private_attributes__:
+            instance.model_post_init(None)
+    else:
+        object.__setattr__(instance, "__fields_set__", fields_set)
+        if model.__private_attributes__:
+            instance._init_private_attributes()
+    return instance
+
+
+def field_specs(model: Type[BaseModel]) -> List[FieldSpec]:
+    """Version-independent description of `model`'s fields, in declaration order."""
+    specs = _specs.get(model)
+    if specs is None:
+        specs = _specs[model] = _field_specs_v2(model) if PYDANTIC_V2 else _field_specs_v1(model)
+    return specs
+
+
+def _field_specs_v1(model) -> List[FieldSpec]:
+    specs = []
+    for name, field in model.__fields__.items():
+        has_validators = bool(
+            field.class_validators or field.pre_validators or field.post_validators or field.field_info.const
+        )
+        specs.append(FieldSpec(
+            name=name,
+            alias=field.alias,
+            type=field.type_,
+            is_list=field.shape in (SHAPE_LIST, SHAPE_SEQUENCE),
+            required=bool(field.required),
+            default=field.default,
+            allow_none=field.allow_none,
+            has_validators=has_validators,
+            generic=field.shape not in (SHAPE_SINGLETON, SHAPE_LIST, SHAPE_SEQUENCE),
+        ))
+    return specs
+
+
+def _field_specs_v2(model) -> List[FieldSpec]:
+    validated = set()
+    for decorator in model.__pydantic_decorators__.field_validators.values():
+        validated.update(decorator.info.fields)
+    specs = []
+    for name, info in model.model_fields.items():
+        tp = info.annotation
+        annotated = False
+        allow_none = False
+        if get_origin(tp) is Union and type(None) in get_args(tp):
+            allow_none = True
+            args = [a for a in get_args(tp) if a is not type(None)]
+            tp = args[0] if len(args) == 1 else Union[tuple(args)]
+        if get_origin(tp) is Annotated:
+            annotated = True
+            tp = get_args(tp)[0]
+        is_list = get_origin(tp) in (list, List)
+        generic = False
+        if is_list:
+            tp = get_args(tp)[0] if get_args(tp) else Any
+        elif get_origin(tp) in (dict, tuple, set, frozenset):
+            generic = True
+        default = None if info.default is PydanticUndefined else info.default
+        specs.append(FieldSpec(
+            name=name,
+            alias=info.alias or name,
+            type=tp,
+            is_list=is_list,
+            required=info.is_required(),
+            default=default,
+            allow_none=allow_none,
+            has_validators=name in validated or annotated or bool(info.metadata),
+            generic=generic,
+        ))
+    return specs
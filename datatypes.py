@@ -0,0 +1,69 @@
+from typing import Annotated, List, Optional, Union
+from pydantic import BaseModel # type: ignore
+from compat import PYDANTIC_V2, BeforeValidator, rebuild
+from datetime import date, datetime
+
+# Shared FHIR datatypes used by every resource module. Defining them once means
+# pydantic builds a single validator per type and instances can be passed
+# between resources (e.g. an Encounter.subject reused as Observation.subject).
+
+
+def _date_only(value):
+    # a bare YYYY-MM-DD stays a date, as on pydantic v1
+    if value.__class__ is str and len(value) == 10:
+        return date.fromisoformat(value)
+    return value
+
+
+if PYDANTIC_V2:
+    # v2 turns a bare date into midnight when validating a dict but keeps it a
+    # date when validating JSON; pin v1's behaviour for both
+    DateTime = Annotated[Union[datetime, date], BeforeValidator(_date_only)]
+else:
+    DateTime = Union[datetime, date]
+
+
+class Element(BaseModel):
+    # keep the passed-in instance instead of copying it on assignment (v2
+    # never revalidates or copies model instances by default)
+    if not PYDANTIC_V2:
+        class Config:
+            copy_on_model_validation = "none"
+
+
+class Coding(Element):
+    system: Optional[str] = None
+    version: Optional[str] = None
+    code: Optional[str] = None
+    display: Optional[str] = None
+    userSelected: Optional[bool] = None
+
+
+class CodeableConcept(Element):
+    coding: Optional[List[Coding]] = None
+    text: Optional[str] = None
+
+
+class Period(Element):
+    # FHIR dateTime allows partial (date-only) values
+    start: Optional[DateTime] = None
+    end: Optional[DateTime] = None
+
+
+class Identifier(Element):
+    use: Optional[str] = None  # usual | official | temp | secondary | old
+    type: Optional[CodeableConcept] = None
+    system: Optional[str] = None
+    value: Optional[str] = None
+    period: Optional[Period] = None
+    assigner: Optional['Reference'] = None
+
+
+class Reference(Element):
+    reference: Optional[str] = None
+    type: Optional[str] = None
+    identifier: Optional[Identifier] = None
+    display: Optional[str] = None
+
+
+rebuild(Identifier)
@@ -0,0 +1,330 @@
+"""Compiled per-model decoders.
+
+`get_decoder(Observation)` generates a Python function specialised to the
+Observation model tree: one straight-line block per field with the type check
+inlined (``v.__class__ is str``, nested models as direct calls, ...) instead of
+pydantic's generic per-field dispatch. Generated source is cached on disk,
+keyed by a hash of the model definitions, and reused until a model changes.
+The cache directory is created private (0o700) and is not used at all if
+others can write to it; each module carries the SHA-256 of its source in a
+`.sha256` file beside it and is regenerated when they do not match.
+
+The generated code only has a fast path for input that pydantic would accept
+unchanged (or convert trivially, like int -> float). Anything else -- a type
+that needs coercion, a field with validators, a missing required field, an
+invalid value -- makes the decoder fall back to `Model.parse_obj` for the whole
+resource, so results and ValidationErrors are exactly pydantic's.
+
+On pydantic v2 validation already runs in compiled code (pydantic-core), so no
+source is generated: the decoder is `Model.model_validate`, and raw bytes go
+straight to `Model.model_validate_json` without a Python-level JSON load.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Literal, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel # type: ignore
+
+import compat
+import registry
+
+if not compat.PYDANTIC_V2:
+    from pydantic.datetime_parse import parse_date, parse_datetime # type: ignore
+    from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON # type: ignore
+    from pydantic.config import Extra # type: ignore
+
+# orjson is optional; it only speeds up decoding of raw bytes
+try:
+    import orjson # type: ignore
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
+
+# bump when the generated code changes shape, to invalidate the disk cache
+CODEGEN_VERSION = 1
+
+CACHE_DIR = os.environ.get(
+    "FHIR_DECODER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "hl7fhir", "decoders")
+)
+
+_decoders: Dict[type, Callable[[Any], BaseModel]] = {}
+
+
+class _Fallback(Exception):
+    pass
+
+
+def _fail():
+    raise _Fallback
+
+
+def _datetime_or_date(value):
+    # Union[datetime, date]: pydantic tries the members in order
+    try:
+        return parse_datetime(value)
+    except Exception:
+        return parse_date(value)
+
+
+# element expression templates; `{x}` is the value being checked
+_INLINE = {
+    str: "({x} if {x}.__class__ is str else _fail())",
+    int: "({x} if {x}.__class__ is int else _fail())",
+    bool: "({x} if {x} is True or {x} is False else _fail())",
+    float: "({x} if {x}.__class__ is float else float({x}) if {x}.__class__ is int else _fail())",
+}
+
+
+class _Compiler:
+    # Walks the model closure once, collecting the objects the generated code
+    # refers to and a fingerprint of every definition that affects it.
+
+    def __init__(self, root: Type[BaseModel]):
+        self.models: List[type] = []
+        self.index: Dict[type, int] = {}
+        self.namespace: Dict[str, Any] = {
+            "_fail": _fail,
+            "_MISSING": object(),
+            "_new": object.__new__,
+            "_setattr": object.__setattr__,
+            "_parse_datetime": parse_datetime,
+            "_parse_date": parse_date,
+            "_datetime_or_date": _datetime_or_date,
+        }
+        self.fingerprint: List[str] = [f"v{CODEGEN_VERSION}"]
+        self.functions: List[List[str]] = []
+        self._add(root)
+
+    @staticmethod
+    def compilable(model: type) -> bool:
+        config = model.__config__
+        return not (
+            model.__pre_root_validators__
+            or model.__post_root_validators__
+            or config.extra == Extra.allow
+            or config.anystr_strip_whitespace
+            or config.anystr_lower
+            or config.min_anystr_length
+            or config.max_anystr_length
+            or config.validate_all
+        )
+
+    def _name(self, prefix: str, obj: Any) -> str:
+        name = f"_{prefix}{len(self.namespace)}"
+        self.namespace[name] = obj
+        return name
+
+    def _add(self, model: type) -> int:
+        if model in self.index:
+            return self.index[model]
+        i = self.index[model] = len(self.models)
+        self.models.append(model)
+        self.namespace[f"_M{i}"] = model
+        self.functions.append([])
+        config = model.__config__
+        self.fingerprint.append(
+            f"{model.__module__}.{model.__qualname__}|{config.extra}|{config.allow_population_by_field_name}"
+            f"|{bool(model.__private_attributes__)}"
+        )
+        self.functions[i] = self._emit_model(i, model)
+        return i
+
+    def _element(self, tp) -> Union[str, None]:
+        # expression template converting one value of type `tp`, or None if
+        # the field has to go through pydantic's own validation
+        if tp in _INLINE:
+            return _INLINE[tp]
+        if tp is Any:
+            return "{x}"
+        if tp is datetime:
+            return "_parse_datetime({x})"
+        if tp is date:
+            return "_parse_date({x})"
+        if isinstance(tp, type) and issubclass(tp, Enum):
+            return self._name("E", tp) + "({x})"
+        if isinstance(tp, type) and issubclass(tp, BaseModel) and self.compilable(tp):
+            return f"_d{self._add(tp)}({{x}})"
+        origin = get_origin(tp)
+        if origin is Union and set(get_args(tp)) == {datetime, date}:
+            return "_datetime_or_date({x})"
+        if origin is Literal:
+            choices = {v: v for v in get_args(tp)}
+            return self._name("L", choices) + "[{x}]"
+        return None
+
+    def _emit_model(self, i: int, model: type) -> List[str]:
+        config = model.__config__
+        keys = set()
+        lines = [
+            f"def _d{i}(data):",
+            "    if data.__class__ is not dict:",
+            "        _fail()",
+        ]
+        if config.extra == Extra.forbid:
+            lines += [f"    if not _K{i}.issuperset(data):", "        _fail()"]
+        lines += ["    values = {}", "    fields_set = set()"]
+
+        for name, field in model.__fields__.items():
+            keys.add(field.alias)
+            by_name = config.allow_population_by_field_name and field.alt_alias
+            if by_name:
+                keys.add(name)
+            generic = bool(
+                field.class_validators or field.pre_validators or field.post_validators
+                or field.field_info.const
+            )
+            expr = None
+            if not generic and field.shape in (SHAPE_SINGLETON, SHAPE_LIST):
+                expr = self._element(field.type_)
+                if expr is not None and field.shape == SHAPE_LIST:
+                    expr = "([" + expr.format(x="x") + " for x in v] if v.__class__ is list else _fail())"
+                elif expr is not None:
+                    expr = expr.format(x="v")
+            self.fingerprint.append(
+                f"{name}|{field.alias}|{field.type_!r}|{field.outer_type_!r}|{field.shape}|{field.required}"
+                f"|{field.allow_none}|{field.default!r}|{field.validate_always}|{expr}"
+            )
+
+            lines.append(f"    v = data.get({field.alias!r}, _MISSING)")
+            if by_name:
+                lines += ["    if v is _MISSING:", f"        v = data.get({name!r}, _MISSING)"]
+            lines.append("    if v is _MISSING:")
+            if field.required or field.validate_always:
+                lines.append("        _fail()")
+            elif field.default is None:
+                lines.append(f"        values[{name!r}] = None")
+            elif isinstance(field.default, (str, int, float, bool, Enum)):
+                lines.append(f"        values[{name!r}] = {self._name('V', field.default)}")
+            else:
+                lines.append(f"        values[{name!r}] = {self._name('F', field)}.get_default()")
+            if expr is None:
+                f = self._name("F", field)
+                lines += [
+                    "    else:",
+                    f"        values[{name!r}], errors = {f}.validate(v, values, loc={field.alias!r}, cls=_M{i})",
+                    "        if errors:",
+                    "            _fail()",
+                ]
+            else:
+                lines.append("    elif v is None:")
+                if field.allow_none:
+                    lines += [f"        values[{name!r}] = None", f"        fields_set.add({name!r})"]
+                else:
+                    lines.append("        _fail()")
+                lines += ["    else:", f"        values[{name!r}] = {expr}"]
+            lines.append(f"        fields_set.add({name!r})")
+
+        self.namespace[f"_K{i}"] = frozenset(keys)
+        lines += [
+            f"    obj = _new(_M{i})",
+            "    _setattr(obj, '__dict__', values)",
+            "    _setattr(obj, '__fields_set__', fields_set)",
+        ]
+        if model.__private_attributes__:
+            lines.append("    obj._init_private_attributes()")
+        lines += ["    return obj", ""]
+        return lines
+
+    def key(self) -> str:
+        return hashlib.sha256("\n".join(self.fingerprint).encode("utf-8")).hexdigest()[:16]
+
+    def source(self) -> str:
+        return "\n".join(line for function in self.functions for line in function) + "\n"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _private_dir(path: str) -> bool:
+    # cached code is exec'd, so only a directory nobody else can write to is used
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.stat(path)
+    except OSError:
+        return False
+    if not hasattr(os, "getuid"):
+        return True  # Windows: no POSIX owner or mode bits to check
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _load_source(model: type, compiler: _Compiler) -> Tuple[str, str]:
+    # each module is stored with the SHA-256 of its source next to it; a
+    # module that does not match its hash is regenerated
+    path = os.path.join(CACHE_DIR, f"{model.__module__}.{model.__qualname__}.{compiler.key()}.py")
+    if not _private_dir(CACHE_DIR):
+        return compiler.source(), "<decoder>"
+    try:
+        with open(path, encoding="utf-8") as f, open(f"{path}.sha256", encoding="ascii") as h:
+            source = f.read()
+            if _sha256(source) == h.read().strip():
+                return source, path
+    except OSError:
+        pass
+    source = compiler.source()
+    try:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        for target, text in ((f"{path}.sha256", _sha256(source) + "\n"), (path, source)):
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, target)
+    except OSError:
+        pass  # read-only home etc.: the decoder still works, just uncached
+    return source, path
+
+
+def get_decoder(model: Type[BaseModel]) -> Callable[[Any], BaseModel]:
+    """Return the compiled decoder (dict -> model instance) for `model`."""
+    decoder = _decoders.get(model)
+    if decoder is not None:
+        return decoder
+    if compat.PYDANTIC_V2:
+        decoder = model.model_validate
+    elif not _Compiler.compilable(model):
+        decoder = model.parse_obj
+    else:
+        compiler = _Compiler(model)
+        source, path = _load_source(model, compiler)
+        namespace = dict(compiler.namespace)
+        exec(compile(source, path, "exec"), namespace)
+        fast = namespace["_d0"]
+        parse_obj = model.parse_obj
+
+        def decoder(data):
+            try:
+                return fast(data)
+            except Exception:
+                # not on the fast path (or invalid): let pydantic decide
+                return parse_obj(data)
+
+    _decoders[model] = decoder
+    return decoder
+
+
+def decode(model: Type[BaseModel], raw: Union[bytes, str, dict]) -> BaseModel:
+    """Decode raw JSON bytes/str (or an already-loaded dict) into `model`."""
+    if compat.PYDANTIC_V2 and not isinstance(raw, dict):
+        instance = model.model_validate_json(raw)
+    else:
+        if not isinstance(raw, dict):
+            raw = _loads(raw)
+        instance = get_decoder(model)(raw)
+    for hook in compat.validation_hooks:
+        hook(instance)
+    return instance
+
+
+def decode_resource(raw: Union[bytes, str, dict]) -> BaseModel:
+    # like registry.parse, through the compiled decoders
+    if not isinstance(raw, dict):
+        raw = _loads(raw)
+        if not isinstance(raw, dict):
+            raise ValueError("expected a JSON object")
+    instance = get_decoder(registry.get_model(raw.get("resourceType")))(raw)
+    for hook in compat.validation_hooks:
+        hook(instance)
+    return instance
@@ -1,34 +1,8 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field # type: ignore
-from datetime import datetime
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
 
 
-
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    type: Optional['CodeableConcept'] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-
-class Coding(BaseModel):
-    system: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List[Coding]] = None
-    text: Optional[str] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
 class Duration(BaseModel):
     value: Optional[float] = None
     unit: Optional[str] = None
@@ -71,7 +45,7 @@ class EncounterLocation(BaseModel):
     period: Optional[Period] = None
 
 class Encounter(BaseModel):
-    resourceType: str = Field("Encounter", const=True)
+    resourceType: Literal["Encounter"] = "Encounter"
     identifier: Optional[List[Identifier]] = None
     status: str  # planned | arrived | triaged | in-progress | onleave | finished | cancelled
     statusHistory: Optional[List[EncounterStatusHistory]] = None
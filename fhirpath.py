@@ -0,0 +1,914 @@
+"""FHIRPath over the resource models.
+
+`compile(expression)` parses an expression once into nested closures; the
+result is kept in an LRU cache, so calling `evaluate(resource, expression)`
+in a loop only pays for the parse the first time. A compiled `Expression`
+evaluates one resource (`expr(resource)`) or a whole stream
+(`expr.evaluate_many(resources)`, `expr.filter(resources)`):
+
+    expr = fhirpath.compile("Observation.component.where(code.coding.code='8480-6').valueQuantity.value")
+    for values in expr.evaluate_many(observations):
+        ...
+
+Results are always lists (FHIRPath collections). Elements are read by their
+FHIR JSON name (`class`, not `class_`), choice elements by their base name
+(`value` finds `valueQuantity`, `valueString`, ...), and code enums evaluate
+to their code string.
+
+Supported: path navigation, indexers, literals (string, number, boolean,
+@date/@dateTime/@time, `{}`), `$this`, %resource/%context/%ucum and
+caller-supplied %variables, the operators `. [] unary+- * / div mod + - & is
+as | < <= > >= = != ~ !~ in contains and xor or implies`, and the functions
+listed in `FUNCTIONS`. Quantity literals, `resolve()`, `extension()` and
+aggregates are not.
+
+Partial dates (@2024, @2024-01) evaluate to `PartialDate` and compare at
+their precision: `@2024-01 < @2024-02` is true, while comparing @2024-01
+with a date in January 2024 is empty (unknown), as the spec requires.
+"""
+
+import re
+from datetime import date, datetime, time, timezone
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from pydantic import BaseModel # type: ignore
+
+import compat
+
+CACHE_SIZE = 1024
+
+UCUM = "http://unitsofmeasure.org"
+
+
+class FHIRPathError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | (?P<time>@T\d{2}(?::\d{2}(?::\d{2}(?:\.\d+)?)?)?)
+  | (?P<datetime>@\d{4}(?:-\d{2}(?:-\d{2})?)?(?:T(?:\d{2}(?::\d{2}(?::\d{2}(?:\.\d+)?)?)?)?(?:Z|[+-]\d{2}:\d{2})?)?)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<string>'(?:[^'\\]|\\.)*')
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*|`(?:[^`\\]|\\.)*`)
+  | (?P<var>%(?:[A-Za-z_][A-Za-z0-9_]*|`(?:[^`\\]|\\.)*`|'(?:[^'\\]|\\.)*'))
+  | (?P<special>\$this|\$index|\$total)
+  | (?P<op><=|>=|!=|!~|[-+*/&|=~<>(),.\[\]{}])
+""", re.X | re.S)
+
+_ESCAPES = {"'": "'", '"': '"', "`": "`", "\\": "\\", "/": "/", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _unescape(text: str) -> str:
+    def replace(match):
+        c = match.group(1)
+        if c.startswith("u"):
+            return chr(int(c[1:], 16))
+        return _ESCAPES.get(c, c)
+    return re.sub(r"\\(u[0-9a-fA-F]{4}|.)", replace, text)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, Any]]:
+    tokens = []
+    pos = 0
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None:
+            raise FHIRPathError(f"unexpected character {expression[pos]!r} at {pos} in {expression!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "space":
+            continue
+        if kind == "ident" and text.startswith("`"):
+            tokens.append(("name", _unescape(text[1:-1])))  # delimited: never a keyword
+        elif kind == "var":
+            name = text[1:]
+            tokens.append(("var", _unescape(name[1:-1]) if name[0] in "`'" else name))
+        elif kind == "string":
+            tokens.append(("string", _unescape(text[1:-1])))
+        else:
+            tokens.append((kind, text))
+    tokens.append(("end", None))
+    return tokens
+
+
+class PartialDate(NamedTuple):
+    """A date with year or month precision, as in @2024 and @2024-01."""
+
+    year: int
+    month: Optional[int] = None
+
+    def isoformat(self) -> str:
+        return f"{self.year:04d}" if self.month is None else f"{self.year:04d}-{self.month:02d}"
+
+    def __str__(self) -> str:
+        return self.isoformat()
+
+
+def _parse_datetime_literal(text: str):
+    text = text[1:]
+    day, _, clock = text.partition("T")
+    parts = day.split("-")
+    if len(parts) < 3:
+        if clock:
+            raise FHIRPathError(f"a time needs a full date in @{text}")
+        return PartialDate(*map(int, parts))
+    if not clock:
+        return date.fromisoformat(day)
+    value = text.replace("Z", "+00:00")
+    clock = value.split("T", 1)[1]
+    if len(clock) == 2 or clock[2:3] in "+-":
+        value = f"{day}T{clock[:2]}:00{clock[2:]}"
+    return datetime.fromisoformat(value)
+
+
+# ---------------------------------------------------------------------------
+# Parser (precedence climbing) -> AST tuples
+
+_BINARY = {
+    "implies": 10,
+    "or": 20, "xor": 20,
+    "and": 30,
+    "in": 40, "contains": 40,
+    "=": 50, "~": 50, "!=": 50, "!~": 50,
+    "<": 60, ">": 60, "<=": 60, ">=": 60,
+    "|": 70,
+    "is": 80, "as": 80,
+    "+": 90, "-": 90, "&": 90,
+    "*": 100, "/": 100, "div": 100, "mod": 100,
+}
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def error(self, message: str) -> FHIRPathError:
+        return FHIRPathError(f"{message} in {self.expression!r}")
+
+    def peek(self) -> Tuple[str, Any]:
+        return self.tokens[self.pos]
+
+    def next(self) -> Tuple[str, Any]:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect(self, text: str) -> None:
+        kind, value = self.next()
+        if value != text or kind not in ("op", "ident"):
+            raise self.error(f"expected {text!r}, got {value!r}")
+
+    def parse(self):
+        node = self.expr(0)
+        if self.peek()[0] != "end":
+            raise self.error(f"unexpected {self.peek()[1]!r}")
+        return node
+
+    def expr(self, min_bp: int):
+        left = self.unary()
+        while True:
+            kind, value = self.peek()
+            bp = _BINARY.get(value) if kind in ("op", "ident") else None
+            if bp is None or bp <= min_bp:
+                return left
+            self.next()
+            if value in ("is", "as"):
+                left = (value, left, self.type_name())
+            else:
+                left = ("op", value, left, self.expr(bp))
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == "op" and value in "+-":
+            self.next()
+            operand = self.unary()
+            return ("neg", operand) if value == "-" else operand
+        return self.postfix(self.term())
+
+    def postfix(self, node):
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value == ".":
+                self.next()
+                node = ("path", node, self.invocation())
+            elif kind == "op" and value == "[":
+                self.next()
+                index = self.expr(0)
+                self.expect("]")
+                node = ("index", node, index)
+            else:
+                return node
+
+    def term(self):
+        kind, value = self.peek()
+        if kind == "number":
+            self.next()
+            return ("literal", float(value) if "." in value else int(value))
+        if kind == "string":
+            self.next()
+            return ("literal", value)
+        if kind == "datetime":
+            self.next()
+            return ("literal", _parse_datetime_literal(value))
+        if kind == "time":
+            self.next()
+            return ("literal", time.fromisoformat(value[2:]))
+        if kind == "ident" and value in ("true", "false"):
+            self.next()
+            return ("literal", value == "true")
+        if kind == "var":
+            self.next()
+            return ("var", value)
+        if kind == "op" and value == "(":
+            self.next()
+            node = self.expr(0)
+            self.expect(")")
+            return node
+        if kind == "op" and value == "{":
+            self.next()
+            self.expect("}")
+            return ("empty",)
+        return self.invocation()
+
+    def invocation(self):
+        kind, value = self.next()
+        if kind == "special":
+            if value != "$this":
+                raise self.error(f"{value} is not supported")
+            return ("this",)
+        if kind not in ("ident", "name"):
+            raise self.error(f"unexpected {value!r}")
+        if kind == "ident" and self.peek() == ("op", "("):
+            self.next()
+            args = []
+            if self.peek() != ("op", ")"):
+                args.append(self.expr(0))
+                while self.peek() == ("op", ","):
+                    self.next()
+                    args.append(self.expr(0))
+            self.expect(")")
+            return ("call", value, args)
+        return ("member", value)
+
+    def type_name(self) -> str:
+        kind, value = self.next()
+        if kind not in ("ident", "name"):
+            raise self.error(f"expected a type name, got {value!r}")
+        if self.peek() == ("op", "."):
+            # qualified: System.String, FHIR.Quantity
+            self.next()
+            return self.type_name()
+        return value
+
+
+def _type_arg(node, expression: str) -> str:
+    # ofType(Quantity) / ofType(FHIR.Quantity): the argument is a type, not an expression
+    if node[0] == "member":
+        return node[1]
+    if node[0] == "path" and node[2][0] == "member":
+        return node[2][1]
+    raise FHIRPathError(f"expected a type name in {expression!r}")
+
+
+# ---------------------------------------------------------------------------
+# Navigation
+
+# accessors for an item class: _SELF (a type name such as Observation), _DICT,
+# _NONE (primitives, unknown elements) or a tuple of (field name, may hold an enum)
+_SELF = "self"
+_DICT = "dict"
+_NONE = ()
+
+# (item class, element name) -> accessor
+_accessors: Dict[Tuple[type, str], Any] = {}
+
+_PLAIN = (str, int, float, bool, datetime, date, time)
+
+
+def _may_be_enum(tp) -> bool:
+    return not (isinstance(tp, type) and (issubclass(tp, BaseModel) or tp in _PLAIN))
+
+
+def _accessor(cls: type, name: str):
+    if issubclass(cls, dict):
+        accessor = _DICT
+    elif not issubclass(cls, BaseModel):
+        accessor = _NONE
+    else:
+        specs = compat.field_specs(cls)
+        matches = [s for s in specs if s.alias == name or s.name == name]
+        if not matches:
+            # choice element: value -> valueQuantity, valueString, ...
+            n = len(name)
+            matches = [s for s in specs if s.alias.startswith(name) and s.alias[n:n + 1].isupper()]
+        if matches:
+            accessor = tuple((s.name, _may_be_enum(s.type)) for s in matches)
+        elif _is_type(cls, name):
+            accessor = _SELF
+        else:
+            accessor = _NONE
+    _accessors[(cls, name)] = accessor
+    return accessor
+
+
+def _add(out: list, value) -> None:
+    if value is None:
+        return
+    if value.__class__ is list:
+        for v in value:
+            if v is not None:
+                out.append(v.value if isinstance(v, Enum) else v)
+    else:
+        out.append(value.value if isinstance(value, Enum) else value)
+
+
+def _children(focus: list, name: str) -> list:
+    out: list = []
+    for item in focus:
+        accessor = _accessors.get((item.__class__, name))
+        if accessor is None:
+            accessor = _accessor(item.__class__, name)
+        if accessor.__class__ is tuple:
+            values = item.__dict__
+            for field, enum in accessor:
+                value = values[field]
+                if value is None:
+                    continue
+                if enum:
+                    _add(out, value)
+                elif value.__class__ is list:
+                    out.extend(value)
+                else:
+                    out.append(value)
+        elif accessor is _SELF:
+            out.append(item)
+        elif accessor is _DICT:
+            if name in item:
+                _add(out, item[name])
+            elif item.get("resourceType") == name:
+                out.append(item)
+    return out
+
+
+_PRIMITIVES = {
+    "string": (str,), "String": (str,),
+    "boolean": (bool,), "Boolean": (bool,),
+    "integer": (int,), "Integer": (int,),
+    "decimal": (float,), "Decimal": (float,),
+    "dateTime": (datetime,), "DateTime": (datetime,),
+    "instant": (datetime,),
+    "date": (date,), "Date": (date,),
+    "time": (time,), "Time": (time,),
+}
+
+
+def _is_type(value, name: str) -> bool:
+    # value is an instance, or a class (for accessor lookups)
+    cls = value if isinstance(value, type) else value.__class__
+    if isinstance(value, dict):
+        return value.get("resourceType") == name
+    primitive = _PRIMITIVES.get(name)
+    if primitive is not None:
+        if cls is bool:
+            return primitive == (bool,)
+        if primitive == (date,):
+            return issubclass(cls, (date, PartialDate)) and not issubclass(cls, datetime)
+        return issubclass(cls, primitive)
+    if issubclass(cls, BaseModel):
+        if any(base.__name__ == name for base in cls.__mro__):
+            return True
+        return _resource_type(cls) == name
+    return False
+
+
+def _resource_type(cls: type) -> Optional[str]:
+    for spec in compat.field_specs(cls):
+        if spec.name == "resourceType":
+            return spec.default
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Values and operators
+
+def _normalize(value):
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _date_parts(value) -> Tuple[int, ...]:
+    if isinstance(value, PartialDate):
+        return (value.year,) if value.month is None else (value.year, value.month)
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value.year, value.month, value.day)
+
+
+def _compare(a, b) -> Optional[int]:
+    # -1/0/1, or None when the values are not comparable (different precision)
+    if isinstance(a, bool) or isinstance(b, bool):
+        if a.__class__ is b.__class__:
+            return (a > b) - (a < b)
+        raise FHIRPathError(f"cannot compare {a!r} and {b!r}")
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return (a > b) - (a < b)
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        a, b = _normalize(a), _normalize(b)
+        return (a > b) - (a < b)
+    if isinstance(a, PartialDate) or isinstance(b, PartialDate):
+        if isinstance(a, (date, PartialDate)) and isinstance(b, (date, PartialDate)):
+            # decided by the first differing component; equal as far as the
+            # less precise one goes is unknown unless the precisions match
+            pa, pb = _date_parts(a), _date_parts(b)
+            n = min(len(pa), len(pb))
+            if pa[:n] != pb[:n]:
+                return (pa[:n] > pb[:n]) - (pa[:n] < pb[:n])
+            return 0 if len(pa) == len(pb) else None
+        raise FHIRPathError(f"cannot compare {a!r} and {b!r}")
+    if isinstance(a, date) and isinstance(b, date):
+        # date against dateTime: only decided when the days differ
+        da = a.date() if isinstance(a, datetime) else a
+        db = b.date() if isinstance(b, datetime) else b
+        if isinstance(a, datetime) != isinstance(b, datetime):
+            return None if da == db else (da > db) - (da < db)
+        return (da > db) - (da < db)
+    if isinstance(a, str) and isinstance(b, str):
+        return (a > b) - (a < b)
+    if isinstance(a, time) and isinstance(b, time):
+        return (a > b) - (a < b)
+    raise FHIRPathError(f"cannot compare {a!r} and {b!r}")
+
+
+def _equal(a, b) -> Optional[bool]:
+    if a.__class__ is b.__class__ and a.__class__ in (str, int, float, bool):
+        return a == b
+    if isinstance(a, BaseModel) or isinstance(b, BaseModel) or isinstance(a, dict) or isinstance(b, dict):
+        return a == b
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    try:
+        result = _compare(a, b)
+    except FHIRPathError:
+        return False
+    return None if result is None else result == 0
+
+
+def _equivalent(a, b) -> bool:
+    if isinstance(a, str) and isinstance(b, str):
+        return " ".join(a.lower().split()) == " ".join(b.lower().split())
+    if isinstance(a, float) or isinstance(b, float):
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+            return round(a, 6) == round(b, 6)
+    return bool(_equal(a, b))
+
+
+def _singleton(collection: list, what: str):
+    if len(collection) > 1:
+        raise FHIRPathError(f"{what} expects a single item, got {len(collection)}")
+    return collection[0] if collection else None
+
+
+def _boolean(collection: list) -> Optional[bool]:
+    # singleton evaluation of collections: empty -> unknown, one item -> its truth
+    if not collection:
+        return None
+    value = _singleton(collection, "a boolean operand")
+    return value if value.__class__ is bool else True
+
+
+def _distinct(items: list) -> list:
+    out: list = []
+    seen = set()
+    for item in items:
+        try:
+            key = (item.__class__, item)
+            if key in seen:
+                continue
+            seen.add(key)
+        except TypeError:  # models, dicts
+            if any(_equal(item, other) for other in out):
+                continue
+        out.append(item)
+    return out
+
+
+def _equality(negate: bool, equivalent: bool):
+    def op(left: list, right: list) -> list:
+        if equivalent:
+            if not left and not right:
+                result = True
+            else:
+                result = len(left) == len(right) and all(
+                    any(_equivalent(a, b) for b in right) for a in left
+                )
+            return [result != negate]
+        if not left or not right:
+            return []
+        if len(left) != len(right):
+            return [negate]
+        result = True
+        for a, b in zip(left, right):
+            eq = _equal(a, b)
+            if eq is None:
+                return []
+            if not eq:
+                result = False
+                break
+        return [result != negate]
+    return op
+
+
+def _comparison(test: Callable[[int], bool]):
+    def op(left: list, right: list) -> list:
+        if not left or not right:
+            return []
+        result = _compare(_singleton(left, "comparison"), _singleton(right, "comparison"))
+        return [] if result is None else [test(result)]
+    return op
+
+
+def _arithmetic(fn: Callable):
+    def op(left: list, right: list) -> list:
+        if not left or not right:
+            return []
+        a, b = _singleton(left, "arithmetic"), _singleton(right, "arithmetic")
+        try:
+            result = fn(a, b)
+        except (TypeError, ZeroDivisionError):
+            return []
+        return [] if result is None else [result]
+    return op
+
+
+def _divide(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a / b
+    raise TypeError
+
+
+def _integer_divide(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return abs(a) // abs(b) * (1 if (a >= 0) == (b >= 0) else -1)
+    return int(a / b)
+
+
+def _modulo(a, b):
+    result = abs(a) % abs(b)
+    return -result if a < 0 else result
+
+
+def _plus(a, b):
+    if isinstance(a, str) and isinstance(b, str):
+        return a + b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a + b
+    raise TypeError
+
+
+def _concat(left: list, right: list) -> list:
+    a = _singleton(left, "&") if left else ""
+    b = _singleton(right, "&") if right else ""
+    return [f"{a}{b}"]
+
+
+def _membership(left: list, right: list) -> list:
+    if not left:
+        return []
+    item = _singleton(left, "in")
+    return [any(_equal(item, other) for other in right)]
+
+
+def _logic(op: str):
+    def fn(left: list, right: list) -> list:
+        a, b = _boolean(left), _boolean(right)
+        if op == "and":
+            result = False if a is False or b is False else (None if a is None or b is None else True)
+        elif op == "or":
+            result = True if a is True or b is True else (None if a is None or b is None else False)
+        elif op == "xor":
+            result = None if a is None or b is None else a != b
+        else:  # implies
+            result = True if a is False or b is True else (None if a is None or b is None else False)
+        return [] if result is None else [result]
+    return fn
+
+
+_OPERATORS: Dict[str, Callable[[list, list], list]] = {
+    "=": _equality(False, False),
+    "!=": _equality(True, False),
+    "~": _equality(False, True),
+    "!~": _equality(True, True),
+    "<": _comparison(lambda r: r < 0),
+    "<=": _comparison(lambda r: r <= 0),
+    ">": _comparison(lambda r: r > 0),
+    ">=": _comparison(lambda r: r >= 0),
+    "+": _arithmetic(_plus),
+    "-": _arithmetic(lambda a, b: a - b),
+    "*": _arithmetic(lambda a, b: a * b),
+    "/": _arithmetic(_divide),
+    "div": _arithmetic(_integer_divide),
+    "mod": _arithmetic(_modulo),
+    "&": _concat,
+    "|": lambda left, right: _distinct(left + right),
+    "in": _membership,
+    "contains": lambda left, right: _membership(right, left),
+    "and": _logic("and"),
+    "or": _logic("or"),
+    "xor": _logic("xor"),
+    "implies": _logic("implies"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Functions: name -> (min args, max args, implementation). Implementations get
+# the input collection, the environment and the compiled argument closures.
+
+Closure = Callable[[list, dict], list]
+
+
+def _each(args: List[Closure], focus: list, env: dict) -> Iterator[Tuple[Any, list]]:
+    criteria = args[0]
+    for item in focus:
+        yield item, criteria([item], env)
+
+
+def _integer_arg(arg: Closure, focus: list, env: dict, name: str) -> int:
+    value = _singleton(arg(focus, env), name)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise FHIRPathError(f"{name}() expects an integer")
+    return value
+
+
+def _string_input(focus: list, name: str) -> Optional[str]:
+    value = _singleton(focus, name)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise FHIRPathError(f"{name}() expects a string input")
+    return value
+
+
+def _string_fn(name: str, fn: Callable):
+    def call(focus, env, args):
+        value = _string_input(focus, name)
+        if value is None:
+            return []
+        params = []
+        for arg in args:
+            param = _singleton(arg(focus, env), name)
+            if param is None:
+                return []
+            params.append(param)
+        result = fn(value, *params)
+        return [] if result is None else [result]
+    return call
+
+
+def _to_integer(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and re.fullmatch(r"[+-]?\d+", value):
+        return int(value)
+    return None
+
+
+def _to_decimal(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and re.fullmatch(r"[+-]?\d+(\.\d+)?", value):
+        return float(value)
+    return None
+
+
+def _to_string(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (str, int, float)):
+        return str(value)
+    if isinstance(value, (datetime, date, time, PartialDate)):
+        return value.isoformat()
+    return None
+
+
+def _convert(fn: Callable):
+    def call(focus, env, args):
+        if not focus:
+            return []
+        result = fn(_singleton(focus, "conversion"))
+        return [] if result is None else [result]
+    return call
+
+
+def _iif(focus, env, args):
+    condition = _boolean(args[0](focus, env))
+    if condition:
+        return args[1](focus, env)
+    return args[2](focus, env) if len(args) > 2 else []
+
+
+def _single(focus, env, args):
+    if len(focus) > 1:
+        raise FHIRPathError(f"single() on a collection of {len(focus)} items")
+    return focus
+
+
+FUNCTIONS: Dict[str, Tuple[int, int, Callable[[list, dict, List[Closure]], list]]] = {
+    "empty": (0, 0, lambda focus, env, args: [not focus]),
+    "exists": (0, 1, lambda focus, env, args: [
+        any(_boolean(r) for _, r in _each(args, focus, env)) if args else bool(focus)
+    ]),
+    "all": (1, 1, lambda focus, env, args: [all(_boolean(r) for _, r in _each(args, focus, env))]),
+    "allTrue": (0, 0, lambda focus, env, args: [all(v is True for v in focus)]),
+    "anyTrue": (0, 0, lambda focus, env, args: [any(v is True for v in focus)]),
+    "allFalse": (0, 0, lambda focus, env, args: [all(v is False for v in focus)]),
+    "anyFalse": (0, 0, lambda focus, env, args: [any(v is False for v in focus)]),
+    "count": (0, 0, lambda focus, env, args: [len(focus)]),
+    "distinct": (0, 0, lambda focus, env, args: _distinct(focus)),
+    "isDistinct": (0, 0, lambda focus, env, args: [len(_distinct(focus)) == len(focus)]),
+    "where": (1, 1, lambda focus, env, args: [item for item, r in _each(args, focus, env) if _boolean(r)]),
+    "select": (1, 1, lambda focus, env, args: [v for _, r in _each(args, focus, env) for v in r]),
+    "first": (0, 0, lambda focus, env, args: focus[:1]),
+    "last": (0, 0, lambda focus, env, args: focus[-1:]),
+    "tail": (0, 0, lambda focus, env, args: focus[1:]),
+    "skip": (1, 1, lambda focus, env, args: focus[max(0, _integer_arg(args[0], focus, env, "skip")):]),
+    "take": (1, 1, lambda focus, env, args: focus[:max(0, _integer_arg(args[0], focus, env, "take"))]),
+    "single": (0, 0, _single),
+    "not": (0, 0, lambda focus, env, args: [] if _boolean(focus) is None else [not _boolean(focus)]),
+    "iif": (2, 3, _iif),
+    "hasValue": (0, 0, lambda focus, env, args: [
+        len(focus) == 1 and not isinstance(focus[0], (BaseModel, dict))
+    ]),
+    "union": (1, 1, lambda focus, env, args: _distinct(focus + args[0](focus, env))),
+    "combine": (1, 1, lambda focus, env, args: focus + args[0](focus, env)),
+    "intersect": (1, 1, lambda focus, env, args: [
+        v for v in _distinct(focus) if any(_equal(v, o) for o in args[0](focus, env))
+    ]),
+    "exclude": (1, 1, lambda focus, env, args: [
+        v for v in focus if not any(_equal(v, o) for o in args[0](focus, env))
+    ]),
+    "trace": (1, 2, lambda focus, env, args: focus),
+    "startsWith": (1, 1, _string_fn("startsWith", lambda s, p: s.startswith(p))),
+    "endsWith": (1, 1, _string_fn("endsWith", lambda s, p: s.endswith(p))),
+    "contains": (1, 1, _string_fn("contains", lambda s, p: p in s)),
+    "matches": (1, 1, _string_fn("matches", lambda s, p: re.search(p, s, re.S) is not None)),
+    "replace": (2, 2, _string_fn("replace", lambda s, a, b: s.replace(a, b))),
+    "replaceMatches": (2, 2, _string_fn("replaceMatches", lambda s, a, b: re.sub(a, b, s))),
+    "indexOf": (1, 1, _string_fn("indexOf", lambda s, p: s.find(p))),
+    "substring": (1, 2, _string_fn("substring", lambda s, start, length=None: (
+        None if start < 0 or start >= len(s) else s[start:] if length is None else s[start:start + length]
+    ))),
+    "lower": (0, 0, _string_fn("lower", str.lower)),
+    "upper": (0, 0, _string_fn("upper", str.upper)),
+    "length": (0, 0, _string_fn("length", len)),
+    "toString": (0, 0, _convert(_to_string)),
+    "toInteger": (0, 0, _convert(_to_integer)),
+    "toDecimal": (0, 0, _convert(_to_decimal)),
+}
+
+
+# ---------------------------------------------------------------------------
+# Compilation: AST -> closures taking (input collection, environment)
+
+def _compile_node(node, expression: str) -> Closure:
+    kind = node[0]
+    if kind == "literal":
+        value = [node[1]]
+        return lambda focus, env: value
+    if kind == "empty":
+        return lambda focus, env: []
+    if kind == "this":
+        return lambda focus, env: focus
+    if kind == "var":
+        name = node[1]
+
+        def variable(focus, env):
+            try:
+                value = env[name]
+            except KeyError:
+                raise FHIRPathError(f"undefined variable %{name}") from None
+            return list(value) if isinstance(value, list) else [] if value is None else [value]
+        return variable
+    if kind == "member":
+        name = node[1]
+        return lambda focus, env: _children(focus, name)
+    if kind == "path":
+        left = _compile_node(node[1], expression)
+        right = _compile_node(node[2], expression)
+        return lambda focus, env: right(left(focus, env), env)
+    if kind == "index":
+        left = _compile_node(node[1], expression)
+        index = _compile_node(node[2], expression)
+
+        def indexer(focus, env):
+            items = left(focus, env)
+            i = _singleton(index(focus, env), "indexer")
+            return [items[i]] if isinstance(i, int) and 0 <= i < len(items) else []
+        return indexer
+    if kind == "neg":
+        operand = _compile_node(node[1], expression)
+
+        def negate(focus, env):
+            value = _singleton(operand(focus, env), "unary -")
+            if value is None:
+                return []
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise FHIRPathError(f"cannot negate {value!r}")
+            return [-value]
+        return negate
+    if kind in ("is", "as"):
+        left = _compile_node(node[1], expression)
+        type_name = node[2]
+        if kind == "is":
+            def is_type(focus, env):
+                items = left(focus, env)
+                return [_is_type(_singleton(items, "is"), type_name)] if items else []
+            return is_type
+        return lambda focus, env: [v for v in left(focus, env) if _is_type(v, type_name)]
+    if kind == "op":
+        fn = _OPERATORS[node[1]]
+        left = _compile_node(node[2], expression)
+        right = _compile_node(node[3], expression)
+        return lambda focus, env: fn(left(focus, env), right(focus, env))
+    if kind == "call":
+        name, arg_nodes = node[1], node[2]
+        if name in ("ofType", "is", "as"):
+            if len(arg_nodes) != 1:
+                raise FHIRPathError(f"{name}() takes one type argument in {expression!r}")
+            type_name = _type_arg(arg_nodes[0], expression)
+            if name == "is":
+                return lambda focus, env: [_is_type(focus[0], type_name)] if len(focus) == 1 else []
+            return lambda focus, env: [v for v in focus if _is_type(v, type_name)]
+        try:
+            low, high, fn = FUNCTIONS[name]
+        except KeyError:
+            raise FHIRPathError(f"unknown function {name}() in {expression!r}") from None
+        if not low <= len(arg_nodes) <= high:
+            raise FHIRPathError(f"{name}() takes {low}-{high} arguments in {expression!r}")
+        args = [_compile_node(arg, expression) for arg in arg_nodes]
+        return lambda focus, env: fn(focus, env, args)
+    raise FHIRPathError(f"cannot compile {kind} in {expression!r}")  # pragma: no cover
+
+
+class Expression:
+    """A compiled FHIRPath expression."""
+
+    __slots__ = ("expression", "_fn")
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._fn = _compile_node(_Parser(expression).parse(), expression)
+
+    def __call__(self, resource: Any, **variables) -> list:
+        env = {"resource": resource, "context": resource, "rootResource": resource, "ucum": UCUM}
+        if variables:
+            env.update(variables)
+        return self._fn([resource], env)
+
+    evaluate = __call__
+
+    def evaluate_many(self, resources: Iterable[Any], **variables) -> Iterator[list]:
+        """Yield the result collection for each resource."""
+        fn = self._fn
+        env = {"ucum": UCUM}
+        env.update(variables)
+        for resource in resources:
+            env["resource"] = env["context"] = env["rootResource"] = resource
+            yield fn([resource], env)
+
+    def filter(self, resources: Iterable[Any], **variables) -> Iterator[Any]:
+        """Yield the resources for which the expression is true."""
+        fn = self._fn
+        env = {"ucum": UCUM}
+        env.update(variables)
+        for resource in resources:
+            env["resource"] = env["context"] = env["rootResource"] = resource
+            if _boolean(fn([resource], env)):
+                yield resource
+
+    def __repr__(self) -> str:
+        return f"Expression({self.expression!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile(expression: str) -> Expression:
+    """Parse `expression` (cached) into an Expression; raises FHIRPathError on syntax errors."""
+    return Expression(expression)
+
+
+def evaluate(resource: Any, expression: str, **variables) -> list:
+    return compile(expression)(resource, **variables)
+
+
+def evaluate_many(resources: Iterable[Any], expression: str, **variables) -> Iterator[list]:
+    return compile(expression).evaluate_many(resources, **variables)
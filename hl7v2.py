@@ -0,0 +1,684 @@
+"""HL7 v2 messages: a lazy segment parser and ADT/ORU -> FHIR mapping.
+
+    for resource in convert("feed.hl7"):
+        ...  # encounter.Encounter for ADT^A01/A02/A03/A04/A08/A11,
+             # observation.Observation for every OBX of ORU^R01
+
+`Message` indexes segment offsets once (one `str.find` per segment) and
+splits a segment into fields only when it is first read; components,
+repetitions and escape sequences are handled per value on access. Messages
+are read from a path or file object as a stream, with or without MLLP
+framing, so memory stays bounded by the largest message.
+
+The mapping builds the models directly from the parsed values instead of
+going through a dict and validation: every value it writes comes out of the
+parsing helpers here with the field's type already, so there is nothing for
+validation to check. Codings and CodeableConcepts are shared between
+resources: one frozen `interning.InternedCoding` / `InternedCodeableConcept`
+per distinct coded value, so replace them rather than mutating them.
+
+Messages that cannot be mapped raise HL7Error, which `convert` passes to
+`on_error` as a `LineError` (line = 1-based message number, resourceType =
+message type) before carrying on.
+"""
+
+import codecs
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel # type: ignore
+
+import compat
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
+from encounter import Encounter, EncounterHospitalization, EncounterLocation, EncounterParticipant
+from interning import InternedCodeableConcept, InternedCoding
+from ndjson import DEFAULT_CHUNK_SIZE, LineError, log_error
+from observation import Observation, ObservationReferenceRange, Quantity
+
+
+class HL7Error(ValueError):
+    pass
+
+
+# HL7 coding-system names (table 0396) -> FHIR system URIs
+CODE_SYSTEMS = {
+    "LN": "http://loinc.org",
+    "SCT": "http://snomed.info/sct",
+    "SNM": "http://snomed.info/sct",
+    "UCUM": "http://unitsofmeasure.org",
+    "I10": "http://hl7.org/fhir/sid/icd-10",
+    "I9C": "http://hl7.org/fhir/sid/icd-9-cm",
+    "RXN": "http://www.nlm.nih.gov/research/umls/rxnorm",
+}
+
+# ADT trigger event -> Encounter.status
+ADT_STATUS = {
+    "A01": "in-progress",  # admit
+    "A02": "in-progress",  # transfer
+    "A03": "finished",  # discharge
+    "A04": "arrived",  # register an outpatient
+    "A08": None,  # update: finished if PV1-45 (discharge time) is set, else in-progress
+    "A11": "cancelled",  # cancel admit
+}
+
+# PV1-2 patient class (table 0004) -> v3 ActCode encounter class
+PATIENT_CLASS = {
+    "I": ("IMP", "inpatient encounter"),
+    "O": ("AMB", "ambulatory"),
+    "E": ("EMER", "emergency"),
+    "P": ("PRENC", "pre-admission"),
+    "R": ("AMB", "ambulatory"),
+    "B": ("IMP", "inpatient encounter"),
+}
+
+# OBX-11 result status (table 0085) -> Observation.status
+RESULT_STATUS = {
+    "F": "final",
+    "P": "preliminary",
+    "C": "amended",
+    "R": "registered",
+    "I": "registered",
+    "S": "preliminary",
+    "X": "cancelled",
+    "D": "entered-in-error",
+    "W": "entered-in-error",
+}
+
+_ACT_CODE = "http://terminology.hl7.org/CodeSystem/v3-ActCode"
+_V2_0004 = "http://terminology.hl7.org/CodeSystem/v2-0004"
+_PARTICIPATION = "http://terminology.hl7.org/CodeSystem/v3-ParticipationType"
+_INTERPRETATION = "http://terminology.hl7.org/CodeSystem/v3-ObservationInterpretation"
+_CATEGORY = "http://terminology.hl7.org/CodeSystem/observation-category"
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+
+
+class Segment:
+    """One segment; fields are split on first access. `seg[3]` is field 3 (HL7 numbering)."""
+
+    __slots__ = ("name", "_text", "_fields", "_message")
+
+    def __init__(self, text: str, message: "Message"):
+        self.name = text[:3]
+        self._text = text
+        self._fields: Optional[List[str]] = None
+        self._message = message
+
+    def __repr__(self) -> str:
+        return f"Segment({self._text!r})"
+
+    @property
+    def fields(self) -> List[str]:
+        fields = self._fields
+        if fields is None:
+            fields = self._text.split(self._message.field_separator)
+            if self.name == "MSH":
+                # MSH-1 is the field separator itself
+                fields.insert(1, self._message.field_separator)
+            self._fields = fields
+        return fields
+
+    def __getitem__(self, index: int) -> str:
+        """Raw field text ('' when absent); repetitions and components are not split."""
+        fields = self.fields
+        return fields[index] if index < len(fields) else ""
+
+    def repetitions(self, index: int) -> List[str]:
+        value = self[index]
+        return value.split(self._message.repetition_separator) if value else []
+
+    def get(self, index: int, component: int = 1, repetition: int = 1, subcomponent: int = 0) -> str:
+        """Unescaped value of field `index`, component, repetition (1-based); '' when absent."""
+        msg = self._message
+        value = self[index]
+        if not value:
+            return ""
+        if repetition != 1 or msg.repetition_separator in value:
+            reps = value.split(msg.repetition_separator)
+            value = reps[repetition - 1] if repetition <= len(reps) else ""
+        if component != 1 or msg.component_separator in value:
+            parts = value.split(msg.component_separator)
+            value = parts[component - 1] if component <= len(parts) else ""
+        if subcomponent:
+            parts = value.split(msg.subcomponent_separator)
+            value = parts[subcomponent - 1] if subcomponent <= len(parts) else ""
+        elif msg.subcomponent_separator in value:
+            value = value.split(msg.subcomponent_separator, 1)[0]
+        return msg.unescape(value) if msg.escape_character in value else value
+
+    def components(self, index: int, repetition: int = 1) -> List[str]:
+        msg = self._message
+        value = self[index]
+        if msg.repetition_separator in value:
+            reps = value.split(msg.repetition_separator)
+            value = reps[repetition - 1] if repetition <= len(reps) else ""
+        elif repetition != 1:
+            value = ""
+        if not value:
+            return []
+        parts = value.split(msg.component_separator)
+        if msg.escape_character in value:
+            parts = [msg.unescape(p) for p in parts]
+        return parts
+
+
+class Message:
+    """An HL7 v2 message. Segment offsets are indexed up front; segments are parsed lazily."""
+
+    __slots__ = (
+        "raw", "_index", "_segments", "field_separator", "component_separator",
+        "repetition_separator", "escape_character", "subcomponent_separator",
+    )
+
+    def __init__(self, raw: Union[str, bytes], encoding: str = "utf-8"):
+        if isinstance(raw, bytes):
+            raw = raw.decode(encoding, "replace")
+        if "\n" in raw:
+            raw = raw.replace("\r\n", "\r").replace("\n", "\r")
+        raw = raw.strip("\r\x0b\x1c ")
+        if not raw.startswith("MSH") or len(raw) < 8:
+            raise HL7Error("message does not start with an MSH segment")
+        self.raw = raw
+        self.field_separator = raw[3]
+        encoding_characters = raw[4:8]
+        (self.component_separator, self.repetition_separator,
+         self.escape_character, self.subcomponent_separator) = encoding_characters
+        # (segment name, start, end) of every segment
+        index: List[Tuple[str, int, int]] = []
+        start, find = 0, raw.find
+        while True:
+            end = find("\r", start)
+            if end < 0:
+                index.append((raw[start:start + 3], start, len(raw)))
+                break
+            if end > start:
+                index.append((raw[start:start + 3], start, end))
+            start = end + 1
+        self._index = index
+        self._segments: List[Optional[Segment]] = [None] * len(index)
+
+    def __repr__(self) -> str:
+        return f"Message({self.type!r}, {self.control_id!r})"
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _segment(self, i: int) -> Segment:
+        segment = self._segments[i]
+        if segment is None:
+            _, start, end = self._index[i]
+            segment = self._segments[i] = Segment(self.raw[start:end], self)
+        return segment
+
+    def __iter__(self) -> Iterator[Segment]:
+        return (self._segment(i) for i in range(len(self._index)))
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _, _ in self._index]
+
+    def segment(self, name: str) -> Optional[Segment]:
+        """First segment called `name`, or None."""
+        for i, (segment_name, _, _) in enumerate(self._index):
+            if segment_name == name:
+                return self._segment(i)
+        return None
+
+    def segments(self, name: str) -> List[Segment]:
+        return [self._segment(i) for i, (segment_name, _, _) in enumerate(self._index) if segment_name == name]
+
+    @property
+    def type(self) -> str:
+        """Message type and trigger event, e.g. 'ADT^A01'."""
+        msh = self._segment(0)
+        return f"{msh.get(9, 1)}^{msh.get(9, 2)}"
+
+    @property
+    def control_id(self) -> str:
+        return self._segment(0).get(10)
+
+    def unescape(self, value: str) -> str:
+        esc = self.escape_character
+        parts = value.split(esc)
+        if len(parts) < 3:
+            return value
+        out = [parts[0]]
+        # escape sequences sit between pairs of escape characters
+        for i in range(1, len(parts) - 1, 2):
+            out.append(self._escape_value(parts[i]))
+            out.append(parts[i + 1])
+        if len(parts) % 2 == 0:
+            out.append(esc + parts[-1])
+        return "".join(out)
+
+    def _escape_value(self, code: str) -> str:
+        if code == "F":
+            return self.field_separator
+        if code == "S":
+            return self.component_separator
+        if code == "T":
+            return self.subcomponent_separator
+        if code == "R":
+            return self.repetition_separator
+        if code == "E":
+            return self.escape_character
+        if code.startswith("X") and len(code) > 1:
+            try:
+                return bytes.fromhex(code[1:]).decode("latin-1")
+            except ValueError:
+                pass
+        if code == ".br":
+            return "\n"
+        # formatting and unknown sequences are dropped
+        return ""
+
+
+def iter_messages(
+    source: Union[str, "os.PathLike[str]", IO], chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8"
+) -> Iterator[Message]:
+    """Yield each message of an HL7 v2 stream (a path or an open file object).
+
+    Messages may be MLLP-framed or simply follow each other; a message ends
+    where the next MSH segment starts.
+    """
+    for raw in split_messages(source, chunk_size, encoding):
+        yield Message(raw)
+
+
+def split_messages(
+    source: Union[str, "os.PathLike[str]", IO], chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8"
+) -> Iterator[str]:
+    """The raw text of each message of an HL7 v2 stream, without parsing it."""
+    if hasattr(source, "read"):
+        yield from _iter_raw_messages(source, chunk_size, encoding)
+    else:
+        with open(source, "rb") as stream:
+            yield from _iter_raw_messages(stream, chunk_size, encoding)
+
+
+def _iter_raw_messages(stream: IO, chunk_size: int, encoding: str) -> Iterator[str]:
+    # incremental, so a character split across two chunks still decodes
+    decode = codecs.getincrementaldecoder(encoding)("replace").decode
+    pending = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            chunk = decode(chunk)
+        # normalise line ends and MLLP framing to segment separators
+        text = pending + chunk.replace("\n", "\r").replace("\x0b", "\r").replace("\x1c", "\r")
+        start = 0
+        while True:
+            boundary = text.find("\rMSH", start + 1)
+            if boundary < 0:
+                break
+            message = text[start:boundary]
+            if message.strip("\r"):
+                yield message
+            start = boundary + 1
+        pending = text[start:]
+    if pending.strip("\r "):
+        yield pending
+
+
+# ---------------------------------------------------------------------------
+# Values
+
+
+# HL7 TS/DTM: YYYY[MM[DD[HH[MM[SS[.S+]]]]]][+/-ZZZZ]
+_TIMESTAMP = re.compile(r"(\d{4})(?:(\d{2})(?:(\d{2})(?:(\d{2})(?:(\d{2})(?:(\d{2})(?:\.(\d+))?)?)?)?)?)?(?:([+-])(\d{2})(\d{2}))?")
+
+
+def _timestamp(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    match = _TIMESTAMP.fullmatch(value)
+    if match is None:
+        raise HL7Error(f"invalid timestamp {value!r}")
+    year, month, day, hour, minute, second, digits, sign, zone_hours, zone_minutes = match.groups()
+    offset = None
+    if sign:
+        if hour is None:
+            # an offset only means something with a time; rejects "2024-0101" too
+            raise HL7Error(f"invalid timestamp {value!r}: offset without a time")
+        minutes = int(zone_hours) * 60 + int(zone_minutes)
+        offset = timezone(timedelta(minutes=minutes if sign == "+" else -minutes))
+    try:
+        return datetime(
+            int(year),
+            int(month or 1),
+            int(day or 1),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int((digits or "").ljust(6, "0")[:6]),
+            offset,
+        )
+    except ValueError:
+        raise HL7Error(f"invalid timestamp {value!r}") from None
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_defaults: Dict[type, dict] = {}
+
+
+def _build(model: Type[BaseModel], **values) -> BaseModel:
+    # construct `model` from values that already have the field types
+    defaults = _defaults.get(model)
+    if defaults is None:
+        defaults = _defaults[model] = {spec.name: spec.default for spec in compat.field_specs(model)}
+    return compat.construct(model, {**defaults, **values}, set(values))
+
+
+# Coded values repeat all through a feed, so each distinct one is built once
+# as a frozen, shared instance (see interning); the caches are bounded so a
+# feed of free-text codes cannot grow them without limit.
+_MAX_SHARED = 50_000
+_codings: Dict[tuple, Coding] = {}
+_concepts: Dict[tuple, CodeableConcept] = {}
+
+
+def _shared_coding(system: str, code: str, display: str = "") -> Coding:
+    key = (system, code, display)
+    coding = _codings.get(key)
+    if coding is None:
+        values = {"code": code}
+        if system:
+            values["system"] = system
+        if display:
+            values["display"] = display
+        coding = _build(InternedCoding, **values)
+        if len(_codings) < _MAX_SHARED:
+            _codings[key] = coding
+    return coding
+
+
+def _coding(code: str, display: str = "", system: str = "") -> Optional[Coding]:
+    if not code:
+        return None
+    return _shared_coding(CODE_SYSTEMS.get(system, system), code, display)
+
+
+def _concept(parts: List[str]) -> Optional[CodeableConcept]:
+    # CE/CWE: identifier^text^coding system[^alternate identifier^alternate text^alternate system]
+    key = tuple(parts)
+    concept = _concepts.get(key)
+    if concept is not None:
+        return concept
+    codings = []
+    for offset in (0, 3):
+        coding = _coding(*(parts[offset:offset + 3] + ["", ""])[:3]) if len(parts) > offset else None
+        if coding is not None:
+            codings.append(coding)
+    text = parts[1] if len(parts) > 1 else ""
+    if not codings and not text:
+        return None
+    values = {}
+    if codings:
+        values["coding"] = codings
+    if text:
+        values["text"] = text
+    concept = _build(InternedCodeableConcept, **values)
+    if len(_concepts) < _MAX_SHARED:
+        _concepts[key] = concept
+    return concept
+
+
+def _coded(system: str, code: str) -> CodeableConcept:
+    # a CodeableConcept with a single coding from a fixed code system
+    key = (None, system, code)  # None keeps these apart from _concept's keys
+    concept = _concepts.get(key)
+    if concept is None:
+        concept = _build(InternedCodeableConcept, coding=[_shared_coding(system, code)])
+        if len(_concepts) < _MAX_SHARED:
+            _concepts[key] = concept
+    return concept
+
+
+def _person(parts: List[str], resource_type: str) -> Optional[Reference]:
+    # CX/XCN: id^family^given...
+    if not parts or not parts[0]:
+        return None
+    values = {"reference": f"{resource_type}/{parts[0]}"}
+    name = " ".join(p for p in (parts[2] if len(parts) > 2 else "", parts[1] if len(parts) > 1 else "") if p)
+    if name:
+        values["display"] = name
+    return _build(Reference, **values)
+
+
+def _patient(msg: Message) -> Reference:
+    pid = msg.segment("PID")
+    if pid is None:
+        raise HL7Error("message has no PID segment")
+    patient_id = pid.get(3)
+    if not patient_id:
+        raise HL7Error("PID-3 (patient identifier) is empty")
+    values = {"reference": f"Patient/{patient_id}"}
+    name = pid.components(5)
+    display = " ".join(p for p in (name[1] if len(name) > 1 else "", name[0] if name else "") if p)
+    if display:
+        values["display"] = display
+    return _build(Reference, **values)
+
+
+def _visit_identifier(pv1: Optional[Segment]) -> Optional[Identifier]:
+    if pv1 is None:
+        return None
+    visit = pv1.components(19)
+    if not visit or not visit[0]:
+        return None
+    values = {"value": visit[0]}
+    if len(visit) > 3 and visit[3]:
+        values["system"] = visit[3]
+    return _build(Identifier, **values)
+
+
+# ---------------------------------------------------------------------------
+# Mapping
+
+
+def to_encounter(msg: Message) -> Encounter:
+    """Encounter for an ADT message (see ADT_STATUS for the events handled)."""
+    message_type, event = msg.type.split("^")
+    if message_type != "ADT" or event not in ADT_STATUS:
+        raise HL7Error(f"not a supported ADT event: {msg.type}")
+    pv1 = msg.segment("PV1")
+    if pv1 is None:
+        raise HL7Error("ADT message has no PV1 segment")
+
+    patient_class = pv1.get(2)
+    if not patient_class:
+        raise HL7Error("PV1-2 (patient class) is empty")
+    if patient_class in PATIENT_CLASS:
+        code, display = PATIENT_CLASS[patient_class]
+        encounter_class = _shared_coding(_ACT_CODE, code, display)
+    else:
+        encounter_class = _shared_coding(_V2_0004, patient_class)
+
+    admitted, discharged = _timestamp(pv1.get(44)), _timestamp(pv1.get(45))
+    status = ADT_STATUS[event] or ("finished" if discharged else "in-progress")
+    if admitted is None and event in ("A01", "A04"):
+        evn = msg.segment("EVN")
+        admitted = _timestamp(evn.get(2)) if evn is not None else None
+        admitted = admitted or _timestamp(msg._segment(0).get(7))
+
+    values = {"status": status, "class_": encounter_class, "subject": _patient(msg)}
+    identifier = _visit_identifier(pv1)
+    if identifier is not None:
+        values["identifier"] = [identifier]
+    if admitted or discharged:
+        period = {"start": admitted} if admitted else {}
+        if discharged:
+            period["end"] = discharged
+        values["period"] = _build(Period, **period)
+
+    participants = []
+    for field, role in ((7, "ATND"), (8, "REF"), (17, "ADM")):
+        for repetition in range(1, len(pv1.repetitions(field)) + 1):
+            individual = _person(pv1.components(field, repetition), "Practitioner")
+            if individual is not None:
+                participants.append(_build(EncounterParticipant, type=[_coded(_PARTICIPATION, role)], individual=individual))
+    if participants:
+        values["participant"] = participants
+
+    location = pv1.components(3)
+    if location and any(location[:4]):
+        # PL: point of care^room^bed^facility
+        display = " ".join(p for p in location[:4] if p)
+        values["location"] = [_build(EncounterLocation, location=_build(Reference, display=display))]
+
+    service = pv1.get(10)
+    if service:
+        values["serviceType"] = _concept([service])
+
+    hospitalization = {}
+    admit_source = pv1.get(14)
+    if admit_source:
+        hospitalization["admitSource"] = _concept([admit_source])
+    disposition = pv1.get(36)
+    if disposition:
+        hospitalization["dischargeDisposition"] = _concept([disposition])
+    if hospitalization:
+        values["hospitalization"] = _build(EncounterHospitalization, **hospitalization)
+    return _build(Encounter, **values)
+
+
+def _reference_range(text: str, unit: Optional[str]) -> Optional[ObservationReferenceRange]:
+    # OBX-7: "low-high", ">low", "<high" or free text
+    if not text:
+        return None
+    low = high = None
+    if text[0] in "<>":
+        bound = _number(text.lstrip("<>="))
+        low, high = (bound, None) if text[0] == ">" else (None, bound)
+    elif "-" in text[1:]:
+        i = text.index("-", 1)
+        low, high = _number(text[:i]), _number(text[i + 1:])
+    values = {}
+    if low is not None:
+        values["low"] = _build(Quantity, value=low, unit=unit) if unit else _build(Quantity, value=low)
+    if high is not None:
+        values["high"] = _build(Quantity, value=high, unit=unit) if unit else _build(Quantity, value=high)
+    if not values:
+        values["text"] = text
+    return _build(ObservationReferenceRange, **values)
+
+
+def _observation(obx: Segment, base: dict) -> Observation:
+    code = _concept(obx.components(3))
+    if code is None:
+        raise HL7Error(f"OBX-3 (observation identifier) is empty in {obx!r}")
+    status = RESULT_STATUS.get(obx.get(11), "final")
+    values = dict(base, status=status, code=code)
+
+    value_type, raw_value = obx.get(2), obx[5]
+    if raw_value:
+        if value_type in ("NM", "SN"):
+            number = _number(obx.get(5) if value_type == "NM" else obx.get(5, 2))
+            if number is None:
+                raise HL7Error(f"OBX-5 is not numeric: {raw_value!r}")
+            unit = obx.components(6)
+            quantity = {"value": number}
+            if unit and unit[0]:
+                quantity["unit"] = unit[1] if len(unit) > 1 and unit[1] else unit[0]
+                quantity["code"] = unit[0]
+                if len(unit) > 2 and unit[2] in ("UCUM", "ISO+", "ANS+"):
+                    quantity["system"] = CODE_SYSTEMS["UCUM"]
+            values["valueQuantity"] = _build(Quantity, **quantity)
+        elif value_type in ("CE", "CWE", "CNE", "CF"):
+            concept = _concept(obx.components(5))
+            if concept is not None:
+                values["valueCodeableConcept"] = concept
+        elif value_type in ("DT", "TS", "DTM"):
+            values["valueDateTime"] = _timestamp(obx.get(5))
+        else:
+            # ST, TX, FT and anything else: the text, repetitions joined by lines
+            values["valueString"] = "\n".join(obx.get(5, 1, r) for r in range(1, len(obx.repetitions(5)) + 1))
+
+    effective = _timestamp(obx.get(14))
+    if effective is not None:
+        values["effectiveDateTime"] = effective
+    interpretation = obx.get(8)
+    if interpretation:
+        values["interpretation"] = [_coded(_INTERPRETATION, interpretation)]
+    reference_range = _reference_range(obx.get(7), obx.get(6, 2) or obx.get(6) or None)
+    if reference_range is not None:
+        values["referenceRange"] = [reference_range]
+    return _build(Observation, **values)
+
+
+def to_observations(msg: Message) -> List[Observation]:
+    """One Observation per OBX of an ORU^R01 message."""
+    if msg.type != "ORU^R01":
+        raise HL7Error(f"not an ORU^R01 message: {msg.type}")
+    base = {
+        "category": [_coded(_CATEGORY, "laboratory")],
+        "subject": _patient(msg),
+    }
+    visit = _visit_identifier(msg.segment("PV1"))
+    if visit is not None:
+        base["encounter"] = _build(Reference, identifier=visit)
+
+    observations = []
+    obr_base = base
+    for segment in msg:
+        if segment.name == "OBR":
+            # OBX segments belong to the OBR before them
+            obr_base = dict(base)
+            order = segment.get(3) or segment.get(2)  # filler, else placer order number
+            if order:
+                obr_base["basedOn"] = [_build(Reference, identifier=_build(Identifier, value=order))]
+            observed = _timestamp(segment.get(7))
+            if observed is not None:
+                obr_base["effectiveDateTime"] = observed
+            issued = _timestamp(segment.get(22))
+            if issued is not None:
+                obr_base["issued"] = issued
+        elif segment.name == "OBX":
+            observations.append(_observation(segment, obr_base))
+    return observations
+
+
+def to_resources(msg: Message) -> List[BaseModel]:
+    message_type = msg.type
+    if message_type.startswith("ADT^"):
+        return [to_encounter(msg)]
+    if message_type == "ORU^R01":
+        return to_observations(msg)
+    raise HL7Error(f"unsupported message type {message_type}")
+
+
+def convert(
+    source: Union[str, "os.PathLike[str]", IO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Optional[Callable[[LineError], None]] = None,
+) -> Iterator[BaseModel]:
+    """Stream the FHIR resources mapped from every message of an HL7 v2 feed."""
+    if on_error is None:
+        on_error = log_error
+    for number, raw in enumerate(split_messages(source, chunk_size), start=1):
+        msg = None
+        try:
+            msg = Message(raw)
+            resources = to_resources(msg)
+        except HL7Error as exc:
+            on_error(LineError(number, _message_type(msg), str(exc)))
+            continue
+        yield from resources
+
+
+def _message_type(msg: Optional[Message]) -> Optional[str]:
+    try:
+        return msg.type if msg is not None else None
+    except (HL7Error, IndexError):
+        return None
@@ -0,0 +1,415 @@
+"""Opt-in timing, allocation and error metrics for parsing, validation and serialization.
+
+    sink = instrument.MemorySink()
+    instrument.enable(sink, instrument.PrometheusSink("/var/lib/node_exporter/fhir.prom"))
+    ...  # registry.parse, compat.validate, serialize.dumps, ... as usual
+    instrument.disable()  # flushes the sinks
+    sink.summary()["validate"]["Observation"]  # {"calls", "errors", "error_rate", "latency", ...}
+
+`enable()` swaps the entry points in `ENTRY_POINTS` (`registry.parse`,
+`compat.validate` / `validate_json`, `decoders.decode` /
+`decode_resource`, `serialize.dumps` / `to_fhir_dict`, `compat.to_dict` /
+`to_json`) for timing wrappers, and `disable()` puts the originals back, so
+while disabled there is no overhead at all. Every code path here calls them
+through their module (`compat.validate(...)`), which is what makes this work;
+a direct `Model.parse_obj` is not seen. Only the outermost instrumented call
+on a thread is recorded: `registry.parse` counts as one parse, not as a parse
+plus the validation inside it.
+
+Each call becomes an `Event` for every sink: the operation, the model's
+class name (the resourceType for resources), wall time and the exception
+type if it failed. Every `field_every`-th call per operation is also profiled
+field by field -- validation one top-level field at a time (as `lazy` does),
+serialization of each field value on its own -- and every
+`allocation_every`-th call is re-run under tracemalloc to count the memory
+blocks and bytes the result keeps alive and the peak traced during the call.
+Profiling re-runs the call, so it never skews the recorded latency.
+tracemalloc traces the whole process, so allocation sampling is skipped while
+any other thread is running (another thread's allocations would be counted
+against the call) -- in threaded pipelines it needs a single-threaded run --
+and while tracemalloc is already tracing for someone else.
+
+Sinks: `MemorySink` aggregates in-process (latency histograms, error rates,
+allocation averages), `PrometheusSink` is a MemorySink that writes the
+Prometheus text exposition format to a file on `flush()`, and `JSONLogSink`
+writes every event as a JSON line. Anything with `record(event)` and
+`flush()` methods works.
+"""
+
+import functools
+import importlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, IO, Iterator, List, NamedTuple, Optional, Tuple
+from pydantic import BaseModel # type: ignore
+
+import compat
+import lazy
+import serialize
+from pipeline import Histogram
+
+# (module, function, operation); the first argument of validate/decode is the model
+ENTRY_POINTS: List[Tuple[str, str, str]] = [
+    ("registry", "parse", "parse"),
+    ("compat", "validate", "validate"),
+    ("compat", "validate_json", "validate"),
+    ("decoders", "decode", "decode"),
+    ("decoders", "decode_resource", "decode"),
+    ("serialize", "dumps", "serialize"),
+    ("serialize", "to_fhir_dict", "serialize"),
+    ("compat", "to_dict", "serialize"),
+    ("compat", "to_json", "serialize"),
+]
+
+_MODEL_FIRST = {("compat", "validate"), ("compat", "validate_json"), ("decoders", "decode")}
+
+
+class Event(NamedTuple):
+    operation: str  # parse | validate | decode | serialize
+    resource_type: Optional[str]
+    seconds: float
+    error: Optional[str] = None  # exception class name
+    fields: Optional[Tuple[Tuple[str, float, bool], ...]] = None  # (field, seconds, failed) when profiled
+    allocations: Optional[Tuple[int, int, int]] = None  # (blocks, bytes, peak bytes) when profiled
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+
+
+class MemorySink:
+    """Aggregates events in memory: per (operation, resourceType) and per field."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[Tuple[str, Optional[str]], int] = {}
+        self.errors: Dict[Tuple[str, Optional[str]], int] = {}
+        self.latency: Dict[Tuple[str, Optional[str]], Histogram] = {}
+        self.field_latency: Dict[Tuple[str, Optional[str], str], Histogram] = {}
+        self.field_errors: Dict[Tuple[str, Optional[str], str], int] = {}
+        # (operation, resourceType) -> [samples, blocks, bytes, peak bytes]
+        self.allocations: Dict[Tuple[str, Optional[str]], List[int]] = {}
+
+    def record(self, event: Event) -> None:
+        key = (event.operation, event.resource_type)
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+            if event.error is not None:
+                self.errors[key] = self.errors.get(key, 0) + 1
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            histogram.record(event.seconds)
+            for field, seconds, failed in event.fields or ():
+                field_key = key + (field,)
+                histogram = self.field_latency.get(field_key)
+                if histogram is None:
+                    histogram = self.field_latency[field_key] = Histogram()
+                histogram.record(seconds)
+                if failed:
+                    self.field_errors[field_key] = self.field_errors.get(field_key, 0) + 1
+            if event.allocations is not None:
+                totals = self.allocations.setdefault(key, [0, 0, 0, 0])
+                totals[0] += 1
+                for i, n in enumerate(event.allocations, start=1):
+                    totals[i] += n
+
+    def flush(self) -> None:
+        pass
+
+    def error_rate(self, operation: str, resource_type: Optional[str]) -> float:
+        calls = self.calls.get((operation, resource_type), 0)
+        return self.errors.get((operation, resource_type), 0) / calls if calls else 0.0
+
+    def summary(self) -> Dict[str, Dict[Optional[str], Dict[str, Any]]]:
+        """{operation: {resourceType: {calls, errors, error_rate, latency, fields, allocations}}}."""
+        out: Dict[str, Dict[Optional[str], Dict[str, Any]]] = {}
+        with self._lock:
+            for key, calls in self.calls.items():
+                operation, resource_type = key
+                entry = out.setdefault(operation, {})[resource_type] = {
+                    "calls": calls,
+                    "errors": self.errors.get(key, 0),
+                    "error_rate": self.errors.get(key, 0) / calls,
+                    "latency": self.latency[key].summary(),
+                    "fields": {},
+                }
+                totals = self.allocations.get(key)
+                if totals is not None:
+                    samples = totals[0]
+                    entry["allocations"] = {
+                        "samples": samples,
+                        "blocks": totals[1] / samples,
+                        "bytes": totals[2] / samples,
+                        "peak_bytes": totals[3] / samples,
+                    }
+            for (operation, resource_type, field), histogram in self.field_latency.items():
+                fields = out[operation][resource_type]["fields"]
+                fields[field] = dict(histogram.summary(), errors=self.field_errors.get((operation, resource_type, field), 0))
+        return out
+
+
+class PrometheusSink(MemorySink):
+    """A MemorySink that writes the Prometheus text format to `path` on flush (atomically)."""
+
+    def __init__(self, path: str, prefix: str = "fhir_model"):
+        super().__init__()
+        self.path = path
+        self.prefix = prefix
+
+    def flush(self) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.exposition())
+        os.replace(tmp, self.path)
+
+    def exposition(self) -> str:
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_seconds Time spent per call.",
+            f"# TYPE {p}_seconds histogram",
+        ]
+        with self._lock:
+            for (operation, resource_type), histogram in sorted(self.latency.items(), key=_sort_key):
+                lines += _histogram_lines(f"{p}_seconds", _labels(operation, resource_type), histogram)
+            lines += [f"# HELP {p}_field_seconds Time per top-level field, from profiled calls.",
+                      f"# TYPE {p}_field_seconds histogram"]
+            for (operation, resource_type, field), histogram in sorted(self.field_latency.items(), key=_sort_key):
+                lines += _histogram_lines(f"{p}_field_seconds", _labels(operation, resource_type, field), histogram)
+            lines += [f"# HELP {p}_errors_total Calls that raised.", f"# TYPE {p}_errors_total counter"]
+            for key in sorted(self.calls, key=_sort_key):
+                lines.append(f"{p}_errors_total{{{_labels(*key)}}} {self.errors.get(key, 0)}")
+            for name, index, help_text in (
+                ("allocated_blocks", 1, "Memory blocks kept alive by the result, from profiled calls."),
+                ("allocated_bytes", 2, "Bytes kept alive by the result, from profiled calls."),
+                ("peak_bytes", 3, "Peak traced memory during profiled calls."),
+            ):
+                lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} summary"]
+                for key, totals in sorted(self.allocations.items(), key=_sort_key):
+                    labels = _labels(*key)
+                    lines.append(f"{p}_{name}_sum{{{labels}}} {totals[index]}")
+                    lines.append(f"{p}_{name}_count{{{labels}}} {totals[0]}")
+        return "\n".join(lines) + "\n"
+
+
+def _sort_key(item) -> tuple:
+    key = item[0] if isinstance(item[0], tuple) else item
+    return tuple("" if part is None else part for part in key)
+
+
+def _labels(operation: str, resource_type: Optional[str], field: Optional[str] = None) -> str:
+    labels = f'operation="{operation}",resource_type="{resource_type or ""}"'
+    return labels if field is None else f'{labels},field="{field}"'
+
+
+def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.BOUNDS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+class JSONLogSink:
+    """Writes each event as one JSON line to `stream` (stderr by default)."""
+
+    def __init__(self, stream: Optional[IO[str]] = None):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def record(self, event: Event) -> None:
+        data = {
+            "operation": event.operation,
+            "resourceType": event.resource_type,
+            "seconds": event.seconds,
+        }
+        if event.error is not None:
+            data["error"] = event.error
+        if event.fields is not None:
+            data["fields"] = {field: {"seconds": seconds, "failed": failed} for field, seconds, failed in event.fields}
+        if event.allocations is not None:
+            data["blocks"], data["bytes"], data["peak_bytes"] = event.allocations
+        line = json.dumps(data) + "\n"
+        with self._lock:
+            (self.stream or sys.stderr).write(line)
+
+    def flush(self) -> None:
+        (self.stream or sys.stderr).flush()
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+
+
+class Instrumentation:
+    """The wrappers installed by `enable()`; see the module docstring."""
+
+    def __init__(self, sinks, field_every: int = 100, allocation_every: int = 1000):
+        self.sinks = list(sinks)
+        self.field_every = field_every
+        self.allocation_every = allocation_every
+        self._originals: Dict[Tuple[str, str], Callable] = {}
+        # per-operation call counters; next() on itertools.count is atomic
+        self._counts: Dict[str, Iterator[int]] = {operation: itertools.count(1) for _, _, operation in ENTRY_POINTS}
+        self._local = threading.local()
+
+    def install(self) -> None:
+        for module_name, name, operation in ENTRY_POINTS:
+            module = importlib.import_module(module_name)
+            original = getattr(module, name)
+            self._originals[(module_name, name)] = original
+            setattr(module, name, self._wrap(original, operation, (module_name, name) in _MODEL_FIRST))
+
+    def uninstall(self) -> None:
+        for (module_name, name), original in self._originals.items():
+            setattr(importlib.import_module(module_name), name, original)
+        self._originals.clear()
+        for sink in self.sinks:
+            sink.flush()
+
+    def _wrap(self, fn: Callable, operation: str, model_first: bool) -> Callable:
+        local = self._local
+        emit = self._emit
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(local, "active", False):
+                return fn(*args, **kwargs)  # inside another instrumented call
+            local.active = True
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                elapsed = time.perf_counter() - t0
+                emit(Event(operation, _resource_type(args, model_first, None), elapsed, type(exc).__name__))
+                raise
+            else:
+                elapsed = time.perf_counter() - t0
+                emit(self._profile(fn, args, kwargs, result, Event(
+                    operation, _resource_type(args, model_first, result), elapsed)))
+                return result
+            finally:
+                local.active = False
+
+        return wrapper
+
+    def _emit(self, event: Event) -> None:
+        for sink in self.sinks:
+            sink.record(event)
+
+    def _profile(self, fn: Callable, args: tuple, kwargs: dict, result, event: Event) -> Event:
+        # every field_every-th / allocation_every-th call per operation re-runs profiled
+        n = next(self._counts[event.operation])
+        if self.field_every and n % self.field_every == 0:
+            fields = self._fields(event.operation, args, result)
+            if fields:
+                event = event._replace(fields=fields)
+        if (self.allocation_every and n % self.allocation_every == 0
+                and threading.active_count() == 1 and not tracemalloc.is_tracing()):
+            tracemalloc.start()
+            try:
+                again = fn(*args, **kwargs)
+                blocks = tracemalloc.take_snapshot().traces
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            del again
+            event = event._replace(allocations=(len(blocks), current, peak))
+        return event
+
+    def _fields(self, operation: str, args: tuple, result) -> Optional[Tuple[Tuple[str, float, bool], ...]]:
+        if operation == "serialize":
+            return _serialize_fields(args[0]) if args and isinstance(args[0], BaseModel) else None
+        if not isinstance(result, BaseModel):
+            return None
+        data = args[-1] if args else None
+        if not isinstance(data, dict):
+            try:
+                data = json.loads(data)
+            except (TypeError, ValueError):
+                return None
+        return _validate_fields(type(result), data)
+
+
+def _resource_type(args: tuple, model_first: bool, result) -> Optional[str]:
+    if result is not None and isinstance(result, BaseModel):
+        return type(result).__name__
+    if model_first and args:
+        return getattr(args[0], "__name__", None)
+    if args:
+        first = args[0]
+        if isinstance(first, BaseModel):
+            return type(first).__name__
+        if isinstance(first, dict):
+            return first.get("resourceType")
+    return None
+
+
+def _validate_fields(model: type, data: dict) -> Tuple[Tuple[str, float, bool], ...]:
+    # one top-level field at a time, onto a blank instance (see lazy)
+    keys, defaults, _ = lazy.layout(model)
+    instance = compat.construct(model, defaults.copy(), set())
+    out = []
+    for key, value in data.items():
+        name = keys.get(key)
+        if name is None:
+            continue
+        failed = False
+        t0 = time.perf_counter()
+        try:
+            compat.validate_field(instance, name, value)
+        except (ValueError, TypeError):
+            failed = True
+        out.append((key, time.perf_counter() - t0, failed))
+    return tuple(out)
+
+
+def _serialize_fields(resource: BaseModel) -> Tuple[Tuple[str, float, bool], ...]:
+    encode = serialize.BACKENDS[serialize.DEFAULT_BACKEND]
+    values = resource.__dict__
+    out = []
+    for name, key in serialize.field_keys(type(resource)):
+        value = values[name]
+        if value is None or (value.__class__ is list and not value):
+            continue
+        failed = False
+        t0 = time.perf_counter()
+        try:
+            encode(value)
+        except (ValueError, TypeError):
+            failed = True
+        out.append((key, time.perf_counter() - t0, failed))
+    return tuple(out)
+
+
+_active: Optional[Instrumentation] = None
+
+
+def enable(*sinks, field_every: int = 100, allocation_every: int = 1000) -> Instrumentation:
+    """Start recording to `sinks` (a new MemorySink if none); 0 turns a kind of profiling off."""
+    global _active
+    disable()
+    _active = Instrumentation(sinks or [MemorySink()], field_every, allocation_every)
+    _active.install()
+    return _active
+
+
+def disable() -> None:
+    """Restore the original entry points and flush the sinks."""
+    global _active
+    if _active is not None:
+        _active.uninstall()
+        _active = None
+
+
+def enabled() -> bool:
+    return _active is not None
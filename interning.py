@@ -0,0 +1,188 @@
+"""Hash-consed Coding and CodeableConcept values.
+
+Observation streams repeat the same few hundred codes millions of times, each
+occurrence parsed into its own Coding/CodeableConcept objects.
+`InternPool.intern(resource)` replaces every Coding and CodeableConcept in a
+parsed resource with one shared instance per distinct value, and makes the
+unit/system/code strings of Quantity-like elements (Quantity, Duration, Age,
+...) share a single string object each.
+
+Shared instances are `InternedCoding` / `InternedCodeableConcept`: frozen,
+hashable (usable as dict keys and set members) subclasses, so they are still
+Coding/CodeableConcept everywhere else. Their lists must not be mutated in
+place -- replace the element instead.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel # type: ignore
+
+import compat
+from compat import ConfigDict, PYDANTIC_V2
+from datatypes import CodeableConcept, Coding
+
+_QUANTITY_FIELDS = {"value", "unit", "system", "code"}
+_UNIT_FIELDS = ("unit", "system", "code")
+
+
+class InternedCoding(Coding):
+    if PYDANTIC_V2:
+        model_config = ConfigDict(frozen=True)
+    else:
+        class Config:
+            allow_mutation = False
+
+    def __hash__(self):
+        return hash(_coding_key(self))
+
+    def __eq__(self, other):
+        # equal to a plain Coding with the same values (v2 compares classes)
+        if isinstance(other, Coding):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+
+class InternedCodeableConcept(CodeableConcept):
+    if PYDANTIC_V2:
+        model_config = ConfigDict(frozen=True)
+    else:
+        class Config:
+            allow_mutation = False
+
+    def __hash__(self):
+        coding = self.coding
+        return hash((None if coding is None else tuple(map(_coding_key, coding)), self.text))
+
+    def __eq__(self, other):
+        if isinstance(other, CodeableConcept):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+
+def _coding_key(coding: Coding) -> tuple:
+    values = coding.__dict__
+    return (values["system"], values["version"], values["code"], values["display"], values["userSelected"])
+
+
+# per model class, the fields worth visiting: (field name, is_list, kind)
+_plans: Dict[type, List[Tuple[str, bool, str]]] = {}
+
+
+def _kind(tp) -> Optional[str]:
+    if tp is Any:
+        return "any"
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        if issubclass(tp, Coding):
+            return "coding"
+        if issubclass(tp, CodeableConcept):
+            return "concept"
+        if _QUANTITY_FIELDS.issubset(spec.name for spec in compat.field_specs(tp)):
+            return "quantity"
+        return "model"
+    if any(_kind(arg) for arg in getattr(tp, "__args__", ())):
+        return "any"  # Union of models, decided per value
+    return None
+
+
+def _plan(model: type) -> List[Tuple[str, bool, str]]:
+    plan = _plans.get(model)
+    if plan is None:
+        plan = []
+        for spec in compat.field_specs(model):
+            kind = None if spec.generic else _kind(spec.type)
+            if kind is not None:
+                plan.append((spec.name, spec.is_list, kind))
+        plan = _plans[model] = plan
+    return plan
+
+
+class InternPool:
+    """Pool of shared values; `max_size` caps how many distinct values are kept."""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self._codings: Dict[tuple, InternedCoding] = {}
+        self._concepts: Dict[tuple, InternedCodeableConcept] = {}
+        self._strings: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._codings) + len(self._concepts)
+
+    def _full(self) -> bool:
+        return self.max_size is not None and len(self) >= self.max_size
+
+    def coding(self, coding: Coding) -> Coding:
+        """The shared instance equal to `coding` (added to the pool if new)."""
+        if coding.__class__ is InternedCoding:
+            return coding
+        fields_set = compat.fields_set(coding)
+        key = _coding_key(coding) + (frozenset(fields_set),)
+        shared = self._codings.get(key)
+        if shared is not None:
+            self.hits += 1
+            return shared
+        if self._full():
+            return coding
+        self.misses += 1
+        values = {name: self.string(v) if v.__class__ is str else v for name, v in coding.__dict__.items()}
+        shared = self._codings[key] = compat.construct(InternedCoding, values, set(fields_set))
+        return shared
+
+    def concept(self, concept: CodeableConcept) -> CodeableConcept:
+        """The shared instance equal to `concept`, with its codings interned."""
+        if concept.__class__ is InternedCodeableConcept:
+            return concept
+        coding = concept.coding
+        if coding is not None:
+            coding = [self.coding(c) for c in coding]
+        fields_set = compat.fields_set(concept)
+        key = (None if coding is None else tuple(map(id, coding)), concept.text, frozenset(fields_set))
+        shared = self._concepts.get(key)
+        if shared is not None:
+            self.hits += 1
+            return shared
+        if self._full():
+            concept.__dict__["coding"] = coding
+            return concept
+        self.misses += 1
+        values = dict(concept.__dict__, coding=coding)
+        shared = self._concepts[key] = compat.construct(InternedCodeableConcept, values, set(fields_set))
+        return shared
+
+    def string(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def intern(self, node):
+        """Intern every Coding/CodeableConcept under `node` in place; returns the (possibly shared) node."""
+        if isinstance(node, BaseModel):
+            return self._intern_value(_kind(node.__class__), node)
+        return node
+
+    def _intern_fields(self, node: BaseModel) -> None:
+        values = node.__dict__
+        for name, is_list, kind in _plans.get(node.__class__) or _plan(node.__class__):
+            value = values[name]
+            if value is None:
+                continue
+            if is_list:
+                values[name] = [self._intern_value(kind, item) for item in value]
+            else:
+                values[name] = self._intern_value(kind, value)
+
+    def _intern_value(self, kind: str, value):
+        if kind == "coding":
+            return self.coding(value)
+        if kind == "concept":
+            return self.concept(value)
+        if kind == "quantity":
+            values = value.__dict__
+            for name in _UNIT_FIELDS:
+                s = values.get(name)
+                if s.__class__ is str:
+                    values[name] = self._strings.setdefault(s, s)
+            return value
+        if kind == "any":
+            return self.intern(value)
+        self._intern_fields(value)
+        return value
@@ -0,0 +1,131 @@
+"""Lazy resources: validate each top-level field the first time it is read.
+
+`load(raw)` parses the JSON once and returns a `LazyResource` that keeps the
+parsed dict. Reading `obs.status` validates `status` alone; `component`,
+`referenceRange`, `note`, ... are never validated unless something reads
+them. Errors surface on access as the usual ValidationError.
+
+`compat.validation_hooks` (e.g. terminology bindings) see whole instances,
+so they run when the last pending field is validated, on the instance built
+so far, and again in `materialize()`. Until then a lazily read field has
+only been checked against its type: a code that a hook would reject reads
+back without error.
+
+`materialize()` validates the whole resource exactly as `registry.parse`
+would (unknown keys, missing required fields and all) and returns the model
+instance; after that every attribute is read from it. Anything that is not a
+field (`.json()`, `.copy()`, ...) materializes first.
+"""
+
+import json
+from typing import Any, Dict, Optional, Type, Union
+from pydantic import BaseModel # type: ignore
+
+import compat
+import registry
+
+# orjson is optional; it only speeds up parsing of raw bytes
+try:
+    import orjson # type: ignore
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
+
+# model class -> ({JSON key or field name: field name}, defaults, required field names)
+_layouts: Dict[type, tuple] = {}
+
+
+def layout(model: Type[BaseModel]) -> tuple:
+    """({JSON key or field name: field name}, defaults, required field names) of `model`, cached."""
+    found = _layouts.get(model)
+    if found is None:
+        keys = {}
+        defaults = {}
+        required = set()
+        for spec in compat.field_specs(model):
+            keys[spec.name] = keys[spec.alias] = spec.name
+            defaults[spec.name] = None if spec.required else spec.default
+            if spec.required:
+                required.add(spec.name)
+        found = _layouts[model] = (keys, defaults, required)
+    return found
+
+
+class LazyResource:
+    __slots__ = ("_model", "_raw", "_pending", "_partial", "_full")
+
+    def __init__(self, model: Type[BaseModel], data: dict):
+        keys, defaults, _ = _layouts.get(model) or layout(model)
+        pending = {}
+        for key, value in data.items():
+            name = keys.get(key)
+            if name is not None:
+                pending[name] = value
+        self._model = model
+        self._raw = data
+        # field name -> raw value, for fields not validated yet
+        self._pending = pending
+        # instance holding the fields validated so far
+        self._partial = compat.construct(model, defaults.copy(), set())
+        self._full: Optional[BaseModel] = None
+
+    @property
+    def model(self) -> Type[BaseModel]:
+        return self._model
+
+    @property
+    def raw(self) -> dict:
+        return self._raw
+
+    @property
+    def materialized(self) -> bool:
+        return self._full is not None
+
+    def materialize(self) -> BaseModel:
+        """Validate everything and return the model instance."""
+        if self._full is None:
+            self._full = compat.validate(self._model, self._raw)
+            self._pending = {}
+        return self._full
+
+    def __getattr__(self, name: str) -> Any:
+        if name in LazyResource.__slots__:
+            raise AttributeError(name)  # not initialised yet (copy, unpickling)
+        if self._full is not None:
+            return getattr(self._full, name)
+        pending = self._pending
+        if name in pending:
+            # stays pending on error, so the next access raises again
+            compat.validate_field(self._partial, name, pending[name])
+            if len(pending) == 1:
+                for hook in compat.validation_hooks:
+                    hook(self._partial)
+            del pending[name]
+            return self._partial.__dict__[name]
+        _, _, required = _layouts[self._model]
+        values = self._partial.__dict__
+        if name in values and (name not in required or name in compat.fields_set(self._partial)):
+            return values[name]
+        # a missing required field or not a field at all: let pydantic decide
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in LazyResource.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.materialize(), name, value)
+
+    def __repr__(self) -> str:
+        state = "materialized" if self._full is not None else f"{len(self._pending)} fields pending"
+        return f"<Lazy {self._model.__name__} ({state})>"
+
+
+def load(raw: Union[bytes, str, dict], model: Optional[Type[BaseModel]] = None) -> LazyResource:
+    """Lazy counterpart of `registry.parse`; `model` defaults to the one for its resourceType."""
+    if not isinstance(raw, dict):
+        raw = _loads(raw)
+        if not isinstance(raw, dict):
+            raise ValueError("expected a JSON object")
+    if model is None:
+        model = registry.get_model(raw.get("resourceType"))
+    return LazyResource(model, raw)
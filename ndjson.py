@@ -0,0 +1,99 @@
+import io
+import json
+import logging
+from dataclasses import dataclass
+from typing import IO, Callable, Iterator, Optional, Tuple, Union
+from pydantic import BaseModel, ValidationError # type: ignore
+
+import compat
+import registry
+from interning import InternPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+@dataclass
+class LineError:
+    line: int  # 1-based line number in the input
+    resourceType: Optional[str]
+    message: str
+
+
+def _iter_lines(stream: IO, chunk_size: int) -> Iterator[bytes]:
+    # Read fixed-size chunks and split on newlines so memory stays bounded by
+    # chunk_size plus the longest line, regardless of file size.
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def log_error(error: LineError) -> None:
+    """Default `on_error`: log the line number, resourceType and message."""
+    logger.warning("line %d (%s): %s", error.line, error.resourceType, error.message)
+
+
+def read_ndjson(
+    source: Union[str, bytes, "io.PathLike[str]", IO],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Optional[Callable[[LineError], None]] = None,
+    intern: Optional[InternPool] = None,
+) -> Iterator[BaseModel]:
+    """Yield a validated model for every line of a FHIR NDJSON file.
+
+    `source` is a path or an open (text or binary) file object. Lines that fail
+    to parse or validate are passed to `on_error` (logged by default) and the
+    run continues with the next line. With an `intern` pool, repeated codings
+    and concepts share one instance across all yielded resources.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if on_error is None:
+        on_error = log_error
+
+    for lineno, line in iter_source(source, chunk_size):
+        resource, error = parse_line(lineno, line)
+        if error is not None:
+            on_error(error)
+            continue
+        if intern is not None:
+            resource = intern.intern(resource)
+        yield resource
+
+
+def parse_line(lineno: int, line: bytes):
+    """(resource, None) for a line that validates, else (None, LineError)."""
+    resource_type = None
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+        resource_type = data.get("resourceType")
+        return compat.validate(registry.get_model(resource_type), data), None
+    except (ValueError, ValidationError) as exc:
+        return None, LineError(lineno, resource_type, str(exc))
+
+
+def _iter_numbered_lines(stream: IO, chunk_size: int) -> Iterator[Tuple[int, bytes]]:
+    for lineno, line in enumerate(_iter_lines(stream, chunk_size), start=1):
+        if line.strip():
+            yield lineno, line
+
+
+def iter_source(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, bytes]]:
+    """(line number, raw line) for every non-blank line of a path or file object."""
+    if hasattr(source, "read"):
+        yield from _iter_numbered_lines(source, chunk_size)
+    else:
+        with open(source, "rb") as stream:
+            yield from _iter_numbered_lines(stream, chunk_size)
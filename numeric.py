@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np # type: ignore
+
+from observation import Observation, ObservationReferenceRange
+
+# Vectorized views over Observation values. Values are pulled out of the model
+# tree in one pass and returned as NumPy masked arrays (mask = value missing),
+# so statistics and range checks run over whole arrays instead of per object.
+
+
+@dataclass
+class ObservationArrays:
+    value: np.ma.MaskedArray  # (n,) float64 valueQuantity.value
+    unit: np.ma.MaskedArray  # (n,) object valueQuantity.unit
+    effective: np.ma.MaskedArray  # (n,) datetime64[us], UTC
+    subject: np.ma.MaskedArray  # (n,) object subject.reference
+    component_codes: List[str]  # component code axis
+    component_value: np.ma.MaskedArray  # (n, len(component_codes)) float64
+    component_unit: np.ma.MaskedArray  # (n, len(component_codes)) object
+
+    def component(self, code: str) -> np.ma.MaskedArray:
+        return self.component_value[:, self.component_codes.index(code)]
+
+
+def _code(concept) -> Optional[str]:
+    if concept is None or not concept.coding:
+        return None
+    return concept.coding[0].code
+
+
+def _utc_naive(value) -> Optional[datetime]:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _masked(values: list, dtype, fill) -> np.ma.MaskedArray:
+    mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    data = np.array([fill if v is None else v for v in values], dtype=dtype)
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+def observation_arrays(
+    observations: Sequence[Observation], component_codes: Optional[Sequence[str]] = None
+) -> ObservationArrays:
+    """Collect values, units, timestamps, subjects and components into arrays.
+
+    `component_codes` fixes the component axis; by default it holds every
+    component code (coding[0].code) in first-seen order.
+    """
+    values, units, effective, subjects = [], [], [], []
+    components: List[Dict[str, Tuple[Optional[float], Optional[str]]]] = []
+    seen: Dict[str, None] = {}
+    for obs in observations:
+        quantity = obs.valueQuantity
+        values.append(quantity.value if quantity else None)
+        units.append(quantity.unit if quantity else None)
+        effective.append(_utc_naive(obs.effectiveDateTime))
+        subjects.append(obs.subject.reference if obs.subject else None)
+        row = {}
+        for component in obs.component or ():
+            code = _code(component.code)
+            if code is None:
+                continue
+            quantity = component.valueQuantity
+            row[code] = (quantity.value, quantity.unit) if quantity else (None, None)
+            seen.setdefault(code)
+        components.append(row)
+
+    axis = list(component_codes) if component_codes is not None else list(seen)
+    n, k = len(components), len(axis)
+    column = {code: j for j, code in enumerate(axis)}
+    component_value = np.full((n, k), np.nan)
+    component_unit = np.full((n, k), None, dtype=object)
+    for i, row in enumerate(components):
+        for code, (value, unit) in row.items():
+            j = column.get(code)
+            if j is not None:
+                if value is not None:
+                    component_value[i, j] = value
+                component_unit[i, j] = unit
+
+    return ObservationArrays(
+        value=_masked(values, np.float64, np.nan),
+        unit=_masked(units, object, None),
+        effective=_masked(effective, "datetime64[us]", np.datetime64("NaT")),
+        subject=_masked(subjects, object, None),
+        component_codes=axis,
+        component_value=np.ma.masked_invalid(component_value),
+        component_unit=np.ma.MaskedArray(component_unit, mask=component_unit == None),  # noqa: E711
+    )
+
+
+def reference_bounds(
+    observations: Sequence[Observation], component_code: Optional[str] = None
+) -> Tuple[np.ma.MaskedArray, np.ma.MaskedArray]:
+    """low/high arrays from each Observation's (or component's) first referenceRange."""
+    lows, highs = [], []
+    for obs in observations:
+        ranges = obs.referenceRange
+        if component_code is not None:
+            ranges = None
+            for component in obs.component or ():
+                if _code(component.code) == component_code:
+                    ranges = component.referenceRange
+                    break
+        first = ranges[0] if ranges else None
+        lows.append(first.low.value if first and first.low else None)
+        highs.append(first.high.value if first and first.high else None)
+    return _masked(lows, np.float64, np.nan), _masked(highs, np.float64, np.nan)
+
+
+def out_of_range(values, low=None, high=None) -> np.ma.MaskedArray:
+    """True where `values` fall outside [low, high].
+
+    `low`/`high` may be scalars, arrays (e.g. from `reference_bounds`) or an
+    `ObservationReferenceRange` passed as `low`. Missing values stay masked;
+    a missing bound is treated as unbounded on that side.
+    """
+    if isinstance(low, ObservationReferenceRange):
+        low, high = (
+            low.low.value if low.low else None,
+            low.high.value if low.high else None,
+        )
+    values = np.ma.asarray(values, dtype=np.float64)
+    result = np.zeros(values.shape, dtype=bool)
+    if low is not None:
+        result |= np.ma.filled(values < np.ma.asarray(low, dtype=np.float64), False)
+    if high is not None:
+        result |= np.ma.filled(values > np.ma.asarray(high, dtype=np.float64), False)
+    return np.ma.MaskedArray(result, mask=np.ma.getmaskarray(values))
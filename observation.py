@@ -1,39 +1,15 @@
 from typing import List, Literal, Optional, Union
 from pydantic import BaseModel, Field # type: ignore
+from datatypes import CodeableConcept, Identifier, Period, Reference
 from datetime import datetime
 
 
-class Identifier(BaseModel):
-    use: Optional[str] = None
-    type: Optional['CodeableConcept'] = None
-    system: Optional[str] = None
-    value: Optional[str] = None
-
-class CodeableConcept(BaseModel):
-    coding: Optional[List['Coding']] = None
-    text: Optional[str] = None
-
-class Coding(BaseModel):
-    system: Optional[str] = None
-    code: Optional[str] = None
-    display: Optional[str] = None
-
-class Reference(BaseModel):
-    reference: Optional[str] = None
-    type: Optional[str] = None
-    identifier: Optional[Identifier] = None
-    display: Optional[str] = None
-
 class Quantity(BaseModel):
     value: Optional[float] = None
     unit: Optional[str] = None
     system: Optional[str] = None
     code: Optional[str] = None
 
-class Period(BaseModel):
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-
 class Timing(BaseModel):
     # Define the structure according to FHIR Timing
     pass
@@ -0,0 +1,81 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import IO, Callable, Iterator, List, Optional, Tuple, Union
+from pydantic import BaseModel # type: ignore
+
+from ndjson import DEFAULT_CHUNK_SIZE, LineError, iter_source, log_error, parse_line
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def validate_batch(batch: List[Tuple[int, bytes]]) -> Tuple[List[BaseModel], List[LineError]]:
+    """Validate (line number, raw line) pairs into (models, errors).
+
+    Runs in a worker process; models come back to the parent pickled.
+    """
+    resources, errors = [], []
+    for lineno, line in batch:
+        resource, error = parse_line(lineno, line)
+        if error is not None:
+            errors.append(error)
+        else:
+            resources.append(resource)
+    return resources, errors
+
+
+def _batches(lines: Iterator[Tuple[int, bytes]], batch_size: int) -> Iterator[List[Tuple[int, bytes]]]:
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def validate_parallel(
+    source: Union[str, "os.PathLike[str]", IO],
+    workers: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    ordered: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Optional[Callable[[LineError], None]] = None,
+) -> Iterator[BaseModel]:
+    """Validate an NDJSON file across a process pool, yielding models.
+
+    Lines are read in the parent and sent to `workers` processes in batches of
+    `batch_size`. With `ordered=True` resources come back in input order,
+    otherwise in completion order. Errors from every worker are funnelled to
+    `on_error` in the parent (logged by default), as in `ndjson.read_ndjson`.
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    if on_error is None:
+        on_error = log_error
+    workers = workers or os.cpu_count() or 1
+    # at most this many batches are in flight, so memory stays bounded
+    max_pending = workers * 2
+
+    batches = _batches(iter_source(source, chunk_size), batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(validate_batch, batch))
+            while len(pending) >= max_pending:
+                yield from _drain(pending, ordered, on_error)
+        while pending:
+            yield from _drain(pending, ordered, on_error)
+
+
+def _drain(pending: deque, ordered: bool, on_error: Callable[[LineError], None]) -> Iterator[BaseModel]:
+    if ordered:
+        done = [pending.popleft()]
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+    for future in done:
+        resources, errors = future.result()
+        for error in errors:
+            on_error(error)
+        yield from resources
@@ -0,0 +1,278 @@
+"""JSON Patch (RFC 6902) for resource models, and structural diffs.
+
+`apply_patch(resource, ops)` returns a new resource and leaves the original
+alone. Only the objects along each patched path are copied; every other
+sub-object is shared with the original. Only the values the patch writes are
+validated, each against the field that receives it; an element inserted into
+a list is validated on its own.
+
+Paths are JSON Pointers over FHIR JSON keys (`/class`, `/activity/0/detail/status`).
+
+`diff(old, new)` returns the operations that turn `old` into `new`;
+sub-objects shared between the two (as after `apply_patch`) are skipped
+without being compared.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError # type: ignore
+
+import compat
+import serialize
+from interning import InternedCodeableConcept, InternedCoding
+from datatypes import CodeableConcept, Coding
+
+# interned values are frozen; patched copies become the plain class
+_THAWED = {InternedCoding: Coding, InternedCodeableConcept: CodeableConcept}
+
+
+class PatchError(ValueError):
+    pass
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"invalid JSON pointer {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _pointer(tokens: List[str]) -> str:
+    return "".join("/" + str(t).replace("~", "~0").replace("/", "~1") for t in tokens)
+
+
+def _json(value: Any) -> Any:
+    # FHIR JSON form of a model, list or scalar, for `test` and diffs
+    return json.loads(serialize.dumps(value))
+
+
+_names: Dict[type, Dict[str, str]] = {}
+
+
+def _field_name(model: BaseModel, token: str) -> str:
+    cls = type(model)
+    names = _names.get(cls)
+    if names is None:
+        names = _names[cls] = {}
+        for spec in compat.field_specs(cls):
+            names[spec.name] = names[spec.alias] = spec.name
+    try:
+        return names[token]
+    except KeyError:
+        raise PatchError(f"{cls.__name__} has no element {token!r}") from None
+
+
+def _copy_model(model: BaseModel) -> BaseModel:
+    cls = type(model)
+    return compat.construct(_THAWED.get(cls, cls), dict(model.__dict__), set(compat.fields_set(model)))
+
+
+def _index(items: list, token: str, insert: bool = False) -> int:
+    if token == "-" and insert:
+        return len(items)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise PatchError(f"invalid list index {token!r}")
+    i = int(token)
+    if i > len(items) or (i == len(items) and not insert):
+        raise PatchError(f"list index {i} out of range")
+    return i
+
+
+def _validated_element(owner: BaseModel, name: str, value: Any) -> Any:
+    # validate one list element through the owning field without touching the rest
+    compat.validate_field(owner, name, [value])
+    return owner.__dict__[name][0]
+
+
+# A leaf edit gets the containing node, the last pointer token and (for list
+# elements of a model field) the owning model copy plus field name; it returns
+# the replacement container.
+Leaf = Callable[[Any, str, Optional[Tuple[BaseModel, str]]], Any]
+
+
+def _update(node: Any, tokens: List[str], leaf: Leaf, owner: Optional[Tuple[BaseModel, str]] = None) -> Any:
+    token = tokens[0]
+    if len(tokens) == 1:
+        return leaf(node, token, owner)
+    if isinstance(node, BaseModel):
+        name = _field_name(node, token)
+        child = node.__dict__[name]
+        if child is None:
+            raise PatchError(f"path not found: {token!r} is not set")
+        new = _copy_model(node)
+        new.__dict__[name] = _update(child, tokens[1:], leaf, (new, name) if isinstance(child, list) else None)
+        return new
+    if isinstance(node, list):
+        i = _index(node, token)
+        new = list(node)
+        new[i] = _update(node[i], tokens[1:], leaf)
+        return new
+    if isinstance(node, dict):
+        if token not in node:
+            raise PatchError(f"path not found: {token!r}")
+        new = dict(node)
+        new[token] = _update(node[token], tokens[1:], leaf)
+        return new
+    raise PatchError(f"cannot descend into {type(node).__name__} at {token!r}")
+
+
+def _get(node: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(node, BaseModel):
+            node = node.__dict__[_field_name(node, token)]
+        elif isinstance(node, list):
+            node = node[_index(node, token)]
+        elif isinstance(node, dict) and token in node:
+            node = node[token]
+        else:
+            raise PatchError(f"path not found: {token!r}")
+        if node is None:
+            raise PatchError(f"path not found: {token!r} is not set")
+    return node
+
+
+def _setter(value: Any, replace: bool) -> Leaf:
+    def leaf(node, token, owner):
+        if isinstance(node, BaseModel):
+            name = _field_name(node, token)
+            if replace and node.__dict__[name] is None:
+                raise PatchError(f"cannot replace {token!r}: not set")
+            new = _copy_model(node)
+            compat.validate_field(new, name, value)
+            return new
+        if isinstance(node, list):
+            i = _index(node, token, insert=not replace)
+            element = _validated_element(*owner, value) if owner is not None else value
+            new = list(node)
+            if replace:
+                new[i] = element
+            else:
+                new.insert(i, element)
+            return new
+        if isinstance(node, dict):
+            if replace and token not in node:
+                raise PatchError(f"cannot replace {token!r}: not set")
+            return dict(node, **{token: value})
+        raise PatchError(f"cannot set {token!r} on {type(node).__name__}")
+    return leaf
+
+
+def _remove(node, token, owner):
+    if isinstance(node, BaseModel):
+        name = _field_name(node, token)
+        if node.__dict__[name] is None:
+            raise PatchError(f"cannot remove {token!r}: not set")
+        spec = next(s for s in compat.field_specs(type(node)) if s.name == name)
+        if spec.required:
+            raise PatchError(f"cannot remove required element {token!r}")
+        new = _copy_model(node)
+        new.__dict__[name] = spec.default
+        compat.fields_set(new).discard(name)
+        return new
+    if isinstance(node, list):
+        new = list(node)
+        del new[_index(node, token)]
+        return new
+    if isinstance(node, dict):
+        if token not in node:
+            raise PatchError(f"cannot remove {token!r}: not set")
+        return {k: v for k, v in node.items() if k != token}
+    raise PatchError(f"cannot remove {token!r} from {type(node).__name__}")
+
+
+def _apply_one(resource: BaseModel, op: dict) -> BaseModel:
+    try:
+        kind, path = op["op"], _parse_pointer(op["path"])
+    except KeyError as exc:
+        raise PatchError(f"operation is missing {exc.args[0]!r}") from None
+    if not path:
+        raise PatchError("operations on the whole resource are not supported")
+    if kind in ("add", "replace"):
+        if "value" not in op:
+            raise PatchError(f"{kind} operation is missing 'value'")
+        return _update(resource, path, _setter(op["value"], replace=kind == "replace"))
+    if kind == "remove":
+        return _update(resource, path, _remove)
+    if kind in ("move", "copy"):
+        source = _parse_pointer(op.get("from", ""))
+        if not source:
+            raise PatchError(f"{kind} operation needs a non-empty 'from'")
+        value = _get(resource, source)
+        if kind == "move":
+            if path[:len(source)] == source:
+                raise PatchError("cannot move a value into itself")
+            resource = _update(resource, source, _remove)
+        # an already-validated model or value passes straight through validation
+        return _update(resource, path, _setter(value, replace=False))
+    if kind == "test":
+        if _json(_get(resource, path)) != op.get("value"):
+            raise PatchError(f"test failed at {op['path']}")
+        return resource
+    raise PatchError(f"unknown operation {kind!r}")
+
+
+def apply_patch(resource: BaseModel, operations: List[dict]) -> BaseModel:
+    """Apply RFC 6902 `operations` in order and return the patched copy of `resource`.
+
+    Raises PatchError for a malformed patch, a failed `test` or an invalid
+    written value (chained to pydantic's ValidationError); `resource` is
+    unchanged either way.
+    """
+    for op in operations:
+        try:
+            resource = _apply_one(resource, op)
+        except ValidationError as exc:
+            raise PatchError(f"invalid value at {op.get('path')}: {exc}") from exc
+    return resource
+
+
+def diff(old: Any, new: Any) -> List[dict]:
+    """JSON Patch operations turning `old` into `new` (two versions of the same resource)."""
+    ops: List[dict] = []
+    _diff(old, new, [], ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: List[str], ops: List[dict]) -> None:
+    if old is new:
+        return
+    if isinstance(old, BaseModel) and type(old) is type(new):
+        old_values, new_values = old.__dict__, new.__dict__
+        for spec in compat.field_specs(type(old)):
+            a, b = old_values[spec.name], new_values[spec.name]
+            if a is b:
+                continue
+            child = path + [spec.alias]
+            if b is None:
+                ops.append({"op": "remove", "path": _pointer(child)})
+            elif a is None:
+                ops.append({"op": "add", "path": _pointer(child), "value": _json(b)})
+            else:
+                _diff(a, b, child, ops)
+        return
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for i in range(common):
+            _diff(old[i], new[i], path + [str(i)], ops)
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": _pointer(path + [str(i)]), "value": _json(new[i])})
+        # from the end, so earlier indexes stay valid
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path + [str(i)])})
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path + [key])})
+            else:
+                _diff(old[key], new[key], path + [key], ops)
+        for key in new:
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path + [key]), "value": _json(new[key])})
+        return
+    if old.__class__ is new.__class__ and not isinstance(old, BaseModel) and old == new:
+        return
+    a, b = _json(old), _json(new)
+    if a != b:
+        ops.append({"op": "replace", "path": _pointer(path), "value": b})
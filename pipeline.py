@@ -0,0 +1,350 @@
+"""asyncio ingestion pipeline: async source -> executor validation -> async sink.
+
+    async def write(batch):
+        await loop.run_in_executor(None, repo.upsert_many, batch)
+
+    pipeline = Pipeline.from_ndjson(reader, write, workers=4)
+    stats = await pipeline.run()
+
+The source is read on the event loop from any object with a coroutine
+`read(n)` (an `asyncio.StreamReader`, say), as NDJSON lines
+(`from_ndjson`) or as the entries of a Bundle being streamed (`from_bundle`).
+Lines are grouped into batches; each batch is parsed and validated in an
+executor (a thread pool of `workers` threads by default, or any
+`concurrent.futures` executor you pass, e.g. a ProcessPoolExecutor), so
+validation never blocks the loop. Validated batches go to `sink`, a
+coroutine function (or plain function) taking a list of models. Bundle
+entries are handled as `Bundle.iter_resources` does: entries without a
+resource are skipped, and resources of a type with no model here
+(Patient, ...) reach the sink as plain dicts rather than as errors.
+
+Backpressure: the stages are joined by queues holding at most `max_pending`
+batches, so a slow sink stops validation, and full validation stops reading
+from the source, which in turn stops reading the socket. Time the reader
+spent waiting on a full queue is reported as `backpressure_seconds`.
+
+Every stage records a latency histogram (see `Histogram`) in `stats`, which
+is live while the pipeline runs.
+
+`stop()` drains gracefully: reading stops and every batch already read is
+still validated and written before `run()` returns. Errors in individual
+lines go to `on_error` (logged by default) as in `ndjson.read_ndjson`; an
+exception in the sink or the source stops the pipeline and is raised from
+`run()`.
+"""
+
+import asyncio
+import bisect
+import json
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError # type: ignore
+
+import compat
+import registry
+from Bundle import NEED_DATA, scan_entries
+from ndjson import DEFAULT_CHUNK_SIZE, LineError, log_error
+from parallel import validate_batch
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+Batch = List[Tuple[int, bytes]]
+Sink = Callable[[List[Any]], Union[Awaitable[None], None]]
+
+
+class Histogram:
+    """Latency histogram with power-of-two microsecond buckets (1 us .. ~36 min)."""
+
+    BOUNDS = [2 ** k / 1e6 for k in range(32)]  # bucket upper bounds, seconds
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0 < p <= 100), capped at `max`."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+@dataclass
+class PipelineStats:
+    read: int = 0  # lines or entries read from the source
+    validated: int = 0
+    errors: int = 0
+    written: int = 0
+    backpressure_seconds: float = 0.0
+    # read: waiting on the source for a batch; queue: a batch waiting for a
+    # worker; validate: executor time per batch; sink: sink time per batch;
+    # end_to_end: batch read -> written
+    latency: Dict[str, Histogram] = field(
+        default_factory=lambda: {name: Histogram() for name in ("read", "queue", "validate", "sink", "end_to_end")}
+    )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "read": self.read,
+            "validated": self.validated,
+            "errors": self.errors,
+            "written": self.written,
+            "backpressure_seconds": self.backpressure_seconds,
+            "latency": {name: h.summary() for name, h in self.latency.items()},
+        }
+
+
+# -- async sources -------------------------------------------------------------
+
+
+async def _chunks(reader, chunk_size: int) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+async def ndjson_lines(reader, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Tuple[int, bytes]]:
+    """(line number, raw line) for every non-blank NDJSON line read from `reader`."""
+    pending = b""
+    lineno = 0
+    async for chunk in _chunks(reader, chunk_size):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            lineno += 1
+            if line.strip():
+                yield lineno, line
+    if pending.strip():
+        yield lineno + 1, pending
+
+
+async def bundle_entries(reader, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[Tuple[int, bytes]]:
+    """(entry number, raw entry) for each Bundle.entry while the Bundle is still being read."""
+    scanner = scan_entries()
+    item = next(scanner)
+    number = 0
+    while True:
+        if item is NEED_DATA:
+            try:
+                item = scanner.send(await reader.read(chunk_size))
+            except StopIteration:
+                return
+        else:
+            number += 1
+            yield number, item
+            item = next(scanner)
+
+
+def _validate_entries(batch: Batch) -> Tuple[List[Any], List[LineError]]:
+    # Bundle counterpart of parallel.validate_batch; LineError.line is the entry
+    # number. As in Bundle.iter_resources, entries without a resource are
+    # skipped and resource types without a model pass through as dicts.
+    resources, errors = [], []
+    for number, raw in batch:
+        resource_type = None
+        try:
+            entry = json.loads(raw)
+            if not isinstance(entry, dict):
+                raise ValueError("entry is not a JSON object")
+            resource = entry.get("resource")
+            if resource is None:
+                continue
+            if not isinstance(resource, dict):
+                raise ValueError("entry.resource is not a JSON object")
+            resource_type = resource.get("resourceType")
+            if registry.is_registered(resource_type):
+                resource = compat.validate(registry.get_model(resource_type), resource)
+            resources.append(resource)
+        except (ValueError, ValidationError) as exc:
+            errors.append(LineError(number, resource_type, str(exc)))
+    return resources, errors
+
+
+# -- pipeline ------------------------------------------------------------------
+
+_DONE = object()
+
+
+class Pipeline:
+    """Source -> validation -> sink with bounded queues; see the module docstring.
+
+    `source` is an async iterable of (position, raw bytes) and `validate` a
+    function turning a list of those into (models, errors); it must be
+    picklable to run in a process pool.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[Tuple[int, bytes]],
+        sink: Sink,
+        validate: Callable[[Batch], Tuple[List[Any], List[LineError]]] = validate_batch,
+        executor: Optional[Executor] = None,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending: Optional[int] = None,
+        on_error: Optional[Callable[[LineError], None]] = None,
+    ):
+        if batch_size <= 0 or workers <= 0:
+            raise ValueError("batch_size and workers must be positive")
+        self.source = source
+        self.sink = sink
+        self.validate = validate
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending or 2 * workers
+        self.on_error = on_error or log_error
+        self.stats = PipelineStats()
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._stopping = False
+        self._raw: Optional[asyncio.Queue] = None
+        self._valid: Optional[asyncio.Queue] = None
+
+    @classmethod
+    def from_ndjson(cls, reader, sink: Sink, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> "Pipeline":
+        return cls(ndjson_lines(reader, chunk_size), sink, validate_batch, **kwargs)
+
+    @classmethod
+    def from_bundle(cls, reader, sink: Sink, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> "Pipeline":
+        return cls(bundle_entries(reader, chunk_size), sink, _validate_entries, **kwargs)
+
+    @property
+    def backlog(self) -> Dict[str, int]:
+        """Batches waiting in each queue right now (capacity: `max_pending`)."""
+        return {
+            "validation": self._raw.qsize() if self._raw is not None else 0,
+            "sink": self._valid.qsize() if self._valid is not None else 0,
+        }
+
+    def stop(self) -> None:
+        """Stop reading; what was already read is still validated and written.
+
+        Takes effect when the source yields its next item; close an idle
+        source (e.g. `reader.feed_eof()`) to stop right away.
+        """
+        self._stopping = True
+
+    async def run(self) -> PipelineStats:
+        """Run until the source is exhausted (or `stop()`), then drain and return the stats."""
+        self._raw = asyncio.Queue(self.max_pending)
+        self._valid = asyncio.Queue(self.max_pending)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="pipeline")
+        tasks = [asyncio.ensure_future(self._read())]
+        tasks += [asyncio.ensure_future(self._validate()) for _ in range(self.workers)]
+        tasks.append(asyncio.ensure_future(self._write()))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if self._owns_executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        return self.stats
+
+    async def _put(self, queue: asyncio.Queue, item) -> None:
+        if queue.full():
+            t0 = time.perf_counter()
+            await queue.put(item)
+            self.stats.backpressure_seconds += time.perf_counter() - t0
+        else:
+            queue.put_nowait(item)
+
+    async def _read(self) -> None:
+        stats = self.stats
+        batch: Batch = []
+        t0 = time.perf_counter()
+        async for item in self.source:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                now = time.perf_counter()
+                stats.latency["read"].record(now - t0)
+                stats.read += len(batch)
+                await self._put(self._raw, (now, batch))
+                batch = []
+                t0 = time.perf_counter()
+            if self._stopping:
+                break
+        if batch:
+            now = time.perf_counter()
+            stats.latency["read"].record(now - t0)
+            stats.read += len(batch)
+            await self._put(self._raw, (now, batch))
+        # sentinels only on a clean finish; on errors run() cancels every stage
+        for _ in range(self.workers):
+            await self._raw.put(_DONE)
+
+    async def _validate(self) -> None:
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        while True:
+            item = await self._raw.get()
+            if item is _DONE:
+                await self._valid.put(_DONE)
+                return
+            read_at, batch = item
+            t0 = time.perf_counter()
+            stats.latency["queue"].record(t0 - read_at)
+            resources, errors = await loop.run_in_executor(self._executor, self.validate, batch)
+            stats.latency["validate"].record(time.perf_counter() - t0)
+            stats.validated += len(resources)
+            stats.errors += len(errors)
+            for error in errors:
+                self.on_error(error)
+            if resources:
+                await self._valid.put((read_at, resources))
+
+    async def _write(self) -> None:
+        stats = self.stats
+        remaining = self.workers  # one _DONE per validation worker
+        while remaining:
+            item = await self._valid.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            read_at, resources = item
+            t0 = time.perf_counter()
+            result = self.sink(resources)
+            if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                await result
+            now = time.perf_counter()
+            stats.latency["sink"].record(now - t0)
+            stats.latency["end_to_end"].record(now - read_at)
+            stats.written += len(resources)
@@ -0,0 +1,63 @@
+import importlib
+import json
+from typing import Dict, List, Optional, Tuple, Type, Union
+from pydantic import BaseModel # type: ignore
+
+import compat
+
+# resourceType -> (module, class). Modules are only imported the first time
+# their resourceType is looked up, so a service that only handles Coverage
+# never imports Composition or CarePlan.
+_MODULES: Dict[str, Tuple[str, str]] = {
+    "AllergyIntolerance": ("Allergy_intolerance", "AllergyIntolerance"),
+    "Bundle": ("Bundle", "Bundle"),
+    "CarePlan": ("CarePlan", "CarePlan"),
+    "CareTeam": ("CareTeam", "CareTeam"),
+    "Composition": ("Composition", "Composition"),
+    "Coverage": ("Coverage", "Coverage"),
+    "CoverageEligibilityRequest": ("CoverageEligibilityRequest", "CoverageEligibilityRequest"),
+    "CoverageEligibilityResponse": ("CoverageEligibilityResponse", "CoverageEligibilityResponse"),
+    "Device": ("Device", "Device"),
+    "DeviceRequest": ("DeviceRequest", "DeviceRequest"),
+    "Encounter": ("encounter", "Encounter"),
+    "Observation": ("observation", "Observation"),
+}
+
+# resourceType -> model class, filled on first use
+_models: Dict[str, Type[BaseModel]] = {}
+
+
+def register(resource_type: str, module_name: str, class_name: Optional[str] = None) -> None:
+    _MODULES[resource_type] = (module_name, class_name or resource_type)
+    _models.pop(resource_type, None)
+
+
+def resource_types() -> List[str]:
+    return sorted(_MODULES)
+
+
+def is_registered(resource_type: str) -> bool:
+    return resource_type in _MODULES
+
+
+def get_model(resource_type: str) -> Type[BaseModel]:
+    try:
+        return _models[resource_type]
+    except (KeyError, TypeError):
+        pass
+    try:
+        module_name, class_name = _MODULES[resource_type]
+    except (KeyError, TypeError):
+        raise ValueError(f"unsupported resourceType {resource_type!r}") from None
+    model = getattr(importlib.import_module(module_name), class_name)
+    _models[resource_type] = model
+    return model
+
+
+def parse(data: Union[dict, bytes, str]) -> BaseModel:
+    """Validate a FHIR resource (dict or JSON text) into its model class."""
+    if not isinstance(data, dict):
+        data = json.loads(data)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+    return compat.validate(get_model(data.get("resourceType")), data)
@@ -0,0 +1,233 @@
+"""SQLite-backed persistent repository for resource models.
+
+Each resource is stored as its FHIR JSON in one `resources` table keyed by
+`Type/id`. The columns queries filter on are generated from the JSON by
+SQLite's JSON1 functions and indexed, so they never drift from the stored
+document:
+
+    resource_type  $.resourceType
+    id             $.id
+    subject        $.subject / $.patient / $.beneficiary reference
+    status         $.status
+    date           the resource's main date (effective[x], period.start,
+                   authoredOn, created, date, recordedDate, ...)
+
+Dates are compared as ISO 8601 text, which orders correctly as long as
+stored values share a UTC offset (our ingest normalises to UTC).
+
+    with Repository("resources.db") as repo:
+        repo.upsert_many(observations)
+        for obs in repo.find("Observation", subject="Patient/1", since="2024-01-01"):
+            ...
+
+The database runs in WAL mode, so readers in other connections are not
+blocked by a writer. Writes go through `upsert_many`, which batches rows into
+one transaction per `batch_size`. Reads come back as model instances, built
+with `trusted.parse` by default since the stored JSON was validated on its
+way in; pass `trusted=False` to validate again with `registry.parse`.
+"""
+
+import json
+import sqlite3
+import uuid
+from typing import Iterable, Iterator, List, Optional, Tuple
+from pydantic import BaseModel # type: ignore
+
+import registry
+import serialize
+import trusted as trusted_construct
+
+# orjson is optional; without it the stdlib json module is used
+try:
+    import orjson # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+DEFAULT_BATCH_SIZE = 1000
+
+# JSON paths tried in order for the generated `subject` and `date` columns
+SUBJECT_PATHS = ("$.subject.reference", "$.patient.reference", "$.beneficiary.reference")
+DATE_PATHS = (
+    "$.effectiveDateTime", "$.effectiveInstant", "$.effectivePeriod.start",
+    "$.period.start", "$.authoredOn", "$.occurrenceDateTime", "$.occurrencePeriod.start",
+    "$.created", "$.date", "$.recordedDate", "$.issued",
+)
+
+
+def _coalesce(paths: Tuple[str, ...]) -> str:
+    return "coalesce(" + ", ".join(f"json_extract(resource, '{p}')" for p in paths) + ")"
+
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS resources (
+    key TEXT PRIMARY KEY,
+    resource TEXT NOT NULL CHECK (json_valid(resource)),
+    resource_type TEXT GENERATED ALWAYS AS (json_extract(resource, '$.resourceType')) VIRTUAL,
+    id TEXT GENERATED ALWAYS AS (json_extract(resource, '$.id')) VIRTUAL,
+    subject TEXT GENERATED ALWAYS AS ({_coalesce(SUBJECT_PATHS)}) VIRTUAL,
+    status TEXT GENERATED ALWAYS AS (json_extract(resource, '$.status')) VIRTUAL,
+    date TEXT GENERATED ALWAYS AS ({_coalesce(DATE_PATHS)}) VIRTUAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resources_type_id ON resources (resource_type, id);
+-- superseded by resources_subject_date (databases created before it have it)
+DROP INDEX IF EXISTS resources_subject;
+CREATE INDEX IF NOT EXISTS resources_subject_date ON resources (subject, date);
+CREATE INDEX IF NOT EXISTS resources_type_status ON resources (resource_type, status);
+CREATE INDEX IF NOT EXISTS resources_type_date ON resources (resource_type, date);
+"""
+
+_UPSERT = (
+    "INSERT INTO resources (key, resource) VALUES (?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET resource = excluded.resource"
+)
+
+
+def _loads(text: str) -> dict:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+class Repository:
+    """Resources persisted in a SQLite database (see the module docstring)."""
+
+    def __init__(self, path: str = ":memory:", batch_size: int = DEFAULT_BATCH_SIZE, trusted: bool = True):
+        self.path = path
+        self.batch_size = batch_size
+        self._parse = trusted_construct.parse if trusted else registry.parse
+        # transactions are managed explicitly, see `_transaction`
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            # with WAL, NORMAL only risks the last transactions on power loss, never corruption
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "Repository":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT count(*) FROM resources").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self._conn.execute("SELECT 1 FROM resources WHERE key = ?", (key,)).fetchone() is not None
+
+    # -- writes ------------------------------------------------------------
+
+    @staticmethod
+    def key_for(resource: BaseModel) -> str:
+        """`Type/id`; resources without an id get a random one."""
+        resource_id = getattr(resource, "id", None) or uuid.uuid4().hex
+        return f"{resource.resourceType}/{resource_id}"
+
+    def upsert(self, resource: BaseModel, key: Optional[str] = None) -> str:
+        """Store `resource`, replacing whatever is stored under its key, and return the key."""
+        return self.upsert_many([resource], [key] if key is not None else None)[0]
+
+    def upsert_many(self, resources: Iterable[BaseModel], keys: Optional[Iterable[str]] = None) -> List[str]:
+        """Store `resources` in transactions of `batch_size` rows; returns their keys.
+
+        `keys`, when given, must pair one to one with `resources`; a mismatch
+        raises ValueError before anything is written. A failed batch is
+        rolled back; batches committed before it stay.
+        """
+        if keys is None:
+            pairs: Iterable[Tuple[str, BaseModel]] = ((self.key_for(r), r) for r in resources)
+        else:
+            resources, keys = list(resources), list(keys)
+            if len(keys) != len(resources):
+                raise ValueError(f"got {len(keys)} keys for {len(resources)} resources")
+            pairs = zip(keys, resources)
+        written: List[str] = []
+        batch: List[Tuple[str, str]] = []
+        for key, resource in pairs:
+            batch.append((key, serialize.dumps(resource).decode()))
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                written += [k for k, _ in batch]
+                batch = []
+        if batch:
+            self._write(batch)
+            written += [k for k, _ in batch]
+        return written
+
+    def delete(self, key: str) -> bool:
+        """Remove the resource stored under `key`; False if there was none."""
+        return self._conn.execute("DELETE FROM resources WHERE key = ?", (key,)).rowcount > 0
+
+    def _write(self, rows: List[Tuple[str, str]]) -> None:
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(_UPSERT, rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # -- reads -------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[BaseModel]:
+        row = self._conn.execute("SELECT resource FROM resources WHERE key = ?", (key,)).fetchone()
+        return self._parse(_loads(row[0])) if row is not None else None
+
+    def find(
+        self,
+        resource_type: Optional[str] = None,
+        subject: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = False,
+    ) -> Iterator[BaseModel]:
+        """Resources matching every given filter, ordered by date.
+
+        `since` is inclusive and `until` exclusive; both are ISO 8601 text.
+        Rows are read lazily, so iterating a large result does not hold it in memory.
+        """
+        where, params = self._where(resource_type, subject, status, since, until)
+        sql = f"SELECT resource FROM resources{where} ORDER BY date {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        parse = self._parse
+        for (text,) in self._conn.execute(sql, params):
+            yield parse(_loads(text))
+
+    def count(
+        self,
+        resource_type: Optional[str] = None,
+        subject: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> int:
+        where, params = self._where(resource_type, subject, status, since, until)
+        return self._conn.execute(f"SELECT count(*) FROM resources{where}", params).fetchone()[0]
+
+    def keys(self, resource_type: Optional[str] = None) -> List[str]:
+        where, params = self._where(resource_type, None, None, None, None)
+        return [k for (k,) in self._conn.execute(f"SELECT key FROM resources{where}", params)]
+
+    @staticmethod
+    def _where(resource_type, subject, status, since, until) -> Tuple[str, list]:
+        clauses, params = [], []
+        # a subject's rows are far fewer than a type's: with a subject, keep
+        # SQLite on the (subject, date) index by hiding resource_type (unary +)
+        # from the planner, which otherwise prefers (resource_type, date)
+        for column, op, value in (
+            ("+resource_type" if subject is not None else "resource_type", "=", resource_type),
+            ("subject", "=", subject),
+            ("status", "=", status),
+            ("date", ">=", since),
+            ("date", "<", until),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
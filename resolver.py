@@ -0,0 +1,213 @@
+import json
+import re
+import sqlite3
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from pydantic import BaseModel # type: ignore
+
+import compat
+import registry
+from Bundle import Bundle
+from datatypes import Reference
+from walk import iter_elements
+
+_RESTFUL_URL = re.compile(r"^(.*)/[A-Z][A-Za-z]+/[A-Za-z0-9\-.]{1,64}(?:/_history/[^/]+)?$")
+
+# Backends resolve a batch of reference strings ("Patient/1", absolute URLs,
+# ...) in one call and return {reference: resource} for the ones they found.
+
+
+class InMemoryBackend:
+    # `resources` is anything with .get(reference): a dict or a store.ResourceStore
+    def __init__(self, resources: Mapping[str, Any]):
+        self.resources = resources
+
+    def fetch_many(self, references: List[str]) -> Dict[str, Any]:
+        found = {}
+        for ref in references:
+            resource = self.resources.get(ref)
+            if resource is not None:
+                found[ref] = resource
+        return found
+
+
+class SQLiteBackend:
+    # rows of (reference, resource JSON); resources are validated on the way out
+    def __init__(self, connection: sqlite3.Connection, table: str = "resources",
+                 key_column: str = "reference", json_column: str = "resource"):
+        self.connection = connection
+        self.query = f"SELECT {key_column}, {json_column} FROM {table} WHERE {key_column} IN "
+
+    def fetch_many(self, references: List[str]) -> Dict[str, Any]:
+        found = {}
+        # stay under SQLite's host-parameter limit
+        for start in range(0, len(references), 900):
+            chunk = references[start:start + 900]
+            placeholders = "(" + ",".join("?" * len(chunk)) + ")"
+            for key, text in self.connection.execute(self.query + placeholders, chunk):
+                found[key] = registry.parse(text)
+        return found
+
+
+class HTTPBackend:
+    # POSTs one FHIR batch Bundle of GETs to `base_url` per fetch_many() call
+    def __init__(self, base_url: str, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/fhir+json", "Accept": "application/fhir+json"}
+        self.headers.update(headers or {})
+
+    def fetch_many(self, references: List[str]) -> Dict[str, Any]:
+        batch = {
+            "resourceType": "Bundle",
+            "type": "batch",
+            "entry": [{"request": {"method": "GET", "url": ref}} for ref in references],
+        }
+        request = urllib.request.Request(
+            self.base_url, data=json.dumps(batch).encode("utf-8"), headers=self.headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            reply = compat.validate_json(Bundle, response.read())
+        found = {}
+        # batch-response entries are in request order
+        for ref, entry in zip(references, reply.entry or ()):
+            if entry.resource is not None and (entry.response is None or entry.response.status.startswith("2")):
+                found[ref] = entry.resource
+        return found
+
+
+class ReferenceResolver:
+    """Resolve every Reference in a resource or Bundle with one backend call.
+
+    Contained (`#id`) references resolve against the resource they appear
+    in. Relative references are made absolute against the referring entry's
+    fullUrl, and those naming other entries of the same Bundle resolve
+    locally. The rest are de-duplicated, looked up in an LRU cache and the
+    misses go to `backend.fetch_many()` as one batch.
+    """
+
+    def __init__(self, backend, cache_size: int = 10_000):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def collect(self, node) -> List[Tuple[str, Reference]]:
+        # (path, Reference) for every Reference with a reference string
+        return [(path, ref) for path, ref in iter_elements(node, Reference) if ref.reference]
+
+    def resolve(self, node) -> Dict[Tuple[Optional[str], str], Optional[Any]]:
+        """Map (owner, reference string) for each reference under `node` to its resource (None if unresolved).
+
+        `owner` is the fullUrl of the Bundle entry the reference appears in
+        (`entry[i]` when the entry has none), or None when `node` is a single
+        resource: the same `#p1` in two entries can name two resources.
+        """
+        results: Dict[Tuple[Optional[str], str], Optional[Any]] = {}
+        external: Dict[Tuple[Optional[str], str], str] = {}
+        local = _bundle_index(node) if isinstance(node, Bundle) else {}
+        for owner, base, resource in self._resources_in(node):
+            contained = _contained(resource)
+            for _, ref in self.collect(resource):
+                target = ref.reference
+                key = (owner, target)
+                if key in results:
+                    continue
+                if target.startswith("#"):
+                    results[key] = contained.get(target[1:])
+                    continue
+                absolute = _absolute(target, base)
+                if absolute in local:
+                    results[key] = local[absolute]
+                elif target in local:
+                    results[key] = local[target]
+                else:
+                    results[key] = None
+                    external[key] = absolute
+        found = self.resolve_references(external.values())
+        for key, target in external.items():
+            results[key] = found[target]
+        return results
+
+    def resolve_references(self, references: Iterable[str]) -> Dict[str, Optional[Any]]:
+        results: Dict[str, Optional[Any]] = {}
+        missing = []
+        for ref in dict.fromkeys(references):
+            if ref in self._cache:
+                self._cache.move_to_end(ref)
+                results[ref] = self._cache[ref]
+                self.hits += 1
+            else:
+                results[ref] = None
+                missing.append(ref)
+        if missing:
+            self.misses += len(missing)
+            found = self.backend.fetch_many(missing)
+            for ref, resource in found.items():
+                results[ref] = resource
+                self._remember(ref, resource)
+        return results
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _remember(self, ref: str, resource: Any) -> None:
+        self._cache[ref] = resource
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _resources_in(self, node) -> List[Tuple[Optional[str], Optional[str], Any]]:
+        # (owner, base URL for relative references, resource); a Bundle is
+        # resolved entry by entry so `#id` stays local to its resource
+        if isinstance(node, Bundle):
+            return [
+                (entry.fullUrl or f"entry[{i}]", _base_url(entry.fullUrl), entry.resource)
+                for i, entry in enumerate(node.entry or ())
+                if isinstance(entry.resource, BaseModel)
+            ]
+        return [(None, None, node)]
+
+
+def _contained(resource) -> Dict[str, Any]:
+    found = {}
+    for item in getattr(resource, "contained", None) or ():
+        item_id = item.get("id") if isinstance(item, dict) else getattr(item, "id", None)
+        if item_id:
+            found[item_id] = item
+    return found
+
+
+def _base_url(full_url: Optional[str]) -> Optional[str]:
+    # "http://server/fhir/Observation/1" -> "http://server/fhir"
+    if not full_url or "://" not in full_url:
+        return None
+    match = _RESTFUL_URL.match(full_url)
+    return match.group(1) if match else None
+
+
+def _absolute(reference: str, base: Optional[str]) -> str:
+    # relative references resolve against the referring entry's server base
+    if base is None or "://" in reference or reference.startswith("urn:"):
+        return reference
+    return f"{base}/{reference}"
+
+
+def _bundle_index(bundle: Bundle) -> Dict[str, Any]:
+    # entries addressable by fullUrl and, when they have an id, by Type/id
+    found = {}
+    for entry in bundle.entry or ():
+        resource = entry.resource
+        if resource is None:
+            continue
+        if entry.fullUrl:
+            found[entry.fullUrl] = resource
+        if isinstance(resource, dict):
+            resource_type, resource_id = resource.get("resourceType"), resource.get("id")
+        else:
+            resource_type, resource_id = getattr(resource, "resourceType", None), getattr(resource, "id", None)
+        if resource_type and resource_id:
+            found[f"{resource_type}/{resource_id}"] = resource
+    return found
@@ -0,0 +1,791 @@
+"""FHIR REST search over an in-process store.
+
+`SearchStore` is a `store.ResourceStore` that also indexes every resource by
+the search parameters defined for its type in `PARAMETERS`:
+
+- token and reference parameters go into hash indexes (`system|code`,
+  `code`, `system|`, `Type/id`, `id`);
+- date parameters into two sorted arrays per parameter, one by the start and
+  one by the end of each value's range;
+- quantity parameters into sorted arrays of values per unit (`system|code`,
+  `code` and `unit`, plus one for any unit);
+- string parameters into a sorted array of normalised strings, so prefix
+  matches are a bisect.
+
+Sorted arrays are rebuilt lazily on the first query after a write, so bulk
+loads do not pay for re-sorting on every insert.
+
+    store = SearchStore()
+    store.insert(observation)
+    page = store.search("Observation", "subject=Patient/1&code=http://loinc.org|8867-4&date=ge2024-01-01&_sort=-date&_count=20")
+    page = store.search_url("Observation?subject=Patient/1")  # same thing
+
+Repeated parameters are ANDed, comma-separated values ORed. Supported
+result parameters: `_count`, `_offset` (paging) and `_sort` (comma-separated,
+`-` for descending). Modifiers, chaining, `_include` and `_has` are not
+supported and raise SearchError.
+"""
+
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import parse_qsl
+from pydantic import BaseModel # type: ignore
+
+import fhirpath
+from Bundle import Bundle, BundleEntry, BundleEntrySearch
+from datatypes import CodeableConcept, Coding, Identifier, Period, Reference
+from store import DEFAULT_REFERENCE_FIELDS, ResourceStore
+
+DEFAULT_COUNT = 50
+
+# token/quantity index wildcard for "any system" / "any code"
+_ANY = "*"
+
+
+class SearchError(ValueError):
+    pass
+
+
+class SearchParameter(NamedTuple):
+    name: str
+    type: str  # token | reference | date | quantity | string
+    expression: str  # FHIRPath selecting the values
+    target: Optional[str] = None  # reference parameters: only this resource type
+
+
+def _params(*specs: Tuple[str, str, str]) -> Dict[str, SearchParameter]:
+    return {spec[0]: SearchParameter(*spec) for spec in specs}
+
+
+_COMMON = (("_id", "token", "id"), ("identifier", "token", "identifier"))
+
+# The standard (FHIR R4) search parameters for the resources here, limited to
+# elements these models have.
+PARAMETERS: Dict[str, Dict[str, SearchParameter]] = {
+    "Observation": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("code", "token", "code"),
+        ("category", "token", "category"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("encounter", "reference", "encounter"),
+        ("performer", "reference", "performer"),
+        ("device", "reference", "device"),
+        ("based-on", "reference", "basedOn"),
+        ("part-of", "reference", "partOf"),
+        ("has-member", "reference", "hasMember"),
+        ("derived-from", "reference", "derivedFrom"),
+        ("specimen", "reference", "specimen"),
+        ("focus", "reference", "focus"),
+        ("date", "date", "effective"),
+        ("value-quantity", "quantity", "valueQuantity"),
+        ("value-concept", "token", "valueCodeableConcept"),
+        ("value-date", "date", "valueDateTime | valuePeriod"),
+        ("value-string", "string", "valueString"),
+        ("component-code", "token", "component.code"),
+        ("component-value-quantity", "quantity", "component.valueQuantity"),
+        ("combo-code", "token", "code | component.code"),
+        ("combo-value-quantity", "quantity", "valueQuantity | component.valueQuantity"),
+        ("data-absent-reason", "token", "dataAbsentReason"),
+        ("method", "token", "method"),
+    ),
+    "Encounter": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("class", "token", "class"),
+        ("type", "token", "type"),
+        ("service-type", "token", "serviceType"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("participant", "reference", "participant.individual"),
+        ("practitioner", "reference", "participant.individual", "Practitioner"),
+        ("participant-type", "token", "participant.type"),
+        ("episode-of-care", "reference", "episodeOfCare"),
+        ("based-on", "reference", "basedOn"),
+        ("appointment", "reference", "appointment"),
+        ("date", "date", "period"),
+        ("length", "quantity", "length"),
+        ("reason-code", "token", "reasonCode"),
+        ("reason-reference", "reference", "reasonReference"),
+        ("diagnosis", "reference", "diagnosis.condition"),
+        ("account", "reference", "account"),
+        ("location", "reference", "location.location"),
+        ("service-provider", "reference", "serviceProvider"),
+        ("part-of", "reference", "partOf"),
+        ("special-arrangement", "token", "hospitalization.specialArrangement"),
+    ),
+    "CarePlan": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("intent", "token", "intent"),
+        ("category", "token", "category"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("encounter", "reference", "encounter"),
+        ("date", "date", "period"),
+        ("care-team", "reference", "careTeam"),
+        ("goal", "reference", "goal"),
+        ("condition", "reference", "addresses"),
+        ("based-on", "reference", "basedOn"),
+        ("replaces", "reference", "replaces"),
+        ("part-of", "reference", "partOf"),
+        ("performer", "reference", "activity.detail.performer"),
+        ("activity-code", "token", "activity.detail.code"),
+        ("activity-reference", "reference", "activity.reference"),
+        ("instantiates-canonical", "reference", "instantiatesCanonical"),
+    ),
+    "CareTeam": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("category", "token", "category"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("encounter", "reference", "encounter"),
+        ("date", "date", "period"),
+        ("participant", "reference", "participant.member"),
+    ),
+    "Coverage": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("type", "token", "type"),
+        ("beneficiary", "reference", "beneficiary"),
+        ("patient", "reference", "beneficiary", "Patient"),
+        ("subscriber", "reference", "subscriber"),
+        ("policy-holder", "reference", "policyHolder"),
+        ("payor", "reference", "payor"),
+        ("dependent", "string", "dependent"),
+    ),
+    "Device": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("type", "token", "type"),
+        ("patient", "reference", "patient"),
+        ("location", "reference", "location"),
+        ("organization", "reference", "owner"),
+        ("device-name", "string", "deviceName.name"),
+        ("manufacturer", "string", "manufacturer"),
+        ("model", "string", "modelNumber"),
+    ),
+    "DeviceRequest": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("intent", "token", "intent"),
+        ("code", "token", "codeCodeableConcept"),
+        ("device", "reference", "codeReference"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("encounter", "reference", "encounter"),
+        ("requester", "reference", "requester"),
+        ("performer", "reference", "performer"),
+        ("based-on", "reference", "basedOn"),
+        ("prior-request", "reference", "priorRequest"),
+        ("group-identifier", "token", "groupIdentifier"),
+        ("insurance", "reference", "insurance"),
+        ("authored-on", "date", "authoredOn"),
+        ("event-date", "date", "occurrenceDateTime | occurrencePeriod"),
+    ),
+    "Composition": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("type", "token", "type"),
+        ("category", "token", "category"),
+        ("confidentiality", "token", "confidentiality"),
+        ("subject", "reference", "subject"),
+        ("patient", "reference", "subject", "Patient"),
+        ("encounter", "reference", "encounter"),
+        ("author", "reference", "author"),
+        ("attester", "reference", "attester.party"),
+        ("entry", "reference", "section.entry"),
+        ("section", "token", "section.code"),
+        ("date", "date", "date"),
+        ("period", "date", "event.period"),
+        ("title", "string", "title"),
+    ),
+    "AllergyIntolerance": _params(
+        *_COMMON,
+        ("clinical-status", "token", "clinicalStatus"),
+        ("verification-status", "token", "verificationStatus"),
+        ("type", "token", "type"),
+        ("category", "token", "category"),
+        ("criticality", "token", "criticality"),
+        ("code", "token", "code | reaction.substance"),
+        ("manifestation", "token", "reaction.manifestation"),
+        ("severity", "token", "reaction.severity"),
+        ("patient", "reference", "patient"),
+        ("encounter", "reference", "encounter"),
+        ("recorder", "reference", "recorder"),
+        ("asserter", "reference", "asserter"),
+        ("date", "date", "recordedDate"),
+        ("onset", "date", "reaction.onset"),
+        ("last-date", "date", "lastOccurrence"),
+    ),
+    "CoverageEligibilityRequest": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("patient", "reference", "patient"),
+        ("created", "date", "created"),
+        ("enterer", "reference", "enterer"),
+        ("provider", "reference", "provider"),
+        ("facility", "reference", "facility"),
+    ),
+    "CoverageEligibilityResponse": _params(
+        *_COMMON,
+        ("status", "token", "status"),
+        ("patient", "reference", "patient"),
+        ("created", "date", "created"),
+        ("outcome", "token", "outcome"),
+        ("request", "reference", "request"),
+        ("requestor", "reference", "requestor"),
+        ("insurer", "reference", "insurer"),
+        ("disposition", "string", "disposition"),
+    ),
+}
+
+
+def define(resource_type: str, name: str, type: str, expression: str, target: Optional[str] = None) -> None:
+    """Add (or override) a search parameter; affects resources indexed afterwards."""
+    if type not in _EXTRACTORS:
+        raise SearchError(f"unknown search parameter type {type!r}")
+    fhirpath.compile(expression)
+    PARAMETERS.setdefault(resource_type, {})[name] = SearchParameter(name, type, expression, target)
+
+
+# ---------------------------------------------------------------------------
+# Values: resource elements -> index keys
+
+
+def _token_keys(value) -> List[Tuple[Optional[str], Optional[str]]]:
+    # (system, code) pairs for a token element
+    if isinstance(value, CodeableConcept):
+        return [pair for coding in value.coding or () for pair in _token_keys(coding)]
+    if isinstance(value, Coding):
+        return [(value.system, value.code)] if value.code else []
+    if isinstance(value, Identifier):
+        return [(value.system, value.value)] if value.value else []
+    if isinstance(value, bool):
+        return [(None, "true" if value else "false")]
+    if isinstance(value, Enum):
+        return [(None, str(value.value))]
+    if isinstance(value, (str, int)):
+        return [(None, str(value))]
+    return []
+
+
+def _reference_key(value) -> Optional[str]:
+    reference = value.reference if isinstance(value, Reference) else value if isinstance(value, str) else None
+    if not reference or reference.startswith("#"):
+        return None
+    # absolute URLs are indexed by their trailing Type/id
+    parts = reference.rstrip("/").split("/")
+    if len(parts) >= 2 and parts[-2][:1].isupper():
+        return f"{parts[-2]}/{parts[-1]}"
+    return reference
+
+
+_MIN = datetime.min.replace(tzinfo=timezone.utc)
+_MAX = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _date_range(value) -> Optional[Tuple[datetime, datetime]]:
+    # closed [low, high] range a date element covers
+    if isinstance(value, datetime):
+        value = _utc(value)
+        return value, value
+    if isinstance(value, date):
+        low = datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+        return low, low + timedelta(days=1) - timedelta(microseconds=1)
+    if isinstance(value, Period):
+        start = _date_range(value.start) if value.start is not None else None
+        end = _date_range(value.end) if value.end is not None else None
+        if start is None and end is None:
+            return None
+        return (start[0] if start else _MIN), (end[1] if end else _MAX)
+    return None
+
+
+def _quantity(value) -> Optional[Tuple[float, Optional[str], Optional[str], Optional[str]]]:
+    # (value, system, code, unit) of any Quantity-like element
+    number = getattr(value, "value", None)
+    if isinstance(value, BaseModel) and isinstance(number, (int, float)) and not isinstance(number, bool):
+        return float(number), getattr(value, "system", None), getattr(value, "code", None), getattr(value, "unit", None)
+    return None
+
+
+def _normalize_text(value: str) -> str:
+    # FHIR string search ignores case and accents
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _extract_tokens(values):
+    return [pair for value in values for pair in _token_keys(value)]
+
+
+def _extract_references(values):
+    return [key for key in map(_reference_key, values) if key is not None]
+
+
+def _extract_dates(values):
+    return [r for r in map(_date_range, values) if r is not None]
+
+
+def _extract_quantities(values):
+    return [q for q in map(_quantity, values) if q is not None]
+
+
+def _extract_strings(values):
+    return [_normalize_text(v) for v in values if isinstance(v, str)]
+
+
+_EXTRACTORS = {
+    "token": _extract_tokens,
+    "reference": _extract_references,
+    "date": _extract_dates,
+    "quantity": _extract_quantities,
+    "string": _extract_strings,
+}
+
+
+# ---------------------------------------------------------------------------
+# Sorted index
+
+
+class _SortedIndex:
+    """(value, key) pairs kept in a lazily rebuilt sorted array for range queries."""
+
+    def __init__(self):
+        self._entries: Dict[str, List[Any]] = {}
+        self._values: List[Any] = []
+        self._keys: List[str] = []
+        self._dirty = False
+
+    def add(self, key: str, value: Any) -> None:
+        self._entries.setdefault(key, []).append(value)
+        self._dirty = True
+
+    def remove(self, key: str) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._dirty = True
+
+    def _build(self) -> None:
+        pairs = sorted((v, k) for k, values in self._entries.items() for v in values)
+        self._values = [v for v, _ in pairs]
+        self._keys = [k for _, k in pairs]
+        self._dirty = False
+
+    def range(self, low=None, high=None, low_inclusive: bool = True, high_inclusive: bool = True) -> Set[str]:
+        """Keys with a value in the range; None leaves that side open."""
+        if self._dirty:
+            self._build()
+        values = self._values
+        if low is None:
+            start = 0
+        else:
+            start = (bisect.bisect_left if low_inclusive else bisect.bisect_right)(values, low)
+        if high is None:
+            end = len(values)
+        else:
+            end = (bisect.bisect_right if high_inclusive else bisect.bisect_left)(values, high)
+        return set(self._keys[start:end])
+
+    def prefix(self, text: str) -> Set[str]:
+        if self._dirty:
+            self._build()
+        start = bisect.bisect_left(self._values, text)
+        end = bisect.bisect_left(self._values, text + "\U0010ffff")
+        return set(self._keys[start:end])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def walk(self, keys: Set[str], reverse: bool = False, limit: Optional[int] = None) -> List[str]:
+        """`keys` in value order (a key placed by its smallest value, or largest if reversed)."""
+        if self._dirty:
+            self._build()
+        found: List[str] = []
+        seen: Set[str] = set()
+        for key in (reversed(self._keys) if reverse else self._keys):
+            if key in keys and key not in seen:
+                seen.add(key)
+                found.append(key)
+                if len(found) == limit:
+                    break
+        return found
+
+    def first(self, key: str):
+        values = self._entries.get(key)
+        return min(values) if values else None
+
+    def last(self, key: str):
+        values = self._entries.get(key)
+        return max(values) if values else None
+
+
+# the sorted index `_sort` reads for each parameter type
+_SORT_INDEX = {"date": "low", "quantity": (_ANY, _ANY), "string": "text"}
+
+
+# ---------------------------------------------------------------------------
+# Query values
+
+
+_PREFIXES = ("eq", "ne", "gt", "lt", "ge", "le", "sa", "eb", "ap")
+
+
+def _split_prefix(value: str) -> Tuple[str, str]:
+    if value[:2] in _PREFIXES and len(value) > 2 and (value[2].isdigit() or value[2] in "-+."):
+        return value[:2], value[2:]
+    return "eq", value
+
+
+# hh[:mm[:ss[.fff]]][Z|+hh:mm]; the width of the range follows the precision
+_CLOCK = re.compile(r"(\d{2})(?::(\d{2})(?::(\d{2})(\.\d+)?)?)?(Z|[+-]\d{2}:\d{2})?")
+_HOUR, _MINUTE, _SECOND = timedelta(hours=1), timedelta(minutes=1), timedelta(seconds=1)
+
+
+def _parse_date_param(text: str) -> Tuple[datetime, datetime]:
+    # the range the given precision covers: 2024 -> the whole year
+    try:
+        if "T" in text:
+            day, clock = text.split("T", 1)
+            match = _CLOCK.fullmatch(clock)
+            if match is None:
+                raise ValueError(text)
+            hour, minute, second, fraction, zone = match.groups()
+            iso = f"{day}T{hour}:{minute or '00'}:{second or '00'}{fraction or ''}"
+            value = _utc(datetime.fromisoformat(iso + (zone or "").replace("Z", "+00:00")))
+            if fraction:
+                return value, value
+            width = _SECOND if second else _MINUTE if minute else _HOUR
+            return value, value + width - timedelta(microseconds=1)
+        parts = [int(p) for p in text.split("-")]
+    except ValueError:
+        raise SearchError(f"invalid date {text!r}") from None
+    if len(parts) == 1:
+        low, high = datetime(parts[0], 1, 1), datetime(parts[0] + 1, 1, 1)
+    elif len(parts) == 2:
+        low = datetime(parts[0], parts[1], 1)
+        high = datetime(parts[0] + parts[1] // 12, parts[1] % 12 + 1, 1)
+    elif len(parts) == 3:
+        low = datetime(parts[0], parts[1], parts[2])
+        high = low + timedelta(days=1)
+    else:
+        raise SearchError(f"invalid date {text!r}")
+    return low.replace(tzinfo=timezone.utc), high.replace(tzinfo=timezone.utc) - timedelta(microseconds=1)
+
+
+def _parse_token_param(text: str) -> Tuple[str, str]:
+    # index key for system|code, |code, system| and code
+    if "|" not in text:
+        return _ANY, text
+    system, code = text.split("|", 1)
+    if not code:
+        return system, _ANY
+    return (system or None), code
+
+
+def _parse_quantity_param(text: str) -> Tuple[str, float, Tuple[str, str]]:
+    prefix, rest = _split_prefix(text)
+    number, _, units = rest.partition("|")
+    try:
+        value = float(number)
+    except ValueError:
+        raise SearchError(f"invalid quantity {text!r}") from None
+    if not units:
+        unit_key = (_ANY, _ANY)
+    else:
+        system, _, code = units.partition("|")
+        if not code:
+            raise SearchError(f"invalid quantity {text!r}: expected number|system|code")
+        unit_key = ((system or _ANY), code)
+    return prefix, value, unit_key
+
+
+def _number_precision(text: str) -> float:
+    # 5.4 stands for [5.35, 5.45)
+    _, _, decimals = text.partition(".")
+    return 0.5 * 10 ** -len(decimals)
+
+
+# ---------------------------------------------------------------------------
+# Store
+
+
+@dataclass
+class SearchResult:
+    total: int
+    resources: List[BaseModel]
+    offset: int
+    count: int
+
+    @property
+    def next_offset(self) -> Optional[int]:
+        if self.count == 0:
+            # _count=0 asks for the total only; there is no next page
+            return None
+        end = self.offset + self.count
+        return end if end < self.total else None
+
+    def bundle(self) -> Bundle:
+        """The page as a searchset Bundle."""
+        return Bundle(
+            type="searchset",
+            total=self.total,
+            entry=[BundleEntry(resource=r, search=BundleEntrySearch(mode="match")) for r in self.resources],
+        )
+
+
+class SearchStore(ResourceStore):
+    """ResourceStore with FHIR search-parameter indexes (see the module docstring)."""
+
+    def __init__(self, reference_fields: Iterable[str] = DEFAULT_REFERENCE_FIELDS,
+                 parameters: Optional[Dict[str, Dict[str, SearchParameter]]] = None):
+        self.parameters = PARAMETERS if parameters is None else parameters
+        # (resourceType, param, system, code) / (resourceType, param, reference) -> keys
+        self._by_token: Dict[tuple, Set[str]] = defaultdict(set)
+        self._by_param_reference: Dict[tuple, Set[str]] = defaultdict(set)
+        # (resourceType, param[, unit key], "low"/"high") -> sorted index
+        self._sorted: Dict[tuple, _SortedIndex] = defaultdict(_SortedIndex)
+        self._sorted_postings: Dict[str, List[_SortedIndex]] = {}
+        super().__init__(reference_fields)
+
+    # -- indexing ----------------------------------------------------------
+
+    def _index(self, key: str, resource: BaseModel) -> None:
+        super()._index(key, resource)
+        postings = self._postings[key]
+        sorted_postings = self._sorted_postings[key] = []
+        resource_type = resource.resourceType
+        for param in self.parameters.get(resource_type, {}).values():
+            values = _EXTRACTORS[param.type](fhirpath.compile(param.expression)(resource))
+            if not values:
+                continue
+            name = param.name
+            if param.type == "token":
+                for system, code in values:
+                    self._post(postings, self._by_token, (resource_type, name, system, code), key)
+                    self._post(postings, self._by_token, (resource_type, name, _ANY, code), key)
+                    if system is not None:
+                        self._post(postings, self._by_token, (resource_type, name, system, _ANY), key)
+            elif param.type == "reference":
+                for reference in values:
+                    if param.target is not None and not reference.startswith(param.target + "/"):
+                        continue
+                    self._post(postings, self._by_param_reference, (resource_type, name, reference), key)
+                    self._post(postings, self._by_param_reference, (resource_type, name, reference.rsplit("/", 1)[-1]), key)
+            elif param.type == "date":
+                low_index = self._sorted[(resource_type, name, "low")]
+                high_index = self._sorted[(resource_type, name, "high")]
+                for low, high in values:
+                    low_index.add(key, low)
+                    high_index.add(key, high)
+                sorted_postings += [low_index, high_index]
+            elif param.type == "quantity":
+                for number, system, code, unit in values:
+                    units = {(_ANY, _ANY)}
+                    if code:
+                        units.update({(system or _ANY, code), (_ANY, code)})
+                    if unit:
+                        units.add((_ANY, unit))
+                    for unit_key in units:
+                        index = self._sorted[(resource_type, name, unit_key)]
+                        index.add(key, number)
+                        sorted_postings.append(index)
+            else:  # string
+                index = self._sorted[(resource_type, name, "text")]
+                for text in values:
+                    index.add(key, text)
+                sorted_postings.append(index)
+
+    def _unindex(self, key: str) -> None:
+        for index in self._sorted_postings.pop(key, ()):
+            index.remove(key)
+        super()._unindex(key)
+
+    # -- search ------------------------------------------------------------
+
+    def search_url(self, url: str) -> SearchResult:
+        """`search` for a relative FHIR search URL such as `Observation?code=8867-4`."""
+        resource_type, _, query = url.lstrip("/").partition("?")
+        return self.search(resource_type, query)
+
+    def search(self, resource_type: str, query: Union[str, Dict[str, str], Sequence[Tuple[str, str]]] = ()) -> SearchResult:
+        if isinstance(query, str):
+            pairs = parse_qsl(query, keep_blank_values=True)
+        elif isinstance(query, dict):
+            pairs = list(query.items())
+        else:
+            pairs = list(query)
+
+        count, offset, sort = DEFAULT_COUNT, 0, []
+        clauses = []
+        parameters = self.parameters.get(resource_type, {})
+        for name, value in pairs:
+            if name == "_count":
+                count = self._int_param(name, value)
+            elif name == "_offset":
+                offset = self._int_param(name, value)
+            elif name == "_sort":
+                sort += [s for s in value.split(",") if s]
+            elif ":" in name or "." in name:
+                raise SearchError(f"modifiers and chained parameters are not supported: {name!r}")
+            elif name not in parameters:
+                raise SearchError(f"unknown search parameter {name!r} for {resource_type}")
+            else:
+                clauses.append(self._match(resource_type, parameters[name], value))
+
+        # intersect from the smallest candidate set; parameter postings never
+        # leave the resource type, so `_by_type` only matters without clauses
+        clauses.sort(key=len)
+        keys = clauses[0] if clauses else self._by_type.get(resource_type, set())
+        for matched in clauses[1:]:
+            keys &= matched
+            if not keys:
+                break
+
+        page = self._ordered(resource_type, parameters, sort, keys, offset + count)[offset:offset + count]
+        return SearchResult(
+            total=len(keys), resources=[self._resources[k] for k in page], offset=offset, count=count
+        )
+
+    @staticmethod
+    def _int_param(name: str, value: str) -> int:
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise SearchError(f"{name} must be a non-negative integer, got {value!r}")
+        return number
+
+    def _match(self, resource_type: str, param: SearchParameter, value: str) -> Set[str]:
+        # keys matching any of the comma-separated values
+        matched: Set[str] = set()
+        for item in value.split(","):
+            if item == "":
+                continue
+            if param.type == "token":
+                system, code = _parse_token_param(item)
+                matched |= self._by_token.get((resource_type, param.name, system, code), set())
+            elif param.type == "reference":
+                reference = item if "/" in item or param.target is None else f"{param.target}/{item}"
+                matched |= self._by_param_reference.get(
+                    (resource_type, param.name, _reference_key(reference) or reference), set()
+                )
+            elif param.type == "date":
+                matched |= self._match_date(resource_type, param.name, item)
+            elif param.type == "quantity":
+                matched |= self._match_quantity(resource_type, param.name, item)
+            else:
+                matched |= self._sorted[(resource_type, param.name, "text")].prefix(_normalize_text(item))
+        return matched
+
+    def _match_date(self, resource_type: str, name: str, item: str) -> Set[str]:
+        prefix, text = _split_prefix(item)
+        low, high = _parse_date_param(text)
+        lows = self._sorted[(resource_type, name, "low")]
+        highs = self._sorted[(resource_type, name, "high")]
+        if prefix in ("eq", "ne"):
+            # the value's whole range lies within the parameter's range
+            inside = lows.range(low, high) & highs.range(low, high)
+            if prefix == "eq":
+                return inside
+            return lows.range() - inside
+        if prefix == "gt":
+            return highs.range(high, None, low_inclusive=False)
+        if prefix == "ge":
+            return highs.range(low, None)
+        if prefix == "lt":
+            return lows.range(None, low, high_inclusive=False)
+        if prefix == "le":
+            return lows.range(None, high)
+        if prefix == "sa":
+            return lows.range(high, None, low_inclusive=False)
+        if prefix == "eb":
+            return highs.range(None, low, high_inclusive=False)
+        # ap: overlaps the parameter's range widened by 10% of its distance from now
+        margin = abs(datetime.now(timezone.utc) - low) * 0.1
+        return lows.range(None, high + margin) & highs.range(low - margin, None)
+
+    def _match_quantity(self, resource_type: str, name: str, item: str) -> Set[str]:
+        prefix, number, unit_key = _parse_quantity_param(item)
+        index = self._sorted.get((resource_type, name, unit_key))
+        if index is None:
+            return set()
+        text = _split_prefix(item)[1].partition("|")[0]
+        if prefix in ("eq", "ne"):
+            half = _number_precision(text)
+            matched = index.range(number - half, number + half, high_inclusive=False)
+            return matched if prefix == "eq" else index.range() - matched
+        if prefix in ("gt", "sa"):
+            return index.range(number, None, low_inclusive=False)
+        if prefix == "ge":
+            return index.range(number, None)
+        if prefix in ("lt", "eb"):
+            return index.range(None, number, high_inclusive=False)
+        if prefix == "le":
+            return index.range(None, number)
+        margin = abs(number) * 0.1  # ap
+        return index.range(number - margin, number + margin)
+
+    def _ordered(self, resource_type: str, parameters: Dict[str, SearchParameter],
+                 sort: List[str], keys: Set[str], limit: int) -> List[str]:
+        # keys in result order; only the first `limit` are guaranteed to be there
+        if len(sort) == 1:
+            index = self._sort_index(resource_type, parameters, sort[0])
+            # a page of a large result: walk the sorted array until the page is full
+            if index is not None and len(keys) * 8 > len(index):
+                walked = index.walk(keys, reverse=sort[0].startswith("-"), limit=limit)
+                if len(walked) < limit:
+                    seen = set(walked)
+                    walked += sorted((k for k in keys if k not in seen), key=self._order.__getitem__)
+                return walked
+        ordered = sorted(keys, key=self._order.__getitem__)
+        for spec in reversed(sort):
+            ordered = self._sorted_by(resource_type, parameters, spec, ordered)
+        return ordered
+
+    def _sort_index(self, resource_type: str, parameters: Dict[str, SearchParameter],
+                    spec: str) -> Optional[_SortedIndex]:
+        name = spec.lstrip("-")
+        param = parameters.get(name)
+        if param is None:
+            raise SearchError(f"unknown sort parameter {name!r} for {resource_type}")
+        if param.type not in _SORT_INDEX:
+            return None
+        return self._sorted[(resource_type, name, _SORT_INDEX[param.type])]
+
+    def _sorted_by(self, resource_type: str, parameters: Dict[str, SearchParameter],
+                   spec: str, keys: List[str]) -> List[str]:
+        descending = spec.startswith("-")
+        index = self._sort_index(resource_type, parameters, spec)
+        param = parameters[spec.lstrip("-")]
+        if index is not None:
+            # ascending sorts by the smallest value, descending by the largest
+            value_of = index.last if descending else index.first
+        else:
+            expression = fhirpath.compile(param.expression)
+            extract = _EXTRACTORS[param.type]
+
+            def value_of(key):
+                values = [str(v[1]) if isinstance(v, tuple) else v for v in extract(expression(self._resources[key]))]
+                return (max if descending else min)(values) if values else None
+
+        present, missing = [], []
+        for key in keys:
+            value = value_of(key)
+            (missing if value is None else present).append((value, key))
+        present.sort(key=lambda pair: pair[0], reverse=descending)
+        # resources without a value come last either way
+        return [k for _, k in present] + [k for _, k in missing]
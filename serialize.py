@@ -0,0 +1,122 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Tuple
+from pydantic import AnyUrl, BaseModel # type: ignore
+
+import compat
+from lazy import LazyResource
+
+# orjson is optional; without it the stdlib json module is used
+try:
+    import orjson # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# FHIR JSON straight from the model tree: None and empty lists are dropped,
+# fields are written under their alias (class_ -> class) and dates/datetimes
+# use ISO 8601 as FHIR expects. Nested models are converted one level at a
+# time from the encoder's `default` hook, so no intermediate dict tree of the
+# whole resource is built.
+
+# model class -> [(field name, JSON key)]
+_keys: Dict[type, List[Tuple[str, str]]] = {}
+
+
+def field_keys(model: type) -> List[Tuple[str, str]]:
+    """(field name, JSON key) of every field of `model`, in declaration order."""
+    keys = _keys.get(model)
+    if keys is None:
+        keys = _keys[model] = [(spec.name, spec.alias) for spec in compat.field_specs(model)]
+    return keys
+
+
+def _shallow(model: BaseModel) -> dict:
+    values = model.__dict__
+    out = {}
+    for name, key in _keys.get(type(model)) or field_keys(type(model)):
+        value = values[name]
+        if value is None or (value.__class__ is list and not value):
+            continue
+        out[key] = value
+    return out
+
+
+def _decimal(value: Decimal):
+    if not value.is_finite():
+        raise TypeError(f"cannot serialize {value} as a FHIR decimal")
+    # orjson >= 3.9 can write the digits as they are ("1.50"); else a float
+    if orjson is not None and hasattr(orjson, "Fragment"):
+        return orjson.Fragment(str(value).encode("ascii"))
+    return float(value)
+
+
+def _orjson_default(value):
+    if isinstance(value, BaseModel):
+        return _shallow(value)
+    if isinstance(value, LazyResource):
+        return _shallow(value.materialize())
+    if isinstance(value, Decimal):
+        return _decimal(value)
+    # pydantic 2 URL types are not str subclasses
+    if isinstance(value, AnyUrl):
+        return str(value)
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _json_default(value):
+    if isinstance(value, BaseModel):
+        return _shallow(value)
+    if isinstance(value, LazyResource):
+        return _shallow(value.materialize())
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise TypeError(f"cannot serialize {value} as a FHIR decimal")
+        return float(value)
+    if isinstance(value, AnyUrl):
+        return str(value)
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+def _dumps_orjson(resource: Any) -> bytes:
+    try:
+        return orjson.dumps(resource, default=_orjson_default)
+    except orjson.JSONEncodeError as exc:
+        # orjson replaces the default hook's message with a generic one
+        if isinstance(exc.__cause__, TypeError):
+            raise exc.__cause__ from None
+        raise
+
+
+def _dumps_json(resource: Any) -> bytes:
+    return json.dumps(resource, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+BACKENDS: Dict[str, Callable[[Any], bytes]] = {"json": _dumps_json}
+if orjson is not None:
+    BACKENDS["orjson"] = _dumps_orjson
+
+DEFAULT_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def register_backend(name: str, dumps: Callable[[Any], bytes]) -> None:
+    BACKENDS[name] = dumps
+
+
+def dumps(resource: Any, backend: str = DEFAULT_BACKEND) -> bytes:
+    """Serialize any resource model (or list/dict of them) to FHIR JSON bytes."""
+    try:
+        encode = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown serializer backend {backend!r}, expected one of {sorted(BACKENDS)}") from None
+    return encode(resource)
+
+
+def to_fhir_dict(resource: BaseModel) -> dict:
+    """FHIR JSON-compatible dict of `resource` (what `dumps` writes)."""
+    return json.loads(dumps(resource))
@@ -0,0 +1,164 @@
+import itertools
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from pydantic import BaseModel # type: ignore
+
+from datatypes import Coding, Identifier, Reference
+from walk import iter_elements
+
+# Reference fields indexed by default. subject/patient/beneficiary cover the
+# "whose data is this" question for every resource here; partOf and encounter
+# answer "Encounters whose partOf is X" and "CareTeams for this Encounter".
+DEFAULT_REFERENCE_FIELDS = ("subject", "patient", "beneficiary", "partOf", "encounter")
+
+
+class ResourceStore:
+    """In-memory store of resource models with hash indexes.
+
+    Resources are indexed by resourceType, by the references in
+    `reference_fields`, by every Coding (`system|code`) anywhere in the
+    resource and by `identifier.system|value`. Indexes are updated on
+    insert/replace/delete, so every lookup is a dict access. Lookups return
+    resources in the order they were stored (a replaced resource moves to
+    the end).
+    """
+
+    def __init__(self, reference_fields: Iterable[str] = DEFAULT_REFERENCE_FIELDS):
+        self.reference_fields = tuple(reference_fields)
+        self._resources: Dict[str, BaseModel] = {}
+        # key -> postings added for it, so delete does not need to rescan
+        self._postings: Dict[str, List[Tuple[dict, object]]] = {}
+        self._by_type: Dict[str, Set[str]] = defaultdict(set)
+        self._by_reference: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        self._by_code: Dict[Tuple[Optional[str], str], Set[str]] = defaultdict(set)
+        self._by_identifier: Dict[Tuple[Optional[str], str], Set[str]] = defaultdict(set)
+        self._ids = itertools.count(1)
+        # key -> insertion sequence, to return lookups in a stable order
+        self._order: Dict[str, int] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._resources
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        return iter(self._resources.values())
+
+    def get(self, key: str) -> Optional[BaseModel]:
+        return self._resources.get(key)
+
+    def items(self):
+        return self._resources.items()
+
+    # -- writes ------------------------------------------------------------
+
+    def insert(self, resource: BaseModel, key: Optional[str] = None) -> str:
+        """Add `resource` and return its key (`Type/id`, generated if the resource has no id)."""
+        if key is None:
+            key = self._key_for(resource)
+        if key in self._resources:
+            raise KeyError(f"{key} is already stored; use replace()")
+        self._resources[key] = resource
+        self._index(key, resource)
+        return key
+
+    def replace(self, key: str, resource: BaseModel) -> None:
+        if key not in self._resources:
+            raise KeyError(key)
+        self._unindex(key)
+        self._resources[key] = resource
+        self._index(key, resource)
+
+    def upsert(self, resource: BaseModel, key: Optional[str] = None) -> str:
+        if key is None:
+            key = self._key_for(resource)
+        if key in self._resources:
+            self.replace(key, resource)
+            return key
+        return self.insert(resource, key)
+
+    def delete(self, key: str) -> BaseModel:
+        resource = self._resources.pop(key)
+        self._unindex(key)
+        return resource
+
+    # -- lookups -----------------------------------------------------------
+
+    def by_type(self, resource_type: str) -> List[BaseModel]:
+        return self._fetch(self._by_type.get(resource_type), None)
+
+    def by_reference(
+        self, reference: str, field: str = "subject", resource_type: Optional[str] = None
+    ) -> List[BaseModel]:
+        # e.g. by_reference("Patient/123", "subject", "Observation")
+        return self._fetch(self._by_reference.get((field, reference)), resource_type)
+
+    def by_code(
+        self, code: str, system: Optional[str] = None, resource_type: Optional[str] = None
+    ) -> List[BaseModel]:
+        # system=None matches the code in any system
+        return self._fetch(self._by_code.get((system, code)), resource_type)
+
+    def by_identifier(
+        self, value: str, system: Optional[str] = None, resource_type: Optional[str] = None
+    ) -> List[BaseModel]:
+        return self._fetch(self._by_identifier.get((system, value)), resource_type)
+
+    def keys_by_reference(self, reference: str, field: str = "subject") -> Set[str]:
+        return set(self._by_reference.get((field, reference), ()))
+
+    # -- internals ---------------------------------------------------------
+
+    def _key_for(self, resource: BaseModel) -> str:
+        resource_id = getattr(resource, "id", None)
+        if resource_id is None:
+            resource_id = str(next(self._ids))
+            while f"{resource.resourceType}/{resource_id}" in self._resources:
+                resource_id = str(next(self._ids))
+        return f"{resource.resourceType}/{resource_id}"
+
+    def _fetch(self, keys: Optional[Set[str]], resource_type: Optional[str]) -> List[BaseModel]:
+        if not keys:
+            return []
+        if resource_type is not None:
+            keys = keys & self._by_type.get(resource_type, set())
+        return [self._resources[k] for k in sorted(keys, key=self._order.__getitem__)]
+
+    def _post(self, postings: list, index: dict, value, key: str) -> None:
+        index[value].add(key)
+        postings.append((index, value))
+
+    def _index(self, key: str, resource: BaseModel) -> None:
+        postings = self._postings[key] = []
+        self._order[key] = next(self._sequence)
+        self._post(postings, self._by_type, resource.resourceType, key)
+
+        for field in self.reference_fields:
+            value = getattr(resource, field, None)
+            for ref in value if isinstance(value, list) else (value,):
+                if isinstance(ref, Reference) and ref.reference:
+                    self._post(postings, self._by_reference, (field, ref.reference), key)
+
+        for _, coding in iter_elements(resource, Coding):
+            if coding.code:
+                self._post(postings, self._by_code, (coding.system, coding.code), key)
+                if coding.system is not None:
+                    self._post(postings, self._by_code, (None, coding.code), key)
+
+        identifiers = getattr(resource, "identifier", None)
+        for identifier in identifiers if isinstance(identifiers, list) else (identifiers,):
+            if isinstance(identifier, Identifier) and identifier.value:
+                self._post(postings, self._by_identifier, (identifier.system, identifier.value), key)
+                if identifier.system is not None:
+                    self._post(postings, self._by_identifier, (None, identifier.value), key)
+
+    def _unindex(self, key: str) -> None:
+        self._order.pop(key, None)
+        for index, value in self._postings.pop(key, ()):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
@@ -0,0 +1,427 @@
+"""ValueSet membership checks for bound code fields.
+
+    terms = Terminology()  # FHIR's required value sets for the models here
+    terms.load("vital-signs.json")  # ValueSet, CodeSystem or a Bundle of them
+    terms.load_csv("allergens.tsv", "http://example.org/ValueSet/allergens",
+                   system="http://snomed.info/sct", code_column="referencedComponentId")
+    ("http://loinc.org", "8867-4") in terms.expand("http://example.org/ValueSet/vitals")
+
+    bind(Observation, "code", "http://example.org/ValueSet/vitals")
+    enable(terms)  # validation now rejects codes outside their required value set
+
+A ValueSet is expanded once, on first use, into an `Expansion` holding
+frozensets of `(system, code)` pairs and of bare codes, so a membership check
+is a single hash lookup; expansions are cached until a value set or code
+system is (re)loaded. `compose.include` / `exclude` with listed concepts,
+whole code systems (when the CodeSystem is loaded) and other value sets are
+expanded here; pre-expanded ValueSets (`expansion.contains`) are used as they
+are. Filters need a terminology server, so they raise TerminologyError --
+load the server's expansion instead.
+
+`BINDINGS` maps model fields to value sets: the code fields whose allowed
+values the models only list in comments (`Encounter.status`,
+`Reaction.severity`, `AllergyIntolerance.criticality`, ...) start out bound to
+FHIR's own value sets, and `bind()` adds more. `check(resource)` lists the
+values outside their value set; `enable()` installs a hook on
+`compat.validation_hooks`, so `compat.validate`, `registry.parse`, the
+decoders and everything built on them raise TerminologyError (a ValueError)
+for required bindings. Instances built without validation (`trusted`,
+`hl7v2`, `Model.construct`) are not checked unless you call `check`; lazy
+resources are checked once their last field is read or they materialize.
+"""
+
+import csv
+import json
+import os
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Type, Union, get_args
+from pydantic import BaseModel # type: ignore
+
+import compat
+from datatypes import CodeableConcept, Coding
+
+_FHIR = "http://hl7.org/fhir"
+_THO = "http://terminology.hl7.org/CodeSystem"
+
+
+class TerminologyError(ValueError):
+    def __init__(self, message: str, issues: Optional[List["Issue"]] = None):
+        super().__init__(message)
+        self.issues = issues or []
+
+
+class Binding(NamedTuple):
+    value_set: str  # canonical URL
+    strength: str = "required"  # required | extensible | preferred | example
+
+
+class Issue(NamedTuple):
+    path: str  # e.g. "Encounter.statusHistory[1].status"
+    value: Any  # the code, Coding or CodeableConcept
+    value_set: str
+    strength: str
+
+
+# FHIR R4 value sets for code fields of the models here: name -> (code system, codes)
+FHIR_VALUE_SETS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "encounter-status": (f"{_FHIR}/encounter-status", (
+        "planned", "arrived", "triaged", "in-progress", "onleave", "finished", "cancelled",
+        "entered-in-error", "unknown")),
+    "encounter-location-status": (f"{_FHIR}/encounter-location-status", (
+        "planned", "active", "reserved", "completed")),
+    "observation-status": (f"{_FHIR}/observation-status", (
+        "registered", "preliminary", "final", "amended", "corrected", "cancelled", "entered-in-error",
+        "unknown")),
+    "allergy-intolerance-type": (f"{_FHIR}/allergy-intolerance-type", ("allergy", "intolerance")),
+    "allergy-intolerance-category": (f"{_FHIR}/allergy-intolerance-category", (
+        "food", "medication", "environment", "biologic")),
+    "allergy-intolerance-criticality": (f"{_FHIR}/allergy-intolerance-criticality", (
+        "low", "high", "unable-to-assess")),
+    "allergyintolerance-clinical": (f"{_THO}/allergyintolerance-clinical", ("active", "inactive", "resolved")),
+    "allergyintolerance-verification": (f"{_THO}/allergyintolerance-verification", (
+        "unconfirmed", "confirmed", "refuted", "entered-in-error")),
+    "reaction-event-severity": (f"{_FHIR}/reaction-event-severity", ("mild", "moderate", "severe")),
+    "composition-status": (f"{_FHIR}/composition-status", (
+        "preliminary", "final", "amended", "entered-in-error")),
+    "care-team-status": (f"{_FHIR}/care-team-status", (
+        "proposed", "active", "suspended", "inactive", "entered-in-error")),
+}
+
+
+def _vs(name: str) -> Binding:
+    return Binding(f"{_FHIR}/ValueSet/{name}")
+
+
+# (module, model class, field name) -> binding
+BINDINGS: Dict[Tuple[str, str, str], Binding] = {
+    ("encounter", "Encounter", "status"): _vs("encounter-status"),
+    ("encounter", "EncounterStatusHistory", "status"): _vs("encounter-status"),
+    ("encounter", "EncounterLocation", "status"): _vs("encounter-location-status"),
+    ("observation", "Observation", "status"): _vs("observation-status"),
+    ("Allergy_intolerance", "AllergyIntolerance", "type"): _vs("allergy-intolerance-type"),
+    ("Allergy_intolerance", "AllergyIntolerance", "category"): _vs("allergy-intolerance-category"),
+    ("Allergy_intolerance", "AllergyIntolerance", "criticality"): _vs("allergy-intolerance-criticality"),
+    ("Allergy_intolerance", "AllergyIntolerance", "clinicalStatus"): _vs("allergyintolerance-clinical"),
+    ("Allergy_intolerance", "AllergyIntolerance", "verificationStatus"): _vs("allergyintolerance-verification"),
+    ("Allergy_intolerance", "Reaction", "severity"): _vs("reaction-event-severity"),
+    ("Composition", "Composition", "status"): _vs("composition-status"),
+    ("CareTeam", "CareTeam", "status"): _vs("care-team-status"),
+}
+
+
+def bind(model: Type[BaseModel], field: str, value_set: str, strength: str = "required") -> None:
+    """Bind `model.field` (a code, Coding or CodeableConcept field, or a list of them) to `value_set`."""
+    if field not in {spec.name for spec in compat.field_specs(model)}:
+        raise TerminologyError(f"{model.__name__} has no field {field!r}")
+    BINDINGS[(model.__module__, model.__name__, field)] = Binding(value_set, strength)
+    _plans.clear()
+
+
+class Expansion:
+    """The codes of an expanded ValueSet, as frozensets."""
+
+    __slots__ = ("url", "codes", "bare")
+
+    def __init__(self, url: str, codes: Iterable[Tuple[str, str]]):
+        self.url = url
+        self.codes: FrozenSet[Tuple[str, str]] = frozenset(codes)
+        # for plain code fields, which carry no system
+        self.bare: FrozenSet[str] = frozenset(code for _, code in self.codes)
+
+    def __repr__(self) -> str:
+        return f"Expansion({self.url!r}, {len(self.codes)} codes)"
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __contains__(self, value) -> bool:
+        """A code, (system, code), Coding, or CodeableConcept with at least one member coding."""
+        if value.__class__ is str:
+            return value in self.bare
+        if isinstance(value, tuple):
+            return value in self.codes
+        if isinstance(value, Coding):
+            system = value.system
+            return (system, value.code) in self.codes if system else value.code in self.bare
+        if isinstance(value, CodeableConcept):
+            return any(coding in self for coding in value.coding or ())
+        return False
+
+
+class Terminology:
+    """ValueSets and CodeSystems by canonical URL, with cached expansions."""
+
+    def __init__(self, fhir_value_sets: bool = True):
+        self._value_sets: Dict[str, dict] = {}
+        self._code_systems: Dict[str, FrozenSet[str]] = {}
+        self._expansions: Dict[str, Expansion] = {}
+        if fhir_value_sets:
+            for name, (system, codes) in FHIR_VALUE_SETS.items():
+                self.add(_value_set(f"{_FHIR}/ValueSet/{name}", {system: codes}))
+
+    def __contains__(self, url: str) -> bool:
+        return _unversioned(url) in self._value_sets
+
+    def value_sets(self) -> List[str]:
+        return sorted(self._value_sets)
+
+    def add(self, resource: dict) -> str:
+        """Add a ValueSet or CodeSystem resource (JSON dict); returns its URL."""
+        resource_type = resource.get("resourceType")
+        url = resource.get("url")
+        if not url:
+            raise TerminologyError(f"{resource_type} has no url")
+        if resource_type == "ValueSet":
+            self._value_sets[url] = resource
+        elif resource_type == "CodeSystem":
+            self._code_systems[url] = frozenset(_concept_codes(resource.get("concept") or ()))
+        else:
+            raise TerminologyError(f"expected a ValueSet or CodeSystem, got {resource_type!r}")
+        self._expansions.clear()  # other value sets may include this one
+        return url
+
+    def load(self, path: Union[str, "os.PathLike[str]"]) -> List[str]:
+        """Load a ValueSet, CodeSystem or Bundle of them from a JSON file; returns the URLs added."""
+        with open(path, encoding="utf-8") as f:
+            resource = json.load(f)
+        if resource.get("resourceType") == "Bundle":
+            return [self.add(entry["resource"]) for entry in resource.get("entry") or () if "resource" in entry]
+        return [self.add(resource)]
+
+    def load_csv(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        url: str,
+        system: Optional[str] = None,
+        code_column: str = "code",
+        system_column: str = "system",
+        delimiter: Optional[str] = None,
+    ) -> str:
+        """Load a ValueSet from a CSV/TSV file with a header row; returns `url`.
+
+        Each row is one code: `code_column`, and `system_column` unless every
+        code is from `system`. An `active` column (RF2 reference sets) skips
+        rows whose value is 0. The delimiter defaults to a tab for .tsv/.txt
+        files and a comma otherwise.
+        """
+        if delimiter is None:
+            delimiter = "\t" if os.fspath(path).endswith((".tsv", ".txt")) else ","
+        codes: Dict[str, List[str]] = {}
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            if code_column not in (reader.fieldnames or ()):
+                raise TerminologyError(f"{os.fspath(path)}: no {code_column!r} column")
+            for row in reader:
+                if row.get("active", "1") == "0":
+                    continue
+                row_system = row.get(system_column) or system
+                if not row_system:
+                    raise TerminologyError(f"{os.fspath(path)}, line {reader.line_num}: no code system")
+                code = row[code_column].strip()
+                if code:
+                    codes.setdefault(row_system, []).append(code)
+        return self.add(_value_set(url, codes))
+
+    def expand(self, url: str) -> Expansion:
+        """The (cached) expansion of the ValueSet `url` (a `|version` suffix is ignored)."""
+        url = _unversioned(url)
+        expansion = self._expansions.get(url)
+        if expansion is None:
+            expansion = self._expansions[url] = Expansion(url, self._expand(url, ()))
+        return expansion
+
+    def validate_code(self, url: str, value) -> bool:
+        return value in self.expand(url)
+
+    def _expand(self, url: str, seen: Tuple[str, ...]) -> FrozenSet[Tuple[str, str]]:
+        if url in seen:
+            raise TerminologyError(f"value set {url} includes itself")
+        cached = self._expansions.get(url)
+        if cached is not None:
+            return cached.codes
+        value_set = self._value_sets.get(url)
+        if value_set is None:
+            raise TerminologyError(f"unknown value set {url}")
+        contains = (value_set.get("expansion") or {}).get("contains")
+        if contains:
+            return frozenset(_contains_codes(contains))
+        compose = value_set.get("compose") or {}
+        codes = set()
+        for include in compose.get("include") or ():
+            codes |= self._component(include, seen + (url,))
+        for exclude in compose.get("exclude") or ():
+            codes -= self._component(exclude, seen + (url,))
+        return frozenset(codes)
+
+    def _component(self, component: dict, seen: Tuple[str, ...]) -> set:
+        # one compose.include/exclude: (system codes) intersected with every listed value set
+        if component.get("filter"):
+            raise TerminologyError(f"value set {seen[-1]}: filters are not supported; load an expansion instead")
+        system = component.get("system")
+        codes = None
+        if system:
+            if component.get("concept"):
+                codes = {(system, concept["code"]) for concept in component["concept"]}
+            elif system in self._code_systems:
+                codes = {(system, code) for code in self._code_systems[system]}
+            else:
+                raise TerminologyError(f"value set {seen[-1]} includes all of {system}, which is not loaded")
+        for url in component.get("valueSet") or ():
+            included = self._expand(_unversioned(url), seen)
+            codes = set(included) if codes is None else codes & included
+        return codes or set()
+
+
+def _unversioned(url: str) -> str:
+    return url.split("|", 1)[0]
+
+
+def _value_set(url: str, codes: Dict[str, Iterable[str]]) -> dict:
+    return {
+        "resourceType": "ValueSet",
+        "url": url,
+        "status": "active",
+        "compose": {
+            "include": [{"system": system, "concept": [{"code": c} for c in system_codes]}
+                        for system, system_codes in codes.items()]
+        },
+    }
+
+
+def _concept_codes(concepts) -> Iterable[str]:
+    # CodeSystem.concept, hierarchies included
+    for concept in concepts:
+        yield concept["code"]
+        yield from _concept_codes(concept.get("concept") or ())
+
+
+def _contains_codes(contains) -> Iterable[Tuple[str, str]]:
+    # ValueSet.expansion.contains; abstract entries only group their children
+    for item in contains:
+        if "code" in item and not item.get("abstract"):
+            yield item.get("system"), item["code"]
+        yield from _contains_codes(item.get("contains") or ())
+
+
+# ---------------------------------------------------------------------------
+# Checking resources
+
+# model class -> (bound fields [(name, alias, is_list, binding)], fields to descend into [(name, alias, is_list)])
+_plans: Dict[type, tuple] = {}
+
+
+def _model_types(tp) -> List[type]:
+    if isinstance(tp, type):
+        return [tp] if issubclass(tp, BaseModel) else []
+    return [t for arg in get_args(tp) for t in _model_types(arg)]
+
+
+def _has_bindings(model: type, seen: set) -> bool:
+    if model in seen:
+        return False
+    seen.add(model)
+    for spec in compat.field_specs(model):
+        if (model.__module__, model.__name__, spec.name) in BINDINGS:
+            return True
+        if spec.type is Any or any(_has_bindings(t, seen) for t in _model_types(spec.type)):
+            return True
+    return False
+
+
+def _plan(model: type) -> tuple:
+    bound, children = [], []
+    for spec in compat.field_specs(model):
+        binding = BINDINGS.get((model.__module__, model.__name__, spec.name))
+        if binding is not None:
+            bound.append((spec.name, spec.alias, spec.is_list, binding))
+        elif spec.type is Any or any(_has_bindings(t, set()) for t in _model_types(spec.type)):
+            children.append((spec.name, spec.alias, spec.is_list))
+    plan = _plans[model] = (bound, children)
+    return plan
+
+
+def check(resource: BaseModel, terminology: Optional["Terminology"] = None) -> List[Issue]:
+    """Values of bound fields anywhere in `resource` that are not in their value set."""
+    terminology = terminology or _default()
+    issues: List[Issue] = []
+    _check(resource, [getattr(resource, "resourceType", None) or type(resource).__name__], terminology, issues)
+    return issues
+
+
+def _check(node: BaseModel, path: List[str], terminology: Terminology, issues: List[Issue]) -> None:
+    bound, children = _plans.get(node.__class__) or _plan(node.__class__)
+    values = node.__dict__
+    for name, alias, is_list, binding in bound:
+        value = values.get(name)
+        if value is None:
+            continue
+        expansion = terminology.expand(binding.value_set)
+        for i, item in enumerate(value if is_list else (value,)):
+            if item is not None and item not in expansion:
+                where = "".join(path) + f".{alias}" + (f"[{i}]" if is_list else "")
+                issues.append(Issue(where, item, binding.value_set, binding.strength))
+    for name, alias, is_list in children:
+        value = values.get(name)
+        if value is None:
+            continue
+        if is_list:
+            for i, item in enumerate(value):
+                if isinstance(item, BaseModel):
+                    path.append(f".{alias}[{i}]")
+                    _check(item, path, terminology, issues)
+                    path.pop()
+        elif isinstance(value, BaseModel):
+            path.append(f".{alias}")
+            _check(value, path, terminology, issues)
+            path.pop()
+
+
+# ---------------------------------------------------------------------------
+# Validation hook
+
+_terminology: Optional[Terminology] = None
+_hook = None
+
+
+def _default() -> Terminology:
+    global _terminology
+    if _terminology is None:
+        _terminology = Terminology()
+    return _terminology
+
+
+def enable(terminology: Optional[Terminology] = None) -> Terminology:
+    """Check required bindings whenever `compat` validates a model; returns the Terminology used."""
+    global _terminology, _hook
+    disable()
+    _terminology = terminology = terminology or _default()
+
+    def hook(instance: BaseModel) -> None:
+        issues = [issue for issue in check(instance, terminology) if issue.strength == "required"]
+        if issues:
+            first = issues[0]
+            more = f" (and {len(issues) - 1} more)" if len(issues) > 1 else ""
+            raise TerminologyError(
+                f"{first.path}: {_describe(first.value)} is not in value set {first.value_set}{more}", issues
+            )
+
+    _hook = hook
+    compat.validation_hooks.append(hook)
+    return terminology
+
+
+def disable() -> None:
+    global _hook
+    if _hook is not None:
+        compat.validation_hooks.remove(_hook)
+        _hook = None
+
+
+def _describe(value) -> str:
+    if isinstance(value, Coding):
+        return f"{value.system or ''}|{value.code}"
+    if isinstance(value, CodeableConcept):
+        return ", ".join(_describe(c) for c in value.coding or ()) or repr(value.text)
+    return repr(value)
@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from Bundle import NEED_DATA, iter_entries, iter_resources, scan_entries
+
+BUNDLE = {
+    "resourceType": "Bundle",
+    "id": "entry",  # the key, not this value, starts the entries
+    "meta": {"tag": [{"code": "entry"}]},
+    "type": "collection",
+    "link": [{"relation": "self", "url": "http://example.org/fhir?q={entry}"}],
+    "entry": [
+        {"fullUrl": "urn:uuid:1", "resource": {"resourceType": "CareTeam", "status": "active",
+                                               "name": "braces } { and [ ] in \"quotes\" \\ ok"}},
+        {"fullUrl": "urn:uuid:2", "resource": {"resourceType": "Patient", "id": "2",
+                                               "entry": [{"nested": "not a Bundle entry"}],
+                                               "name": [{"text": "Zoë \\\" Ünïcode"}]}},
+        {"fullUrl": "urn:uuid:3"},
+    ],
+    "signature": {"data": "entry"},
+}
+RAW = json.dumps(BUNDLE, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_entries_survive_any_chunk_boundary(chunk_size):
+    entries = list(iter_entries(io.BytesIO(RAW), chunk_size))
+    assert [e.fullUrl for e in entries] == ["urn:uuid:1", "urn:uuid:2", "urn:uuid:3"]
+    assert entries[0].resource.name == BUNDLE["entry"][0]["resource"]["name"]
+    # no model for Patient: kept as the raw dict
+    assert entries[1].resource == BUNDLE["entry"][1]["resource"]
+
+
+def test_iter_resources_skips_entries_without_one():
+    resources = list(iter_resources(io.BytesIO(RAW), 5))
+    assert [r["resourceType"] if isinstance(r, dict) else r.resourceType for r in resources] == ["CareTeam", "Patient"]
+
+
+def test_scan_entries_is_push_driven():
+    scanner = scan_entries()
+    text = RAW.decode("utf-8")
+    chunks = [text[i:i + 10] for i in range(0, len(text), 10)] + [""]
+    raw_entries = []
+    item = next(scanner)
+    with pytest.raises(StopIteration):
+        while True:
+            if item is NEED_DATA:
+                item = scanner.send(chunks.pop(0))
+            else:
+                raw_entries.append(item)
+                item = next(scanner)
+    assert [json.loads(e) for e in raw_entries] == BUNDLE["entry"]
+
+
+def test_bundle_without_entries():
+    assert list(iter_entries(io.BytesIO(b'{"resourceType": "Bundle", "type": "collection"}'))) == []
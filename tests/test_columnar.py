@@ -0,0 +1,58 @@
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+import registry
+from columnar import COLUMNS, export_observations, observation_batches
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def blood_pressure(i, components=True):
+    data = {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "85354-9", "display": "Blood pressure panel"}]},
+        "subject": {"reference": f"Patient/{i}"},
+        "effectiveDateTime": "2024-01-01T10:00:00+01:00",
+    }
+    if components:
+        data["component"] = [
+            {"code": {"coding": [{"system": "http://loinc.org", "code": "8480-6"}]},
+             "valueQuantity": {"value": 120.0 + i, "unit": "mmHg"}},
+            {"code": {"coding": [{"system": "http://loinc.org", "code": "8462-4"}]}},
+        ]
+    else:
+        data["valueQuantity"] = {"value": 72.0, "unit": "/min"}
+    return registry.parse(data)
+
+
+def test_one_row_per_component():
+    observations = [blood_pressure(0), blood_pressure(1, components=False), blood_pressure(2)]
+    batches = list(observation_batches(observations, batch_size=2))
+    assert [b.num_rows for b in batches] == [2, 2, 1]
+    table = pa.Table.from_batches(batches)
+    assert table.column_names == [name for name, _ in COLUMNS]
+    rows = table.to_pylist()
+    assert [r["observation"] for r in rows] == [0, 0, 1, 2, 2]
+    assert [r["component_code"] for r in rows] == ["8480-6", "8462-4", None, "8480-6", "8462-4"]
+    assert [r["component_value"] for r in rows] == [120.0, None, None, 122.0, None]
+    assert rows[2]["value"] == 72.0 and rows[2]["value_unit"] == "/min"
+    assert rows[0]["effective_datetime"] == datetime(2024, 1, 1, 9, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_export_round_trips(format):
+    sink = io.BytesIO()
+    assert export_observations([blood_pressure(i) for i in range(3)], sink, format=format, batch_size=4) == 6
+    sink.seek(0)
+    table = pq.read_table(sink) if format == "parquet" else pa.ipc.open_file(sink).read_all()
+    assert table.num_rows == 6
+    assert table.column("subject_reference").to_pylist()[-1] == "Patient/2"
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export_observations([], io.BytesIO(), format="csv")
@@ -0,0 +1,51 @@
+import glob
+import os
+import stat
+
+import pytest
+
+import compat
+import decoders
+from observation import Observation
+
+pytestmark = pytest.mark.skipif(compat.PYDANTIC_V2, reason="no code is generated on pydantic v2")
+
+DATA = {
+    "resourceType": "Observation",
+    "status": "final",
+    "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+    "valueQuantity": {"value": 72.0, "unit": "/min"},
+}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "decoders")
+    monkeypatch.setattr(decoders, "CACHE_DIR", path)
+    monkeypatch.setattr(decoders, "_decoders", {})
+    return path
+
+
+def test_cache_directory_is_private(cache):
+    decoders.get_decoder(Observation)
+    assert stat.S_IMODE(os.stat(cache).st_mode) == 0o700
+    [module] = glob.glob(os.path.join(cache, "*.py"))
+    assert os.path.exists(module + ".sha256")
+
+
+def test_tampered_module_is_regenerated(cache, monkeypatch):
+    decoders.get_decoder(Observation)
+    [module] = glob.glob(os.path.join(cache, "*.py"))
+    original = open(module).read()
+    with open(module, "a") as f:
+        f.write("raise SystemExit('injected')\n")
+    monkeypatch.setattr(decoders, "_decoders", {})
+    assert decoders.decode(Observation, dict(DATA)).valueQuantity.value == 72.0
+    assert open(module).read() == original
+
+
+def test_shared_cache_directory_is_not_used(cache, monkeypatch):
+    os.makedirs(cache)
+    os.chmod(cache, 0o777)
+    assert decoders.decode(Observation, dict(DATA)).status == "final"
+    assert os.listdir(cache) == []
@@ -0,0 +1,54 @@
+import pytest
+
+import compat
+import fhirpath
+from observation import Observation
+
+OBSERVATION = compat.validate(Observation, {
+    "resourceType": "Observation",
+    "status": "final",
+    "code": {"coding": [{"system": "http://loinc.org", "code": "85354-9"}]},
+    "subject": {"reference": "Patient/1"},
+    "effectiveDateTime": "2024-01-05T10:00:00+00:00",
+    "component": [
+        {"code": {"coding": [{"system": "http://loinc.org", "code": "8480-6"}]},
+         "valueQuantity": {"value": 120.0, "unit": "mm[Hg]"}},
+        {"code": {"coding": [{"system": "http://loinc.org", "code": "8462-4"}]},
+         "valueQuantity": {"value": 80.0, "unit": "mm[Hg]"}},
+    ],
+})
+
+
+def evaluate(expression):
+    return fhirpath.evaluate(OBSERVATION, expression)
+
+
+def test_navigation_and_where():
+    assert evaluate("Observation.component.where(code.coding.code='8480-6').valueQuantity.value") == [120.0]
+    assert evaluate("component.value.value") == [120.0, 80.0]
+    assert evaluate("subject.reference") == ["Patient/1"]
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("effectiveDateTime > @2023", [True]),
+    ("effectiveDateTime < @2024-02", [True]),
+    ("effectiveDateTime >= @2024-02", [False]),
+    # equal as far as the month goes, but the literal has no day
+    ("effectiveDateTime > @2024-01", []),
+    ("effectiveDateTime = @2024", []),
+    ("@2024-01 < @2024-02", [True]),
+    ("@2024-01 = @2024-01", [True]),
+    ("@2024 = @2024-01", []),
+    ("@2024-01 > @2024-01-15", []),
+    ("@2023-12 < @2024-01-15", [True]),
+    ("@2024T = @2024", [True]),
+    ("@2024-01 is Date", [True]),
+    ("@2024-01.toString()", ["2024-01"]),
+])
+def test_partial_dates_compare_at_their_precision(expression, expected):
+    assert evaluate(expression) == expected
+
+
+def test_time_without_full_date_is_rejected():
+    with pytest.raises(fhirpath.FHIRPathError):
+        fhirpath.compile("@2024-01T10:00")
@@ -0,0 +1,79 @@
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import hl7v2
+import serialize
+
+ADT_A03 = "\r".join([
+    "MSH|^~\\&|ADT1|GOOD HEALTH HOSPITAL|GHH LAB|GHH|202401020830||ADT^A03^ADT_A03|MSG00000001|P|2.5.1",
+    "EVN|A03|202401020830",
+    "PID|1||1^^^GHH^MR||Everywoman^Eve^E^^^^L||19620320|F",
+    "PV1|1|E|2000^2012^01^GHH||||4001^Osborne^Otto|||MED||||7|||||V00000001^^^GHH^VN"
+    "|||||||||||||||||01||||||||202401020800|202401021630",
+]) + "\r"
+
+ORU_R01 = "\r".join([
+    "MSH|^~\\&|LAB|GHH|EHR|GHH|202401021200||ORU^R01^ORU_R01|LAB00000001|P|2.5.1",
+    "PID|1||1^^^GHH^MR||Everyman^Adam^A||19800101|M",
+    "OBR|1|ORD00000001|FIL00000001|24323-8^Comprehensive metabolic panel^LN",
+    "OBX|1|NM|2345-7^Glucose^LN||120|mg/dL^mg/dL^UCUM|70-99|H|||F|||202401021100-0500",
+    "OBX|2|ST|8251-1^Service comment^LN||Specimen received \\T\\ processed||||||F",
+]) + "\r"
+
+
+def test_adt_becomes_an_encounter():
+    [encounter] = hl7v2.to_resources(hl7v2.Message(ADT_A03))
+    assert encounter.status == "finished"
+    assert encounter.class_.code == "EMER"
+    assert encounter.subject.reference == "Patient/1"
+    assert encounter.subject.display == "Eve Everywoman"
+    assert encounter.participant[0].individual.reference == "Practitioner/4001"
+    assert encounter.period.start == datetime(2024, 1, 2, 8, 0)
+    assert encounter.period.end == datetime(2024, 1, 2, 16, 30)
+    assert encounter.hospitalization.dischargeDisposition.coding[0].code == "01"
+
+
+def test_oru_becomes_observations():
+    glucose, comment = hl7v2.to_resources(hl7v2.Message(ORU_R01))
+    assert glucose.code.coding[0].system == "http://loinc.org"
+    assert glucose.code.coding[0].code == "2345-7"
+    assert (glucose.valueQuantity.value, glucose.valueQuantity.code) == (120.0, "mg/dL")
+    assert glucose.interpretation[0].coding[0].code == "H"
+    assert (glucose.referenceRange[0].low.value, glucose.referenceRange[0].high.value) == (70.0, 99.0)
+    assert glucose.effectiveDateTime == datetime(2024, 1, 2, 11, 0, tzinfo=timezone(timedelta(hours=-5)))
+    assert comment.valueString == "Specimen received & processed"
+
+
+def test_convert_streams_mllp_framed_messages():
+    framed = b"".join(b"\x0b" + m.encode() + b"\x1c\r" for m in (ADT_A03, ORU_R01))
+    resources = list(hl7v2.convert(io.BytesIO(framed), chunk_size=16))
+    assert [r.resourceType for r in resources] == ["Encounter", "Observation", "Observation"]
+    # the mapped resources serialize as valid FHIR JSON
+    assert b'"valueString":"Specimen received & processed"' in serialize.dumps(resources[-1])
+
+
+def test_unmappable_messages_go_to_on_error():
+    errors = []
+    feed = ADT_A03.replace("ADT^A03^ADT_A03", "SIU^S12") + ORU_R01
+    resources = list(hl7v2.convert(io.BytesIO(feed.encode()), on_error=errors.append))
+    assert len(resources) == 2
+    assert [(e.line, e.resourceType) for e in errors] == [(1, "SIU^S12")]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024", datetime(2024, 1, 1)),
+    ("202401021530", datetime(2024, 1, 2, 15, 30)),
+    ("20240102153045.12", datetime(2024, 1, 2, 15, 30, 45, 120000)),
+    ("20240102153045-0500", datetime(2024, 1, 2, 15, 30, 45, tzinfo=timezone(timedelta(hours=-5)))),
+    ("202401021530+0130", datetime(2024, 1, 2, 15, 30, tzinfo=timezone(timedelta(hours=1, minutes=30)))),
+])
+def test_timestamps(value, expected):
+    assert hl7v2._timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2024-0101", "2024-01-01", "20240102-0500", "2024010215+05", "2024010", "20241301"])
+def test_invalid_timestamps_are_rejected(value):
+    with pytest.raises(hl7v2.HL7Error):
+        hl7v2._timestamp(value)
@@ -0,0 +1,106 @@
+import importlib
+import io
+import json
+import threading
+
+import pytest
+
+import compat
+import instrument
+import registry
+import serialize
+
+CARE_TEAM = {"resourceType": "CareTeam", "status": "active", "name": "Ward 3"}
+
+
+@pytest.fixture(autouse=True)
+def disabled():
+    yield
+    instrument.disable()
+
+
+def test_disable_restores_the_original_functions():
+    originals = {(m, n): getattr(importlib.import_module(m), n) for m, n, _ in instrument.ENTRY_POINTS}
+    instrument.enable()
+    assert registry.parse is not originals[("registry", "parse")]
+    assert instrument.enabled()
+    instrument.disable()
+    assert not instrument.enabled()
+    for (module, name), original in originals.items():
+        assert getattr(importlib.import_module(module), name) is original
+
+
+def test_nested_calls_are_recorded_once():
+    sink = instrument.MemorySink()
+    instrument.enable(sink, field_every=0, allocation_every=0)
+    team = registry.parse(CARE_TEAM)
+    serialize.dumps(team)
+    instrument.disable()
+    # registry.parse validates through compat.validate; only the parse is seen
+    assert sink.calls == {("parse", "CareTeam"): 1, ("serialize", "CareTeam"): 1}
+
+
+def test_errors_are_counted():
+    sink = instrument.MemorySink()
+    instrument.enable(sink, field_every=0, allocation_every=0)
+    with pytest.raises(ValueError):
+        registry.parse({"resourceType": "CareTeam"})
+    registry.parse(CARE_TEAM)
+    instrument.disable()
+    assert sink.error_rate("parse", "CareTeam") == 0.5
+
+
+def test_field_and_allocation_profiling():
+    sink = instrument.MemorySink()
+    instrument.enable(sink, field_every=1, allocation_every=1)
+    registry.parse(CARE_TEAM)
+    instrument.disable()
+    summary = sink.summary()["parse"]["CareTeam"]
+    assert set(summary["fields"]) == {"resourceType", "status", "name"}
+    assert summary["allocations"]["samples"] == 1
+
+
+def test_allocation_sampling_skips_while_other_threads_run():
+    sink = instrument.MemorySink()
+    stop = threading.Event()
+    other = threading.Thread(target=stop.wait)
+    other.start()
+    try:
+        instrument.enable(sink, field_every=0, allocation_every=1)
+        registry.parse(CARE_TEAM)
+        instrument.disable()
+    finally:
+        stop.set()
+        other.join()
+    assert "allocations" not in sink.summary()["parse"]["CareTeam"]
+
+
+def test_json_log_sink():
+    stream = io.StringIO()
+    instrument.enable(instrument.JSONLogSink(stream), field_every=0, allocation_every=0)
+    compat.validate(registry.get_model("CareTeam"), CARE_TEAM)
+    instrument.disable()
+    event = json.loads(stream.getvalue())
+    assert event["operation"] == "validate"
+    assert event["resourceType"] == "CareTeam"
+    assert "error" not in event
+
+
+def test_prometheus_exposition(tmp_path):
+    sink = instrument.PrometheusSink(str(tmp_path / "fhir.prom"))
+    sink.record(instrument.Event("parse", "CareTeam", 3e-6))
+    sink.record(instrument.Event("parse", "CareTeam", 3e-6, error="ValidationError"))
+    sink.record(instrument.Event("parse", "CareTeam", 1e-6, allocations=(10, 1000, 2000)))
+    lines = sink.exposition().splitlines()
+    labels = 'operation="parse",resource_type="CareTeam"'
+    assert "# TYPE fhir_model_seconds histogram" in lines
+    assert f'fhir_model_seconds_bucket{{{labels},le="1e-06"}} 1' in lines
+    assert f'fhir_model_seconds_bucket{{{labels},le="2e-06"}} 1' in lines
+    assert f'fhir_model_seconds_bucket{{{labels},le="4e-06"}} 3' in lines
+    assert f'fhir_model_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"fhir_model_seconds_count{{{labels}}} 3" in lines
+    assert f"fhir_model_errors_total{{{labels}}} 1" in lines
+    assert f"fhir_model_allocated_bytes_sum{{{labels}}} 1000" in lines
+    assert f"fhir_model_allocated_bytes_count{{{labels}}} 1" in lines
+    sink.flush()
+    assert (tmp_path / "fhir.prom").read_text() == sink.exposition()
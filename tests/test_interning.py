@@ -0,0 +1,58 @@
+import pytest
+
+import registry
+from datatypes import CodeableConcept, Coding
+from interning import InternedCodeableConcept, InternedCoding, InternPool
+
+LOINC = "http://loinc.org"
+
+
+def observation(i):
+    return registry.parse({
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": LOINC, "code": "8867-4", "display": "Heart rate"}]},
+        "subject": {"reference": f"Patient/{i}"},
+        "valueQuantity": {"value": 60.0 + i, "unit": "beats/minute", "system": "http://unitsofmeasure.org", "code": "/min"},
+    })
+
+
+def test_interned_values_are_shared_across_resources():
+    pool = InternPool()
+    a, b = pool.intern(observation(1)), pool.intern(observation(2))
+    assert a.code is b.code
+    assert a.code.coding[0] is b.code.coding[0]
+    assert isinstance(a.code, InternedCodeableConcept)
+    assert isinstance(a.code.coding[0], InternedCoding)
+    assert a.valueQuantity.unit is b.valueQuantity.unit
+    assert a.subject is not b.subject
+    assert len(pool) == 2
+    assert (pool.hits, pool.misses) == (2, 2)
+
+
+def test_interned_values_are_hashable_and_equal_to_plain_ones():
+    pool = InternPool()
+    plain = Coding(system=LOINC, code="8867-4")
+    shared = pool.coding(plain)
+    assert shared == plain and plain == shared
+    assert shared != Coding(system=LOINC, code="8480-6")
+    assert {shared: 1}[pool.coding(Coding(system=LOINC, code="8867-4"))] == 1
+    concept = pool.concept(CodeableConcept(coding=[plain], text="Heart rate"))
+    assert concept == CodeableConcept(coding=[plain], text="Heart rate")
+    assert len({concept, pool.concept(CodeableConcept(coding=[plain], text="Heart rate"))}) == 1
+    assert pool.coding(shared) is shared
+
+
+def test_interned_values_are_frozen():
+    shared = InternPool().coding(Coding(system=LOINC, code="8867-4"))
+    with pytest.raises((TypeError, ValueError)):
+        shared.code = "8480-6"
+
+
+def test_max_size_caps_the_pool():
+    pool = InternPool(max_size=1)
+    first = pool.coding(Coding(code="a"))
+    other = Coding(code="b")
+    assert pool.coding(other) is other
+    assert pool.coding(Coding(code="a")) is first
+    assert len(pool) == 1
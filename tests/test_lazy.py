@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+import compat
+import lazy
+import registry
+
+OBSERVATION = {
+    "resourceType": "Observation",
+    "status": "final",
+    "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+    "subject": {"reference": "Patient/1"},
+    "valueQuantity": {"value": "not a number"},
+}
+
+
+def test_fields_validate_on_first_access():
+    resource = lazy.load(json.dumps(OBSERVATION).encode())
+    assert resource.status == "final"
+    assert resource.subject.reference == "Patient/1"
+    assert resource.note is None
+    assert not resource.materialized
+
+
+def test_bad_field_raises_on_access_and_stays_pending():
+    resource = lazy.load(OBSERVATION)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            resource.valueQuantity
+    assert resource.code.coding[0].code == "8867-4"
+    with pytest.raises(ValueError):
+        resource.materialize()
+
+
+def test_materialize_matches_registry_parse():
+    data = dict(OBSERVATION, valueQuantity={"value": 72.0, "unit": "/min"})
+    resource = lazy.load(data)
+    assert resource.status == "final"
+    assert resource.materialize() == registry.parse(data)
+    assert resource.valueQuantity.value == 72.0
+
+
+def test_missing_required_field_raises():
+    data = {k: v for k, v in OBSERVATION.items() if k != "status"}
+    with pytest.raises(ValueError):
+        lazy.load(data).status
+
+
+@pytest.fixture
+def reject_final():
+    def hook(instance):
+        if getattr(instance, "status", None) is not None and instance.status == "final":
+            raise ValueError("final observations are not accepted")
+    compat.validation_hooks.append(hook)
+    yield
+    compat.validation_hooks.remove(hook)
+
+
+def test_validation_hooks_run_when_the_last_field_is_read(reject_final):
+    data = dict(OBSERVATION, valueQuantity={"value": 72.0})
+    resource = lazy.load(data)
+    # not every field has been read, so the hooks have not run
+    assert resource.resourceType == "Observation"
+    assert resource.status == "final"
+    assert resource.code is not None
+    assert resource.subject is not None
+    for _ in range(2):
+        with pytest.raises(ValueError, match="not accepted"):
+            resource.valueQuantity
+    with pytest.raises(ValueError, match="not accepted"):
+        resource.materialize()
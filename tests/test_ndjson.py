@@ -0,0 +1,55 @@
+import io
+import json
+
+import pytest
+
+from ndjson import LineError, read_ndjson
+from interning import InternPool
+
+TEAM = {"resourceType": "CareTeam", "status": "active",
+        "category": [{"coding": [{"system": "http://loinc.org", "code": "LA27976-2"}]}]}
+
+LINES = [
+    json.dumps(TEAM),
+    "",
+    "{not json",
+    json.dumps({"resourceType": "CareTeam"}),
+    json.dumps({"resourceType": "Nope"}),
+    "[1, 2]",
+    json.dumps(dict(TEAM, name="Ward 3")),
+]
+
+
+def read(data, **kwargs):
+    errors = []
+    resources = list(read_ndjson(io.BytesIO(data), on_error=errors.append, **kwargs))
+    return resources, errors
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_bad_lines_are_reported_and_skipped(chunk_size):
+    resources, errors = read("\n".join(LINES).encode(), chunk_size=chunk_size)
+    assert [r.name for r in resources] == [None, "Ward 3"]
+    assert [(e.line, e.resourceType) for e in errors] == [(3, None), (4, "CareTeam"), (5, "Nope"), (6, None)]
+    assert all(isinstance(e, LineError) and e.message for e in errors)
+
+
+def test_text_streams_paths_and_missing_final_newline(tmp_path):
+    text = json.dumps(TEAM) + "\r\n" + json.dumps(TEAM)
+    resources, errors = read(text.encode())
+    assert len(resources) == 2 and not errors
+    assert len(list(read_ndjson(io.StringIO(text)))) == 2
+    path = tmp_path / "CareTeam.ndjson"
+    path.write_text(text)
+    assert len(list(read_ndjson(str(path)))) == 2
+
+
+def test_interning_shares_codings_across_lines():
+    pool = InternPool()
+    first, second = read((json.dumps(TEAM) + "\n" + json.dumps(TEAM)).encode(), intern=pool)[0]
+    assert first.category[0] is second.category[0]
+
+
+def test_chunk_size_must_be_positive():
+    with pytest.raises(ValueError):
+        next(read_ndjson(io.BytesIO(b""), chunk_size=0))
@@ -0,0 +1,49 @@
+import numpy as np
+
+import registry
+from numeric import observation_arrays, out_of_range, reference_bounds
+
+
+def observation(systolic=None, value=None, ranges=True):
+    data = {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "85354-9"}]},
+        "subject": {"reference": "Patient/1"},
+        "effectiveDateTime": "2024-01-01T10:00:00+01:00",
+        "component": [],
+    }
+    if value is not None:
+        data["valueQuantity"] = {"value": value, "unit": "mmHg"}
+    if systolic is not None:
+        component = {"code": {"coding": [{"code": "8480-6"}]}, "valueQuantity": {"value": systolic, "unit": "mmHg"}}
+        if ranges:
+            component["referenceRange"] = [{"low": {"value": 90.0}, "high": {"value": 140.0}}]
+        data["component"].append(component)
+    return registry.parse(data)
+
+
+def test_missing_values_are_masked():
+    arrays = observation_arrays([observation(120.0, 5.0), observation(), observation(150.0)])
+    assert arrays.value.mask.tolist() == [False, True, True]
+    assert arrays.value[0] == 5.0
+    assert arrays.unit.tolist() == ["mmHg", None, None]
+    assert arrays.component_codes == ["8480-6"]
+    assert arrays.component("8480-6").tolist() == [120.0, None, 150.0]
+    assert arrays.effective[0] == np.datetime64("2024-01-01T09:00:00", "us")
+
+
+def test_component_axis_can_be_fixed():
+    arrays = observation_arrays([observation(120.0)], component_codes=["8462-4", "8480-6"])
+    assert arrays.component_value.shape == (1, 2)
+    assert arrays.component("8462-4").mask.tolist() == [True]
+
+
+def test_out_of_range_against_reference_bounds():
+    observations = [observation(120.0), observation(150.0), observation(), observation(80.0, ranges=False)]
+    low, high = reference_bounds(observations, "8480-6")
+    assert low.mask.tolist() == [False, False, True, True]
+    flags = out_of_range(observation_arrays(observations).component("8480-6"), low, high)
+    # no value stays masked; no bounds means unbounded
+    assert flags.tolist() == [False, True, None, False]
+    assert out_of_range([80.0, 100.0], low=90.0).tolist() == [True, False]
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import ndjson
+from parallel import validate_batch, validate_parallel
+
+
+def lines(n):
+    for i in range(n):
+        if i % 5 == 4:
+            yield json.dumps({"resourceType": "CareTeam", "name": f"t{i}"})  # no status
+        else:
+            yield json.dumps({"resourceType": "CareTeam", "status": "active", "name": f"t{i}"})
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "CareTeam.ndjson"
+    path.write_text("\n".join(lines(23)) + "\n")
+    return str(path)
+
+
+def test_validate_batch():
+    resources, errors = validate_batch([(1, b'{"resourceType": "CareTeam", "status": "active"}'), (2, b"{")])
+    assert [r.status for r in resources] == ["active"]
+    assert [e.line for e in errors] == [2]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_matches_the_serial_reader(source, ordered):
+    serial_errors, errors = [], []
+    expected = [r.name for r in ndjson.read_ndjson(source, on_error=serial_errors.append)]
+    names = [r.name for r in validate_parallel(source, workers=2, batch_size=3, ordered=ordered,
+                                               on_error=errors.append)]
+    if ordered:
+        assert names == expected
+    else:
+        assert sorted(names) == sorted(expected)
+    assert sorted(e.line for e in errors) == [e.line for e in serial_errors] == [5, 10, 15, 20]
+
+
+def test_batch_size_must_be_positive(source):
+    with pytest.raises(ValueError):
+        next(validate_parallel(source, batch_size=0))
@@ -0,0 +1,105 @@
+import pytest
+
+import registry
+import serialize
+from patch import PatchError, apply_patch, diff
+
+CARE_PLAN = {
+    "resourceType": "CarePlan",
+    "status": "active",
+    "intent": "plan",
+    "subject": {"reference": "Patient/1"},
+    "period": {"start": "2024-01-01T00:00:00+00:00"},
+    "activity": [
+        {"detail": {"kind": "Appointment", "status": "scheduled", "description": "first"}},
+        {"detail": {"kind": "Appointment", "status": "scheduled", "description": "second"}},
+    ],
+    "note": [{"text": "Reviewed with patient"}],
+}
+
+
+@pytest.fixture
+def plan():
+    return registry.parse(CARE_PLAN)
+
+
+def test_replace_copies_only_the_patched_path(plan):
+    before = serialize.to_fhir_dict(plan)
+    patched = apply_patch(plan, [{"op": "replace", "path": "/activity/0/detail/status", "value": "completed"}])
+    assert patched.activity[0].detail.status.value == "completed"
+    assert serialize.to_fhir_dict(plan) == before
+    assert patched.activity[1] is plan.activity[1]
+    assert patched.subject is plan.subject
+    assert patched.note is plan.note
+    assert patched.activity[0] is not plan.activity[0]
+
+
+def test_append_and_insert(plan):
+    value = {"detail": {"status": "not-started", "description": "third"}}
+    appended = apply_patch(plan, [{"op": "add", "path": "/activity/-", "value": value}])
+    assert [a.detail.description for a in appended.activity] == ["first", "second", "third"]
+    inserted = apply_patch(plan, [{"op": "add", "path": "/activity/0", "value": value}])
+    assert [a.detail.description for a in inserted.activity] == ["third", "first", "second"]
+    assert len(plan.activity) == 2
+
+
+def test_test_operation(plan):
+    assert apply_patch(plan, [{"op": "test", "path": "/status", "value": "active"}]) is plan
+    with pytest.raises(PatchError):
+        apply_patch(plan, [{"op": "test", "path": "/status", "value": "draft"}])
+
+
+def test_remove(plan):
+    removed = apply_patch(plan, [{"op": "remove", "path": "/note"}])
+    assert removed.note is None
+    assert "note" not in serialize.to_fhir_dict(removed)
+    with pytest.raises(PatchError, match="required"):
+        apply_patch(plan, [{"op": "remove", "path": "/status"}])
+
+
+@pytest.mark.parametrize("path", ["/activity/2/detail/status", "/activity/01/detail/status", "/activity/x/detail/status"])
+def test_bad_list_index(plan, path):
+    with pytest.raises(PatchError):
+        apply_patch(plan, [{"op": "replace", "path": path, "value": "completed"}])
+
+
+def test_invalid_value_raises_patch_error(plan):
+    with pytest.raises(PatchError):
+        apply_patch(plan, [{"op": "replace", "path": "/status", "value": "x"}])
+    with pytest.raises(PatchError):
+        apply_patch(plan, [{"op": "add", "path": "/activity/-", "value": {"detail": {"status": "x"}}}])
+    assert plan.status.value == "active"
+
+
+def test_pointer_escaping():
+    bundle = registry.parse({
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [{"resource": {"resourceType": "Basic", "a/b": 1, "c~d": 2}}],
+    })
+    patched = apply_patch(bundle, [
+        {"op": "replace", "path": "/entry/0/resource/a~1b", "value": 3},
+        {"op": "remove", "path": "/entry/0/resource/c~0d"},
+    ])
+    assert patched.entry[0].resource == {"resourceType": "Basic", "a/b": 3}
+    assert diff(bundle, patched) == [
+        {"op": "replace", "path": "/entry/0/resource/a~1b", "value": 3},
+        {"op": "remove", "path": "/entry/0/resource/c~0d"},
+    ]
+
+
+def test_diff_round_trips(plan):
+    ops = [
+        {"op": "replace", "path": "/activity/0/detail/status", "value": "completed"},
+        {"op": "add", "path": "/activity/-", "value": {"detail": {"status": "not-started"}}},
+        {"op": "remove", "path": "/note"},
+    ]
+    patched = apply_patch(plan, ops)
+    changes = diff(plan, patched)
+    assert changes == [
+        {"op": "replace", "path": "/activity/0/detail/status", "value": "completed"},
+        {"op": "add", "path": "/activity/2", "value": {"detail": {"status": "not-started"}}},
+        {"op": "remove", "path": "/note"},
+    ]
+    assert apply_patch(plan, changes) == patched
+    assert diff(plan, plan) == []
@@ -0,0 +1,47 @@
+import asyncio
+import io
+import json
+
+import Bundle
+import pipeline
+
+BUNDLE = json.dumps({
+    "resourceType": "Bundle",
+    "type": "collection",
+    "entry": [
+        {"resource": {"resourceType": "Patient", "id": "1"}},
+        {"fullUrl": "urn:uuid:no-resource"},
+        {"resource": {"resourceType": "CareTeam", "status": "active"}},
+        {"resource": {"resourceType": "CareTeam"}},
+    ],
+}).encode()
+
+
+class Reader:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    async def read(self, n):
+        return self.stream.read(n)
+
+
+def run(data, **kwargs):
+    received, errors = [], []
+    stats = asyncio.run(pipeline.Pipeline.from_bundle(Reader(data), received.extend,
+                                                      on_error=errors.append, **kwargs).run())
+    return received, errors, stats
+
+
+def test_bundle_entries_match_iter_resources():
+    received, errors, _ = run(BUNDLE)
+    # Bundle.iter_resources validates the whole entry, so it stops at the bad CareTeam
+    expected = Bundle.iter_resources(io.BytesIO(BUNDLE))
+    assert [next(expected), next(expected)] == received[:2]
+    assert [type(r).__name__ for r in received] == ["dict", "CareTeam"]
+    assert [(e.line, e.resourceType) for e in errors] == [(4, "CareTeam")]
+
+
+def test_small_chunks_and_batches():
+    received, errors, _ = run(BUNDLE, chunk_size=7, batch_size=1)
+    assert [type(r).__name__ for r in received] == ["dict", "CareTeam"]
+    assert len(errors) == 1
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import registry
+from CareTeam import CareTeam
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    monkeypatch.setattr(registry, "_MODULES", dict(registry._MODULES))
+    monkeypatch.setattr(registry, "_models", dict(registry._models))
+
+
+def test_parse_accepts_dicts_and_json_text():
+    data = {"resourceType": "CareTeam", "status": "active"}
+    for raw in (data, json.dumps(data), json.dumps(data).encode()):
+        team = registry.parse(raw)
+        assert isinstance(team, CareTeam) and team.status == "active"
+
+
+@pytest.mark.parametrize("raw", [
+    {"resourceType": "Patient"},
+    {"status": "active"},
+    {"resourceType": ["CareTeam"]},
+    "[1, 2]",
+    "{",
+])
+def test_parse_rejects_unknown_types_and_non_objects(raw):
+    with pytest.raises(ValueError):
+        registry.parse(raw)
+
+
+def test_get_model():
+    assert registry.get_model("CareTeam") is CareTeam
+    assert registry.is_registered("Observation")
+    assert not registry.is_registered("Patient")
+    assert "Encounter" in registry.resource_types()
+
+
+def test_register(isolated):
+    registry.register("Team", "CareTeam", "CareTeam")
+    assert registry.is_registered("Team")
+    assert registry.get_model("Team") is CareTeam
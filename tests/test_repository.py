@@ -0,0 +1,51 @@
+import pytest
+
+import compat
+from observation import Observation
+from repository import Repository
+
+
+def observation(patient, effective):
+    return compat.validate(Observation, {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+        "subject": {"reference": f"Patient/{patient}"},
+        "effectiveDateTime": effective,
+        "valueQuantity": {"value": 72.0, "unit": "/min"},
+    })
+
+
+@pytest.fixture
+def repo():
+    with Repository() as repo:
+        repo.upsert_many(
+            [observation(p, f"2024-01-{d:02d}T00:00:00+00:00") for p in (1, 2) for d in range(1, 11)],
+            [f"Observation/{p}-{d}" for p in (1, 2) for d in range(1, 11)],
+        )
+        yield repo
+
+
+def test_round_trip(repo):
+    assert len(repo) == 20
+    assert repo.get("Observation/1-3").effectiveDateTime.day == 3
+
+
+def test_find_and_count_by_subject_and_date(repo):
+    newest = list(repo.find("Observation", subject="Patient/2", limit=3, newest_first=True))
+    assert [o.effectiveDateTime.day for o in newest] == [10, 9, 8]
+    assert repo.count("Observation", subject="Patient/1", since="2024-01-03", until="2024-01-06") == 3
+
+
+def test_subject_queries_use_the_subject_index(repo):
+    where, params = repo._where("Observation", "Patient/1", None, "2024-01-03", "2024-01-06")
+    plan = repo._conn.execute(f"EXPLAIN QUERY PLAN SELECT count(*) FROM resources{where}", params).fetchall()
+    assert "resources_subject_date" in plan[0][-1]
+
+
+def test_key_count_must_match(repo):
+    with pytest.raises(ValueError):
+        repo.upsert_many([observation(3, "2024-01-01")], [])
+    with pytest.raises(ValueError):
+        repo.upsert_many([observation(3, "2024-01-01")], ["a", "b"])
+    assert len(repo) == 20
@@ -0,0 +1,88 @@
+from Bundle import Bundle
+import compat
+from resolver import InMemoryBackend, ReferenceResolver
+
+
+def care_team(contained, **extra):
+    return {
+        "resourceType": "CareTeam",
+        "status": "active",
+        "contained": contained,
+        "subject": {"reference": "#p1"},
+        **extra,
+    }
+
+
+def test_contained_ids_stay_local_to_their_entry():
+    bundle = compat.validate(Bundle, {
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [
+            {"fullUrl": "urn:uuid:a", "resource": care_team([{"resourceType": "Patient", "id": "p1"}])},
+            {"fullUrl": "urn:uuid:b", "resource": care_team([{"resourceType": "Group", "id": "p1"}])},
+        ],
+    })
+    results = ReferenceResolver(InMemoryBackend({})).resolve(bundle)
+    assert results[("urn:uuid:a", "#p1")].resourceType == "Patient"
+    assert results[("urn:uuid:b", "#p1")].resourceType == "Group"
+
+
+def test_entries_without_full_url_are_keyed_by_index():
+    bundle = compat.validate(Bundle, {
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [
+            {"resource": care_team([{"resourceType": "Patient", "id": "p1"}])},
+            {"resource": care_team([{"resourceType": "Group", "id": "p1"}])},
+        ],
+    })
+    results = ReferenceResolver(InMemoryBackend({})).resolve(bundle)
+    assert results[("entry[0]", "#p1")].resourceType == "Patient"
+    assert results[("entry[1]", "#p1")].resourceType == "Group"
+
+
+def test_relative_references_resolve_against_the_entry_full_url():
+    fetched = []
+
+    class Backend(InMemoryBackend):
+        def fetch_many(self, references):
+            fetched.append(sorted(references))
+            return super().fetch_many(references)
+
+    a_team = care_team([], subject={"reference": "Group/7"})
+    bundle = compat.validate(Bundle, {
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [
+            {"fullUrl": "http://a.example/fhir/CareTeam/1", "resource": a_team},
+            {"fullUrl": "http://b.example/fhir/CareTeam/2", "resource": dict(a_team, id="2")},
+            {"fullUrl": "http://a.example/fhir/CareTeam/3", "resource": dict(a_team, id="3")},
+        ],
+    })
+    remote = {"http://b.example/fhir/Group/7": {"resourceType": "Group", "id": "7"}}
+    results = ReferenceResolver(Backend(remote)).resolve(bundle)
+    assert results[("http://a.example/fhir/CareTeam/1", "Group/7")] is None
+    assert results[("http://b.example/fhir/CareTeam/2", "Group/7")] == remote["http://b.example/fhir/Group/7"]
+    # one batch, each absolute reference once
+    assert fetched == [["http://a.example/fhir/Group/7", "http://b.example/fhir/Group/7"]]
+
+
+def test_references_to_other_entries_resolve_locally():
+    bundle = compat.validate(Bundle, {
+        "resourceType": "Bundle",
+        "type": "collection",
+        "entry": [
+            {"fullUrl": "http://a.example/fhir/CareTeam/1",
+             "resource": care_team([], id="1", subject={"reference": "CareTeam/2"})},
+            {"fullUrl": "http://a.example/fhir/CareTeam/2", "resource": care_team([], id="2")},
+        ],
+    })
+    results = ReferenceResolver(InMemoryBackend({})).resolve(bundle)
+    assert results[("http://a.example/fhir/CareTeam/1", "CareTeam/2")].id == "2"
+
+
+def test_single_resource_is_owned_by_none():
+    import CareTeam
+    team = compat.validate(CareTeam.CareTeam, care_team([{"resourceType": "Patient", "id": "p1"}]))
+    results = ReferenceResolver(InMemoryBackend({})).resolve(team)
+    assert results == {(None, "#p1"): team.contained[0]}
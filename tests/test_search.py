@@ -0,0 +1,89 @@
+import pytest
+
+import compat
+from observation import Observation
+from search import SearchError, SearchStore
+
+
+def observation(id, effective, code="8867-4"):
+    # Observation has no id element here; the note carries it
+    return compat.validate(Observation, {
+        "resourceType": "Observation",
+        "note": [{"text": id}],
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": code}]},
+        "subject": {"reference": "Patient/1"},
+        "effectiveDateTime": effective,
+        "valueQuantity": {"value": 72.0, "unit": "/min", "system": "http://unitsofmeasure.org", "code": "/min"},
+    })
+
+
+@pytest.fixture
+def store():
+    store = SearchStore()
+    for id, effective in [
+        ("a", "2024-01-01T04:59:59+00:00"),
+        ("b", "2024-01-01T05:00:00+00:00"),
+        ("c", "2024-01-01T05:30:15+00:00"),
+        ("d", "2024-01-01T05:59:59+00:00"),
+        ("e", "2024-01-01T06:00:00+00:00"),
+        ("f", "2024-01-02T05:30:00+00:00"),
+    ]:
+        store.insert(observation(id, effective))
+    return store
+
+
+def ids(result):
+    return sorted(r.note[0].text for r in result.resources)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024", ["a", "b", "c", "d", "e", "f"]),
+    ("2024-01-01", ["a", "b", "c", "d", "e"]),
+    ("2024-01-01T05", ["b", "c", "d"]),
+    ("2024-01-01T05Z", ["b", "c", "d"]),
+    ("2024-01-01T07:00+02:00", ["b"]),
+    ("2024-01-01T05:30", ["c"]),
+    ("2024-01-01T05:30:15", ["c"]),
+    ("2024-01-01T05:30:14", []),
+])
+def test_date_equality_covers_the_given_precision(store, value, expected):
+    assert ids(store.search("Observation", {"date": value})) == expected
+
+
+def test_date_prefixes(store):
+    assert ids(store.search("Observation", {"date": "gt2024-01-01T05"})) == ["e", "f"]
+    assert ids(store.search("Observation", {"date": "lt2024-01-01T05"})) == ["a"]
+    assert ids(store.search("Observation", {"date": "ge2024-01-02"})) == ["f"]
+
+
+def test_token_and_reference(store):
+    store.insert(observation("g", "2024-01-03T00:00:00+00:00", code="8480-6"))
+    assert ids(store.search("Observation", "code=http://loinc.org|8480-6")) == ["g"]
+    assert store.search("Observation", "subject=Patient/1").total == 7
+
+
+def test_invalid_date_is_rejected(store):
+    with pytest.raises(SearchError):
+        store.search("Observation", {"date": "2024-01-01T5"})
+
+
+def test_paging_stops():
+    store = SearchStore()
+    for id in "abcde":
+        store.insert(observation(id, "2024-01-01T00:00:00+00:00"))
+    page = store.search("Observation", {"_count": "2"})
+    seen = []
+    while True:
+        seen.extend(r.note[0].text for r in page.resources)
+        if page.next_offset is None:
+            break
+        page = store.search("Observation", {"_count": "2", "_offset": str(page.next_offset)})
+    assert sorted(seen) == list("abcde")
+
+
+def test_count_zero_returns_the_total_only(store):
+    result = store.search("Observation", {"_count": "0"})
+    assert result.total == 6
+    assert result.resources == []
+    assert result.next_offset is None
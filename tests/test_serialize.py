@@ -0,0 +1,34 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import lazy
+import registry
+import serialize
+
+OBSERVATION = {
+    "resourceType": "Observation",
+    "status": "final",
+    "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+    "subject": {"reference": "Patient/1"},
+    "valueQuantity": {"value": 72.0, "unit": "/min"},
+}
+
+
+@pytest.mark.parametrize("backend", sorted(serialize.BACKENDS))
+def test_lazy_resources_serialize_as_the_resource(backend):
+    raw = json.dumps(OBSERVATION)
+    assert serialize.dumps(lazy.load(raw), backend) == serialize.dumps(registry.parse(raw), backend)
+
+
+@pytest.mark.parametrize("backend", sorted(serialize.BACKENDS))
+def test_decimals_are_numbers(backend):
+    assert json.loads(serialize.dumps({"value": Decimal("1.50")}, backend)) == {"value": 1.5}
+
+
+@pytest.mark.parametrize("backend", sorted(serialize.BACKENDS))
+@pytest.mark.parametrize("value", [object(), Decimal("NaN")])
+def test_unknown_values_raise(backend, value):
+    with pytest.raises(TypeError):
+        serialize.dumps({"value": value}, backend)
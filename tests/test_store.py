@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import registry
+from store import ResourceStore
+
+
+def care_team(id, subject="Patient/1", code="LA27976-2", identifier="1"):
+    return registry.parse({
+        "resourceType": "CareTeam",
+        "id": id,
+        "status": "active",
+        "category": [{"coding": [{"system": "http://loinc.org", "code": code}]}],
+        "subject": {"reference": subject},
+        "identifier": [{"system": "urn:team", "value": identifier}],
+    })
+
+
+def ids(resources):
+    return [r.id for r in resources]
+
+
+def test_lookups():
+    store = ResourceStore()
+    key = store.insert(care_team("a"))
+    assert key == "CareTeam/a"
+    assert ids(store.by_type("CareTeam")) == ["a"]
+    assert ids(store.by_reference("Patient/1")) == ["a"]
+    assert ids(store.by_reference("Patient/1", resource_type="Observation")) == []
+    assert ids(store.by_code("LA27976-2", "http://loinc.org")) == ["a"]
+    assert ids(store.by_code("LA27976-2")) == ["a"]
+    assert ids(store.by_identifier("1", "urn:team")) == ["a"]
+    assert store.by_code("LA27976-2", "http://snomed.info/sct") == []
+    with pytest.raises(KeyError):
+        store.insert(care_team("a"))
+
+
+def test_indexes_follow_replace_and_delete():
+    store = ResourceStore()
+    store.insert(care_team("a"))
+    store.insert(care_team("b"))
+    store.replace("CareTeam/a", care_team("a", subject="Patient/2", code="other", identifier="2"))
+    assert ids(store.by_reference("Patient/1")) == ["b"]
+    assert ids(store.by_reference("Patient/2")) == ["a"]
+    assert ids(store.by_code("LA27976-2")) == ["b"]
+    assert ids(store.by_code("other")) == ["a"]
+    assert ids(store.by_identifier("1", "urn:team")) == ["b"]
+
+    assert store.delete("CareTeam/b").id == "b"
+    assert "CareTeam/b" not in store
+    assert ids(store.by_type("CareTeam")) == ["a"]
+    assert store.by_reference("Patient/1") == []
+    assert store.by_identifier("1") == []
+
+
+def test_lookups_keep_insertion_order():
+    names = [f"t{i}" for i in range(50)]
+    random.Random(0).shuffle(names)
+    store = ResourceStore()
+    for name in names:
+        store.insert(care_team(name))
+    assert ids(store.by_type("CareTeam")) == names
+    assert ids(store.by_reference("Patient/1", resource_type="CareTeam")) == names
+    assert ids(store.by_code("LA27976-2")) == names
+    store.replace(f"CareTeam/{names[0]}", care_team(names[0]))
+    assert ids(store.by_identifier("1")) == names[1:] + names[:1]
+
+
+def test_generated_keys():
+    store = ResourceStore()
+    team = care_team(None)
+    assert store.insert(team) == "CareTeam/1"
+    assert store.insert(team) == "CareTeam/2"
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+import registry
+import terminology
+from datatypes import CodeableConcept, Coding
+from observation import Observation
+from terminology import Terminology, TerminologyError
+
+SNOMED = "http://snomed.info/sct"
+LOINC = "http://loinc.org"
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    # bind() edits the module's bindings and plan cache; keep them per test
+    monkeypatch.setattr(terminology, "BINDINGS", dict(terminology.BINDINGS))
+    monkeypatch.setattr(terminology, "_plans", {})
+    yield
+    terminology.disable()
+
+
+def value_set(url, compose):
+    return {"resourceType": "ValueSet", "url": url, "status": "active", "compose": compose}
+
+
+def test_fhir_value_sets_are_loaded():
+    terms = Terminology()
+    assert terms.validate_code("http://hl7.org/fhir/ValueSet/care-team-status", "active")
+    assert not terms.validate_code("http://hl7.org/fhir/ValueSet/care-team-status", "bogus")
+    assert not Terminology(fhir_value_sets=False).value_sets()
+
+
+def test_compose_include_exclude_and_value_set():
+    terms = Terminology(fhir_value_sets=False)
+    terms.add({"resourceType": "CodeSystem", "url": "urn:cs", "concept": [
+        {"code": "a", "concept": [{"code": "a1"}]}, {"code": "b"}, {"code": "c"},
+    ]})
+    terms.add(value_set("urn:all", {"include": [{"system": "urn:cs"}], "exclude": [
+        {"system": "urn:cs", "concept": [{"code": "c"}]},
+    ]}))
+    terms.add(value_set("urn:some", {"include": [
+        {"system": "urn:cs", "concept": [{"code": "a1"}, {"code": "c"}], "valueSet": ["urn:all|1.0"]},
+        {"system": SNOMED, "concept": [{"code": "123"}]},
+    ]}))
+    assert set(terms.expand("urn:all")) == {("urn:cs", "a"), ("urn:cs", "a1"), ("urn:cs", "b")}
+    assert set(terms.expand("urn:some")) == {("urn:cs", "a1"), (SNOMED, "123")}
+    some = terms.expand("urn:some|2.0")
+    assert Coding(system="urn:cs", code="a1") in some
+    assert Coding(code="123") in some
+    assert Coding(system="urn:other", code="123") not in some
+    assert CodeableConcept(coding=[Coding(system="urn:cs", code="zz"), Coding(system=SNOMED, code="123")]) in some
+
+
+def test_compose_errors():
+    terms = Terminology(fhir_value_sets=False)
+    terms.add(value_set("urn:loop", {"include": [{"valueSet": ["urn:loop"]}]}))
+    terms.add(value_set("urn:filter", {"include": [{"system": SNOMED, "filter": [{"property": "concept"}]}]}))
+    terms.add(value_set("urn:unloaded", {"include": [{"system": SNOMED}]}))
+    for url in ("urn:loop", "urn:filter", "urn:unloaded", "urn:missing"):
+        with pytest.raises(TerminologyError):
+            terms.expand(url)
+
+
+def test_expansion_contains_and_load(tmp_path):
+    path = tmp_path / "bundle.json"
+    path.write_text(json.dumps({"resourceType": "Bundle", "type": "collection", "entry": [
+        {"resource": {"resourceType": "ValueSet", "url": "urn:expanded", "expansion": {"contains": [
+            {"abstract": True, "display": "group", "contains": [{"system": LOINC, "code": "8867-4"}]},
+        ]}}},
+    ]}))
+    terms = Terminology(fhir_value_sets=False)
+    assert terms.load(path) == ["urn:expanded"]
+    assert set(terms.expand("urn:expanded")) == {(LOINC, "8867-4")}
+
+
+def test_load_csv(tmp_path):
+    path = tmp_path / "findings.tsv"
+    path.write_text("id\tactive\treferencedComponentId\n1\t1\t111\n2\t0\t222\n")
+    terms = Terminology(fhir_value_sets=False)
+    terms.load_csv(path, "urn:findings", system=SNOMED, code_column="referencedComponentId")
+    assert set(terms.expand("urn:findings")) == {(SNOMED, "111")}
+
+
+def test_enable_rejects_required_binding_violations():
+    team = {"resourceType": "CareTeam", "status": "bogus"}
+    registry.parse(team)
+    terminology.enable()
+    with pytest.raises(TerminologyError) as info:
+        registry.parse(team)
+    assert info.value.issues[0].path == "CareTeam.status"
+    registry.parse(dict(team, status="active"))
+    terminology.disable()
+    registry.parse(team)
+
+
+def test_bind_and_check():
+    terms = Terminology()
+    terms.add(value_set("urn:vitals", {"include": [{"system": LOINC, "concept": [{"code": "8867-4"}]}]}))
+    terminology.bind(Observation, "code", "urn:vitals")
+    with pytest.raises(TerminologyError):
+        terminology.bind(Observation, "nonexistent", "urn:vitals")
+    heart_rate = {"resourceType": "Observation", "status": "final",
+                  "code": {"coding": [{"system": LOINC, "code": "8867-4"}]}}
+    assert terminology.check(registry.parse(heart_rate), terms) == []
+    other = registry.parse(dict(heart_rate, status="bogus", code={"coding": [{"system": LOINC, "code": "1-1"}]}))
+    assert [issue.path for issue in terminology.check(other, terms)] == ["Observation.status", "Observation.code"]
+
+
+def test_nested_bindings_are_checked():
+    encounter = registry.parse({
+        "resourceType": "Encounter",
+        "status": "finished",
+        "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": "AMB"},
+        "statusHistory": [
+            {"status": "arrived", "period": {"start": "2024-01-01T09:00:00"}},
+            {"status": "bogus", "period": {"start": "2024-01-01T09:10:00"}},
+        ],
+    })
+    assert [issue.path for issue in terminology.check(encounter)] == ["Encounter.statusHistory[1].status"]
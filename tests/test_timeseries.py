@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import registry
+from timeseries import TimeSeriesStore
+
+
+def heart_rate(minute, value, unit="/min"):
+    return registry.parse({
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4"}]},
+        "subject": {"reference": "Patient/1"},
+        "effectiveDateTime": (datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minute)).isoformat(),
+        "valueQuantity": {"value": value, "unit": unit, "system": "http://unitsofmeasure.org", "code": unit},
+    })
+
+
+def test_downsample():
+    store = TimeSeriesStore()
+    # out of order, and one point in another unit
+    store.extend([heart_rate(61, 80.0), heart_rate(0, 60.0), heart_rate(30, 70.0), heart_rate(62, 1.5, "/s")])
+    hourly = store.downsample("Patient/1", "8867-4", every=timedelta(hours=1))
+    assert list(hourly.count) == [2, 2]
+    np.testing.assert_allclose(hourly.mean, [65.0, 85.0])
+    np.testing.assert_allclose(hourly.max, [70.0, 90.0])
+    assert hourly.start[1] == np.datetime64("2024-01-01T01:00:00", "us")
+
+
+def test_empty_ranges_get_their_own_result():
+    store = TimeSeriesStore()
+    store.add(heart_rate(0, 60.0))
+    later = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    empty = store.downsample("Patient/1", "8867-4", every=timedelta(hours=1), start=later)
+    assert len(empty) == 0
+    empty.count = np.array([1])
+    again = store.downsample("Patient/1", "8867-4", every=timedelta(hours=1), start=later)
+    assert again is not empty and len(again.count) == 0
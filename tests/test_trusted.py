@@ -0,0 +1,68 @@
+import pytest
+
+import registry
+import serialize
+import trusted
+
+RESOURCES = [
+    {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "85354-9"}], "text": "Blood pressure"},
+        "subject": {"reference": "Patient/1"},
+        "effectiveDateTime": "2024-01-01T09:00:00+00:00",
+        "component": [
+            {"code": {"coding": [{"system": "http://loinc.org", "code": "8480-6"}]},
+             "valueQuantity": {"value": 120.0, "unit": "mmHg"},
+             "referenceRange": [{"low": {"value": 90.0}, "high": {"value": 140.0}}]},
+        ],
+    },
+    {
+        "resourceType": "Encounter",
+        "status": "finished",
+        "class": {"system": "http://terminology.hl7.org/CodeSystem/v3-ActCode", "code": "AMB"},
+        "period": {"start": "2024-01-01T09:00:00", "end": "2024-01-01T10:00:00"},
+    },
+    {
+        "resourceType": "CarePlan",
+        "status": "active",
+        "intent": "plan",
+        "subject": {"reference": "Patient/1"},
+        "activity": [{"detail": {"kind": "Appointment", "status": "scheduled",
+                                 "scheduledPeriod": {"start": "2024-02-01T09:00:00+00:00"}}}],
+    },
+    {
+        "resourceType": "CoverageEligibilityResponse",
+        "status": "active",
+        "purpose": ["benefits"],
+        "patient": {"reference": "Patient/1"},
+        "created": "2024-01-01T00:00:00+00:00",
+        "request": {"reference": "CoverageEligibilityRequest/1"},
+        "outcome": "complete",
+        "insurer": {"reference": "Organization/1"},
+    },
+]
+
+
+@pytest.mark.parametrize("data", RESOURCES, ids=lambda data: data["resourceType"])
+def test_parse_builds_the_same_tree_as_validation(data):
+    expected = registry.parse(data)
+    built = trusted.parse(data)
+    assert type(built) is type(expected)
+    assert built == expected
+    assert serialize.dumps(built) == serialize.dumps(expected)
+
+
+def test_bundle_entries_are_built_as_their_models():
+    bundle = {"resourceType": "Bundle", "type": "collection",
+              "entry": [{"resource": data} for data in RESOURCES] + [{"resource": {"resourceType": "Basic"}}]}
+    built = trusted.parse(bundle)
+    assert built == registry.parse(bundle)
+    assert [type(entry.resource).__name__ for entry in built.entry] == [
+        "Observation", "Encounter", "CarePlan", "CoverageEligibilityResponse", "dict"]
+
+
+def test_nothing_is_validated():
+    team = trusted.parse({"resourceType": "CareTeam", "status": 7, "unknown": 1})
+    assert team.status == 7
+    assert not hasattr(team, "unknown")
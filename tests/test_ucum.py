@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import ucum
+from observation import Quantity
+
+
+@pytest.mark.parametrize("value, unit, to, expected", [
+    (126, "mg/dL", "g/L", 1.26),
+    (120, "mm[Hg]", "kPa", 15.998640),
+    (5.5, "mmol/L", "umol/mL", 5.5),
+    (72, "/min", "/h", 4320),
+    (37, "Cel", "[degF]", 98.6),
+    (98.6, "[degF]", "K", 310.15),
+    (250, "mcg", "mg", 0.25),  # alias
+    (150, "lbs", "kg", 68.0388555),  # alias
+    (4.2, "10*3/uL", "10*9/L", 4.2),
+    (12, "%", "1", 0.12),
+    (5, "[IU]/L", "m[IU]/mL", 5),
+    (1, "kg.m/s2", "g.cm.s-2", 1e5),
+])
+def test_convert(value, unit, to, expected):
+    assert ucum.convert(value, unit, to) == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize("unit, canonical", [
+    ("mg/dL", "g.m-3"),
+    ("mm[Hg]", "g.m-1.s-2"),
+    ("mmol/L", "m-3.mol"),
+    ("kg.m/s{force}", "g.m.s-1"),
+])
+def test_canonical_units(unit, canonical):
+    assert ucum.parse(unit).canonical == canonical
+
+
+@pytest.mark.parametrize("unit", ["MG/DL", "mg/dl", "mg / dL"])
+def test_lenient_spellings(unit):
+    assert ucum.conversion(unit, "mg/dL") == (1.0, 0.0)
+
+
+@pytest.mark.parametrize("unit", ["", "furlong", "mg/", "m(", "[foo]"])
+def test_invalid_units(unit):
+    with pytest.raises(ucum.UCUMError):
+        ucum.parse(unit)
+
+
+def test_incommensurable_units():
+    with pytest.raises(ucum.UCUMError):
+        ucum.convert(1, "mg", "mL")
+
+
+def test_normalize_quantity():
+    quantity = Quantity(value=180.0, unit="mg/dL", system=ucum.SYSTEM, code="mg/dL")
+    converted = ucum.normalize(quantity, "g/L")
+    assert type(converted) is Quantity
+    assert (converted.value, converted.code, converted.unit) == (pytest.approx(1.8), "g/L", "g/L")
+    # without a UCUM code the human-readable unit is used
+    assert ucum.normalize(Quantity(value=1.0, unit="kg")).value == pytest.approx(1000.0)
+    assert ucum.normalize(Quantity(value=None, unit="kg")).value is None
+
+
+def test_convert_array_masks_what_it_cannot_convert():
+    values, units = ucum.convert_array([120.0, 16.0, 1.0, 2.0, np.nan], ["mm[Hg]", "kPa", "mg", None, "kPa"], "mm[Hg]")
+    assert values[:2].tolist() == pytest.approx([120.0, 120.0106], rel=1e-5)
+    assert values.mask.tolist() == [False, False, True, True, True]
+    assert units[:2].tolist() == ["mm[Hg]", "mm[Hg]"]
@@ -0,0 +1,403 @@
+"""Time series of Observation values, per (subject, code).
+
+`TimeSeriesStore` takes Observations and appends each numeric value
+(`valueQuantity`, and every component's `valueQuantity`) to the series for
+its subject reference (or `device`, see `reference=`) and code
+(`coding[0].code`, as in `numeric`). Each series is a pair of arrays, int64
+microseconds since the epoch (UTC) and float64 values, kept sorted by time,
+so range queries are two `searchsorted` calls and return views instead of
+copies.
+
+    ts = TimeSeriesStore()
+    ts.extend(observations)
+    times, values = ts.range("Patient/1", "8867-4", start=datetime(2024, 1, 1))
+    hourly = ts.downsample("Patient/1", "8867-4", every=timedelta(hours=1))
+    hourly.start, hourly.mean, hourly.min, hourly.max, hourly.count
+    per_patient = ts.downsample_all("8867-4", every=timedelta(hours=1), start=..., end=...)
+    smoothed = ts.rolling("Patient/1", "8867-4", window=timedelta(minutes=15), how="mean")
+
+Appends go to a small buffer and are merged into the sorted arrays on the
+next read; out-of-order points are fine but cost a sort at that merge.
+
+With `spill_dir` set, the largest series are moved to memory-mapped files once
+more than `max_resident_points` points are held in memory. Spilled series are
+read through `numpy.memmap`, so the OS pages them in as queries touch them;
+points appended later are buffered in memory and written to the files on the
+next read of that series. `close()` drops the series and removes the files.
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+from array import array
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np # type: ignore
+
+from observation import Observation
+import ucum
+
+DEFAULT_MAX_RESIDENT_POINTS = 50_000_000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+Instant = Union[datetime, date, str, np.datetime64]
+Duration = Union[timedelta, np.timedelta64]
+
+
+def _micros(value: Instant) -> int:
+    # naive datetimes are taken as UTC, like `numeric`
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[us]").astype(np.int64))
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _duration(value: Duration) -> int:
+    if isinstance(value, np.timedelta64):
+        micros = int(value.astype("timedelta64[us]").astype(np.int64))
+    else:
+        micros = value // _MICROSECOND
+    if micros <= 0:
+        raise ValueError(f"duration must be positive, got {value!r}")
+    return micros
+
+
+def _code(concept) -> Optional[str]:
+    if concept is None or not concept.coding:
+        return None
+    return concept.coding[0].code
+
+
+def _effective(obs: Observation) -> Optional[datetime]:
+    value = obs.effectiveDateTime or obs.effectiveInstant
+    if value is None and obs.effectivePeriod is not None:
+        value = obs.effectivePeriod.start
+    return value
+
+
+class Series:
+    """One (reference, code) series: sorted int64 times and float64 values."""
+
+    __slots__ = ("unit", "_times", "_values", "_pending_times", "_pending_values", "_path")
+
+    def __init__(self, unit: Optional[str]):
+        self.unit = unit
+        self._times = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0, dtype=np.float64)
+        self._pending_times = array("q")
+        self._pending_values = array("d")
+        self._path: Optional[str] = None  # file prefix once spilled
+
+    def __len__(self) -> int:
+        return len(self._times) + len(self._pending_times)
+
+    @property
+    def spilled(self) -> bool:
+        return self._path is not None
+
+    @property
+    def resident(self) -> int:
+        """Points held in memory (spilled points live in the page cache)."""
+        return len(self._pending_times) + (0 if self.spilled else len(self._times))
+
+    def append(self, time: int, value: float) -> None:
+        self._pending_times.append(time)
+        self._pending_values.append(value)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, values), sorted by time; merges pending appends first."""
+        if self._pending_times:
+            self._merge()
+        return self._times, self._values
+
+    def _merge(self) -> None:
+        times = np.frombuffer(self._pending_times, dtype=np.int64).copy()
+        values = np.frombuffer(self._pending_values, dtype=np.float64).copy()
+        self._pending_times = array("q")
+        self._pending_values = array("d")
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        in_order = not len(self._times) or times[0] >= self._times[-1]
+        if self.spilled and in_order:
+            self._write(times, values, "ab")
+            return
+        times = np.concatenate((self._times, times))
+        values = np.concatenate((self._values, values))
+        if not in_order:
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        if self.spilled:
+            self._write(times, values, "wb")
+        else:
+            self._times, self._values = times, values
+
+    def spill(self, path: str) -> None:
+        times, values = self.arrays()
+        self._path = path
+        if len(times):
+            self._write(times, values, "wb")
+
+    def _write(self, times: np.ndarray, values: np.ndarray, mode: str) -> None:
+        for suffix, data in ((".t", times), (".v", values)):
+            path = self._path + suffix
+            if mode == "ab":
+                with open(path, "ab") as f:
+                    f.write(data.tobytes())
+            else:
+                # write aside and rename, so views handed out earlier keep mapping the old file
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data.tobytes())
+                os.replace(path + ".tmp", path)
+        self._times = np.memmap(self._path + ".t", dtype=np.int64, mode="r")
+        self._values = np.memmap(self._path + ".v", dtype=np.float64, mode="r")
+
+
+@dataclass
+class Downsampled:
+    """Per-bucket aggregates; buckets without points are left out."""
+
+    start: np.ndarray  # datetime64[us], UTC start of each bucket
+    count: np.ndarray  # int64
+    min: np.ndarray  # float64
+    max: np.ndarray
+    mean: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def _empty() -> Downsampled:
+    # a new instance per call; callers own what they are given
+    return Downsampled(
+        start=np.empty(0, dtype="datetime64[us]"),
+        count=np.empty(0, dtype=np.int64),
+        min=np.empty(0),
+        max=np.empty(0),
+        mean=np.empty(0),
+    )
+
+
+class TimeSeriesStore:
+    """Observation values per (reference, code); see the module docstring.
+
+    `reference` is the Observation reference field series are keyed by,
+    `subject` or `device`. A point whose unit differs from the series' first
+    unit is converted to it with `ucum`; one that cannot be (no unit, or not
+    commensurable) is not stored and is counted in `rejected`.
+    """
+
+    def __init__(
+        self,
+        reference: str = "subject",
+        spill_dir: Optional[str] = None,
+        max_resident_points: int = DEFAULT_MAX_RESIDENT_POINTS,
+    ):
+        if reference not in ("subject", "device"):
+            raise ValueError(f"reference must be 'subject' or 'device', got {reference!r}")
+        self.reference = reference
+        self.max_resident_points = max_resident_points
+        self.rejected = 0
+        self._series: Dict[Tuple[str, str], Series] = {}
+        self._spill_dir = tempfile.mkdtemp(prefix="timeseries-", dir=spill_dir) if spill_dir is not None else None
+        # upper bound on resident points, recounted when it passes the limit
+        self._resident = 0
+        self._files = itertools.count()
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._series.values())
+
+    def __enter__(self) -> "TimeSeriesStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Drop every series and delete the spill files."""
+        self._series.clear()
+        self._resident = 0
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    # -- ingest ------------------------------------------------------------
+
+    def add(self, obs: Observation) -> int:
+        """Append `obs`'s numeric values; returns the number of points stored."""
+        ref = getattr(obs, self.reference)
+        effective = _effective(obs)
+        if ref is None or not ref.reference or effective is None:
+            return 0
+        time = _micros(effective)
+        added = 0
+        if obs.valueQuantity is not None:
+            added += self._append(ref.reference, _code(obs.code), time, obs.valueQuantity)
+        for component in obs.component or ():
+            if component.valueQuantity is not None:
+                added += self._append(ref.reference, _code(component.code), time, component.valueQuantity)
+        self._resident += added
+        if self._resident > self.max_resident_points and self._spill_dir is not None:
+            self._spill()
+        return added
+
+    def extend(self, observations: Iterable[Observation]) -> int:
+        add = self.add
+        return sum(add(obs) for obs in observations)
+
+    def _append(self, ref: str, code: Optional[str], time: int, quantity) -> int:
+        if code is None or quantity.value is None:
+            return 0
+        key = (ref, code)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = Series(quantity.unit)
+        elif quantity.unit != series.unit:
+            try:
+                if quantity.unit is None or series.unit is None:
+                    raise ucum.UCUMError("no unit")
+                scale, shift = ucum.conversion(quantity.unit, series.unit)
+            except ucum.UCUMError:
+                self.rejected += 1
+                return 0
+            series.append(time, quantity.value * scale + shift)
+            return 1
+        series.append(time, quantity.value)
+        return 1
+
+    def _spill(self) -> None:
+        self._resident = sum(s.resident for s in self._series.values())
+        if self._resident <= self.max_resident_points:
+            return
+        # largest first, down to half the limit so spills do not happen on every add
+        target = self.max_resident_points // 2
+        for key, series in sorted(self._series.items(), key=lambda item: -item[1].resident):
+            if self._resident <= target:
+                break
+            before = series.resident
+            if series.spilled:
+                series.arrays()  # flushes the buffered appends to its files
+            else:
+                series.spill(os.path.join(self._spill_dir, str(next(self._files))))
+            self._resident -= before - series.resident
+
+    # -- queries -----------------------------------------------------------
+
+    def keys(self) -> List[Tuple[str, str]]:
+        return list(self._series)
+
+    def references(self, code: str) -> List[str]:
+        return [ref for ref, c in self._series if c == code]
+
+    def series(self, reference: str, code: str) -> Series:
+        try:
+            return self._series[(reference, code)]
+        except KeyError:
+            raise KeyError(f"no series for {reference} {code}") from None
+
+    def _slice(self, reference: str, code: str, start: Optional[Instant], end: Optional[Instant]):
+        # full arrays plus the [lo, hi) bounds of start <= t < end
+        times, values = self.series(reference, code).arrays()
+        lo = 0 if start is None else int(np.searchsorted(times, _micros(start), side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, _micros(end), side="left"))
+        return times, values, lo, max(lo, hi)
+
+    def range(
+        self, reference: str, code: str, start: Optional[Instant] = None, end: Optional[Instant] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(datetime64[us] times, values) with start <= time < end, as views."""
+        times, values, lo, hi = self._slice(reference, code, start, end)
+        return times[lo:hi].view("datetime64[us]"), values[lo:hi]
+
+    def downsample(
+        self,
+        reference: str,
+        code: str,
+        every: Duration,
+        start: Optional[Instant] = None,
+        end: Optional[Instant] = None,
+        origin: Instant = _EPOCH,
+    ) -> Downsampled:
+        """count/min/max/mean per `every`-long bucket, buckets aligned to `origin`."""
+        times, values, lo, hi = self._slice(reference, code, start, end)
+        if lo == hi:
+            return _empty()
+        step, base = _duration(every), _micros(origin)
+        values = values[lo:hi]
+        buckets = (times[lo:hi] - base) // step
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        count = np.diff(np.append(starts, len(buckets)))
+        return Downsampled(
+            start=(buckets[starts] * step + base).view("datetime64[us]"),
+            count=count,
+            min=np.minimum.reduceat(values, starts),
+            max=np.maximum.reduceat(values, starts),
+            mean=np.add.reduceat(values, starts) / count,
+        )
+
+    def downsample_all(
+        self,
+        code: str,
+        every: Duration,
+        start: Optional[Instant] = None,
+        end: Optional[Instant] = None,
+        origin: Instant = _EPOCH,
+    ) -> Dict[str, Downsampled]:
+        """`downsample` for every reference with a `code` series; empty results are left out."""
+        result = {}
+        for ref in self.references(code):
+            buckets = self.downsample(ref, code, every, start, end, origin)
+            if len(buckets):
+                result[ref] = buckets
+        return result
+
+    def rolling(
+        self,
+        reference: str,
+        code: str,
+        window: Duration,
+        how: str = "mean",
+        start: Optional[Instant] = None,
+        end: Optional[Instant] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """For each point in [start, end), `how` (mean/min/max/count) over the trailing window.
+
+        The window of a point at t is (t - window, t]; it reaches back before
+        `start` when there are earlier points.
+        """
+        if how not in ("mean", "min", "max", "count"):
+            raise ValueError(f"how must be mean, min, max or count, got {how!r}")
+        times, values, lo, hi = self._slice(reference, code, start, end)
+        points = times[lo:hi]
+        lefts = np.searchsorted(times, points - _duration(window), side="right")
+        # a window ends after every point at its time, including later ties
+        ends = np.searchsorted(times, points, side="right")
+        # the span the windows reach; indexes below are relative to it
+        base = int(lefts[0]) if len(lefts) else lo
+        reach = values[base:int(ends[-1]) if len(ends) else lo]
+        lefts -= base
+        ends -= base
+        if how == "count":
+            result = ends - lefts
+        elif how == "mean":
+            sums = np.concatenate(([0.0], np.cumsum(reach)))
+            result = (sums[ends] - sums[lefts]) / (ends - lefts)
+        elif not len(ends):
+            result = np.empty(0)
+        else:
+            # reduceat over interleaved (left, end) pairs reduces each window in one call
+            ufunc = np.minimum if how == "min" else np.maximum
+            bounds = np.empty(2 * len(ends), dtype=np.intp)
+            bounds[0::2], bounds[1::2] = lefts, ends
+            result = ufunc.reduceat(np.append(reach, 0.0), bounds)[0::2]
+        return times[lo:hi].view("datetime64[us]"), result
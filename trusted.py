@@ -0,0 +1,131 @@
+"""Trusted construction: build model trees from data that was already validated.
+
+`construct(Observation, data)` returns the same nested object tree as
+`Observation.parse_obj(data)` -- CodeableConcept, Reference, Period, ... are
+model instances, enums are enum members and date/datetime strings are parsed --
+but no validators run. Use it only for data this service validated itself
+(e.g. when reloading resources from our own database); malformed input is not
+rejected and may produce a malformed tree.
+"""
+
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Tuple, Type, Union, get_args, get_origin
+from pydantic import BaseModel # type: ignore
+
+import compat
+import registry
+
+# model class -> (defaults, {key: (field name, converter)}); keys are both the
+# alias and the field name so `class` and `class_` are accepted alike
+_plans: Dict[type, Tuple[dict, Dict[str, Tuple[str, Callable]]]] = {}
+
+
+def _identity(value):
+    return value
+
+
+def _parse_datetime(value):
+    if isinstance(value, str):
+        if len(value) == 10:
+            return date.fromisoformat(value)
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _parse_date(value):
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _any_resource(value):
+    # untyped slots such as Bundle.entry.resource hold whichever resource the
+    # dict names; anything without a model is left as-is
+    if isinstance(value, dict) and registry.is_registered(value.get("resourceType")):
+        return construct(registry.get_model(value["resourceType"]), value)
+    return value
+
+
+def _model_converter(model: Type[BaseModel]) -> Callable:
+    def convert(value):
+        if isinstance(value, dict):
+            return construct(model, value)
+        return value
+    return convert
+
+
+def _enum_converter(enum: Type[Enum]) -> Callable:
+    def convert(value):
+        return value if isinstance(value, enum) else enum(value)
+    return convert
+
+
+def _type_converter(tp) -> Callable:
+    if tp is Any:
+        return _any_resource
+    if isinstance(tp, type):
+        if issubclass(tp, BaseModel):
+            return _model_converter(tp)
+        if issubclass(tp, Enum):
+            return _enum_converter(tp)
+        if issubclass(tp, datetime):
+            return _parse_datetime
+        if issubclass(tp, date):
+            return _parse_date
+        return _identity
+    if get_origin(tp) is Union:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        models = [a for a in args if isinstance(a, type) and issubclass(a, BaseModel)]
+        if models:
+            # dicts go to the first model member; scalars are kept
+            return _model_converter(models[0])
+        if any(isinstance(a, type) and issubclass(a, (date, datetime)) for a in args):
+            return _parse_datetime
+    return _identity
+
+
+def _plan(model: Type[BaseModel]):
+    plan = _plans.get(model)
+    if plan is None:
+        defaults = {}
+        fields = {}
+        for spec in compat.field_specs(model):
+            defaults[spec.name] = None if spec.required else spec.default
+            convert = _type_converter(spec.type)
+            if spec.is_list:
+                convert = _list_converter(convert)
+            elif spec.generic:
+                convert = _identity
+            fields[spec.name] = fields[spec.alias] = (spec.name, convert)
+        plan = _plans[model] = (defaults, fields)
+    return plan
+
+
+def _list_converter(convert: Callable) -> Callable:
+    if convert is _identity:
+        return _identity
+    def convert_list(values):
+        return [convert(v) for v in values]
+    return convert_list
+
+
+def construct(model: Type[BaseModel], data: dict) -> BaseModel:
+    """Build `model` and all nested models from `data` without validation."""
+    plan = _plans.get(model) or _plan(model)
+    defaults, fields = plan
+    values = defaults.copy()
+    fields_set = set()
+    for key, value in data.items():
+        entry = fields.get(key)
+        if entry is None:
+            continue  # unknown keys are dropped, as parse_obj does by default
+        name, convert = entry
+        values[name] = value if value is None else convert(value)
+        fields_set.add(name)
+    return compat.construct(model, values, fields_set)
+
+
+def parse(data: dict) -> BaseModel:
+    """Trusted counterpart of `registry.parse` for an already-validated dict."""
+    return construct(registry.get_model(data.get("resourceType")), data)
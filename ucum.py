@@ -0,0 +1,327 @@
+"""UCUM units: parsing, conversion and canonical units for Quantity values.
+
+    ucum.convert(126, "mg/dL", "g/L")          # 1.26
+    ucum.parse("mm[Hg]").canonical              # 'g.m-1.s-2'
+    ucum.normalize(obs.valueQuantity)           # same Quantity class, canonical units
+    ucum.normalize(obs.valueQuantity, "mmol/L")
+
+    values, units = ucum.convert_array(arrays.value, arrays.unit)  # numeric.ObservationArrays
+
+A unit expression is parsed once into a `Unit`: a factor, an offset (only
+for Cel and [degF]) and its dimensions as (base unit, exponent) pairs over the
+UCUM base units m, s, g, rad, K, C and cd. `parse` and `conversion` are
+LRU-cached, so after the first occurrence of a unit string converting a
+value is a dictionary hit and a multiply-add. Two deliberate departures from
+UCUM: mol is kept as a base unit instead of being expanded to Avogadro's
+number (so mmol/L stays a concentration of substance, not a count per
+volume), and arbitrary units ([IU], [arb'U], ...) are bases of their own --
+they convert between prefixes and volumes, never to anything else.
+
+The unit strings in real feeds are not always UCUM, so spaces outside
+annotations are dropped ("mg / dL"), and a symbol that does not parse is
+retried case-insensitively ("MG/DL", "mEq/L", "Kg") and against `ALIASES` of
+common spellings ("mmHg", "mcg", "bpm", "°C", "lbs", ...). Anything else
+raises UCUMError.
+
+`convert_array` is the vectorized form for whole arrays of values with their
+unit strings (e.g. `numeric.observation_arrays`): each distinct unit is
+resolved once and the values are converted with one NumPy multiply-add.
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np # type: ignore
+from pydantic import BaseModel # type: ignore
+
+import compat
+
+SYSTEM = "http://unitsofmeasure.org"
+CACHE_SIZE = 4096
+
+Dimensions = Tuple[Tuple[str, int], ...]
+
+
+class UCUMError(ValueError):
+    pass
+
+
+class Unit(NamedTuple):
+    factor: float  # value in canonical units = value * factor + offset
+    dimensions: Dimensions  # sorted (base unit, exponent) pairs
+    offset: float = 0.0
+
+    @property
+    def canonical(self) -> str:
+        """UCUM code of the canonical units, e.g. 'g.m-3'; '1' when dimensionless."""
+        return ".".join(base if exp == 1 else f"{base}{exp}" for base, exp in self.dimensions) or "1"
+
+
+PREFIXES = {
+    "Y": 1e24, "Z": 1e21, "E": 1e18, "P": 1e15, "T": 1e12, "G": 1e9, "M": 1e6, "k": 1e3, "h": 1e2,
+    "da": 1e1, "d": 1e-1, "c": 1e-2, "m": 1e-3, "u": 1e-6, "n": 1e-9, "p": 1e-12, "f": 1e-15,
+    "a": 1e-18, "z": 1e-21, "y": 1e-24,
+}
+
+# atom -> (takes prefixes, factor, definition); no definition: a base unit
+ATOMS: Dict[str, Tuple[bool, float, Optional[str]]] = {
+    # base units, plus mol (see the module docstring)
+    "m": (True, 1, None), "s": (True, 1, None), "g": (True, 1, None), "rad": (True, 1, None),
+    "K": (True, 1, None), "C": (True, 1, None), "cd": (True, 1, None), "mol": (True, 1, None),
+    # dimensionless
+    "10*": (False, 10, "1"), "10^": (False, 10, "1"), "%": (False, 1e-2, "1"), "[ppth]": (False, 1e-3, "1"),
+    "[ppm]": (False, 1e-6, "1"), "[ppb]": (False, 1e-9, "1"), "[pi]": (False, math.pi, "1"),
+    "sr": (True, 1, "rad2"), "deg": (False, math.pi / 180, "rad"),
+    # time
+    "min": (False, 60, "s"), "h": (False, 60, "min"), "d": (False, 24, "h"), "wk": (False, 7, "d"),
+    "a": (False, 365.25, "d"), "mo": (False, 1 / 12, "a"),
+    # volume and mass
+    "L": (True, 1, "dm3"), "l": (True, 1, "dm3"), "t": (True, 1e3, "kg"),
+    "[drp]": (False, 1 / 20, "mL"), "[foz_us]": (False, 29.5735295625, "mL"), "[gal_us]": (False, 3.785411784, "L"),
+    "[lb_av]": (False, 453.59237, "g"), "[oz_av]": (False, 1 / 16, "[lb_av]"), "[stone_av]": (False, 14, "[lb_av]"),
+    # length
+    "[in_i]": (False, 2.54, "cm"), "[ft_i]": (False, 12, "[in_i]"), "[yd_i]": (False, 3, "[ft_i]"),
+    "[mi_i]": (False, 5280, "[ft_i]"),
+    # mechanics and electricity
+    "Hz": (True, 1, "s-1"), "N": (True, 1, "kg.m/s2"), "Pa": (True, 1, "N/m2"), "J": (True, 1, "N.m"),
+    "W": (True, 1, "J/s"), "A": (True, 1, "C/s"), "V": (True, 1, "J/C"), "Ohm": (True, 1, "V/A"),
+    "bar": (True, 1e5, "Pa"), "atm": (False, 101325, "Pa"), "m[Hg]": (True, 133.322, "kPa"),
+    "m[H2O]": (True, 9.80665, "kPa"), "cal": (True, 4.184, "J"), "[Cal]": (False, 1, "kcal"),
+    # chemistry
+    "eq": (True, 1, "mol"), "osm": (True, 1, "mol"), "U": (True, 1, "umol/min"), "kat": (True, 1, "mol/s"),
+    # arbitrary units
+    "[IU]": (True, 1, None), "[iU]": (True, 1, "[IU]"), "[arb'U]": (False, 1, None), "[USP'U]": (False, 1, None),
+    "[HPF]": (False, 1, None), "[LPF]": (False, 1, None),
+}
+
+# units on an interval scale: Kelvin = value * factor + offset; only valid on their own
+SPECIAL = {
+    "Cel": Unit(1.0, (("K", 1),), 273.15),
+    "[degF]": Unit(5 / 9, (("K", 1),), 459.67 * 5 / 9),
+}
+
+# common non-UCUM spellings, matched case-insensitively (whole units or symbols)
+ALIASES = {
+    "mmhg": "mm[Hg]", "cmh2o": "cm[H2O]", "mcg": "ug", "cc": "mL", "iu": "[IU]",
+    "bpm": "/min", "beats/min": "/min", "beats/minute": "/min", "breaths/min": "/min", "/minute": "/min",
+    "°c": "Cel", "degc": "Cel", "°f": "[degF]", "degf": "[degF]",
+    "lb": "[lb_av]", "lbs": "[lb_av]", "oz": "[oz_av]", "in": "[in_i]", "inch": "[in_i]", "ft": "[ft_i]",
+    "sec": "s", "hr": "h", "hrs": "h", "hour": "h", "hours": "h", "day": "d", "days": "d",
+    "week": "wk", "weeks": "wk", "month": "mo", "months": "mo", "year": "a", "years": "a", "yr": "a",
+}
+
+_SPACE = re.compile(r"\s+(?![^{]*\})")
+_TOKEN = re.compile(r"\{[^}]*\}|[./()]|[^./(){}]+")
+_SYMBOL = re.compile(r"(.*?)([+-]?\d+)?")
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse(unit: str) -> Unit:
+    """Parse a UCUM unit expression (cached); raises UCUMError."""
+    # UCUM has no spaces; feeds write "mg / dL" (annotations keep theirs)
+    text = _SPACE.sub("", unit).replace("µ", "u").replace("μ", "u")
+    text = ALIASES.get(text.lower(), text)
+    if text in SPECIAL:
+        return SPECIAL[text]
+    if not text:
+        raise UCUMError("empty unit")
+    tokens = _TOKEN.findall(text)
+    if "".join(tokens) != text:
+        raise UCUMError(f"invalid unit {unit!r}")
+    try:
+        factor, dims, pos = _main_term(tokens)
+    except IndexError:
+        raise UCUMError(f"incomplete unit {unit!r}") from None
+    if pos != len(tokens):
+        raise UCUMError(f"invalid unit {unit!r}: unexpected {tokens[pos]!r}")
+    # rounding to 15 digits drops float noise from chains of prefixes (1e-3 / 1e-4 -> 10.0)
+    return Unit(float(f"{factor:.15g}"), tuple(sorted((base, exp) for base, exp in dims.items() if exp)))
+
+
+def _main_term(tokens: List[str]) -> Tuple[float, Dict[str, int], int]:
+    if tokens[0] == "/":
+        factor, dims, pos = _term(tokens, 1)
+        return 1 / factor, {base: -exp for base, exp in dims.items()}, pos
+    return _term(tokens, 0)
+
+
+def _term(tokens: List[str], pos: int) -> Tuple[float, Dict[str, int], int]:
+    factor, dims, pos = _component(tokens, pos)
+    while pos < len(tokens) and tokens[pos] in (".", "/"):
+        sign = 1 if tokens[pos] == "." else -1
+        other, other_dims, pos = _component(tokens, pos + 1)
+        factor = factor * other if sign > 0 else factor / other
+        for base, exp in other_dims.items():
+            dims[base] = dims.get(base, 0) + sign * exp
+    return factor, dims, pos
+
+
+def _component(tokens: List[str], pos: int) -> Tuple[float, Dict[str, int], int]:
+    token = tokens[pos]
+    if token == "(":
+        factor, dims, pos = _term(tokens, pos + 1)
+        if tokens[pos] != ")":
+            raise UCUMError(f"expected ')' at {tokens[pos]!r}")
+        return factor, dims, pos + 1
+    if token[0] == "{":
+        return 1.0, {}, pos + 1  # an annotation on its own is the unit 1
+    if token in (".", "/", ")"):
+        raise UCUMError(f"unexpected {token!r}")
+    pos += 1
+    if pos < len(tokens) and tokens[pos][0] == "{":
+        pos += 1  # annotation: ignored
+    if token.isdigit():
+        return float(token), {}, pos
+    symbol, exponent = _SYMBOL.fullmatch(token).groups()
+    if not symbol:
+        raise UCUMError(f"invalid unit symbol {token!r}")
+    factor, dims = _symbol(symbol)
+    if exponent is None:
+        return factor, dict(dims), pos
+    exp = int(exponent)
+    return factor ** exp, {base: e * exp for base, e in dims}, pos
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _symbol(symbol: str) -> Tuple[float, Dimensions]:
+    # prefix + atom, then the same case-insensitively, then ALIASES
+    for candidate in (symbol, symbol.lower(), ALIASES.get(symbol.lower())):
+        if candidate is None:
+            continue
+        if candidate in SPECIAL:
+            raise UCUMError(f"{symbol!r} cannot be combined with other units")
+        resolved = _resolve(candidate)
+        if resolved is not None:
+            return resolved
+    raise UCUMError(f"unknown unit {symbol!r}")
+
+
+def _resolve(symbol: str) -> Optional[Tuple[float, Dimensions]]:
+    if symbol in ATOMS:
+        return _atom(symbol)
+    for prefix in (symbol[:2], symbol[:1]):
+        if prefix in PREFIXES and symbol[len(prefix):] in ATOMS and ATOMS[symbol[len(prefix):]][0]:
+            factor, dims = _atom(symbol[len(prefix):])
+            return PREFIXES[prefix] * factor, dims
+    if symbol != symbol.lower():
+        return None
+    # lower-cased input: match atoms case-insensitively ("meq" -> "m" + "eq", "dl" -> "d" + "l")
+    for prefix in ("", symbol[:2], symbol[:1]):
+        if prefix and prefix not in PREFIXES:
+            continue
+        atom = _LOWER_ATOMS.get(symbol[len(prefix):])
+        if atom is not None and (not prefix or ATOMS[atom][0]):
+            factor, dims = _atom(atom)
+            return PREFIXES.get(prefix, 1) * factor, dims
+    return None
+
+
+def _atom(atom: str) -> Tuple[float, Dimensions]:
+    _, factor, definition = ATOMS[atom]
+    if definition is None:
+        return factor, ((atom, 1),)
+    if definition == "1":
+        return factor, ()
+    unit = parse(definition)
+    return factor * unit.factor, unit.dimensions
+
+
+# first spelling wins, so "l" and "L" both reach a litre
+_LOWER_ATOMS: Dict[str, str] = {}
+for _name in ATOMS:
+    _LOWER_ATOMS.setdefault(_name.lower(), _name)
+
+
+# ---------------------------------------------------------------------------
+# Conversion
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def conversion(unit: str, to: str) -> Tuple[float, float]:
+    """(scale, shift) such that a value in `unit` is `value * scale + shift` in `to`."""
+    source, target = parse(unit), parse(to)
+    if source.dimensions != target.dimensions:
+        raise UCUMError(f"cannot convert {unit!r} ({source.canonical}) to {to!r} ({target.canonical})")
+    scale = float(f"{source.factor / target.factor:.15g}")
+    return scale, float(f"{(source.offset - target.offset) / target.factor:.15g}")
+
+
+def convert(value: float, unit: str, to: str) -> float:
+    scale, shift = conversion(unit, to)
+    return value * scale + shift
+
+
+def canonical(value: float, unit: str) -> Tuple[float, str]:
+    """`value` in `unit` expressed in canonical units, with their UCUM code."""
+    parsed = parse(unit)
+    return value * parsed.factor + parsed.offset, parsed.canonical
+
+
+def _quantity_unit(quantity) -> Optional[str]:
+    # the UCUM code when there is one, else the human-readable unit
+    code = quantity.code
+    if code and (quantity.system is None or quantity.system == SYSTEM):
+        return code
+    return quantity.unit or code
+
+
+def normalize(quantity: BaseModel, to: Optional[str] = None) -> BaseModel:
+    """Copy of a Quantity-like model (Quantity, SimpleQuantity, Age, Duration, ...) in canonical units or `to`.
+
+    The unit comes from `code` when it is a UCUM code, else from `unit`. The
+    copy has `system` set to UCUM and `code`/`unit` to the target unit. A
+    quantity without a value (or None) is returned as is.
+    """
+    if quantity is None or quantity.value is None:
+        return quantity
+    unit = _quantity_unit(quantity)
+    if not unit:
+        raise UCUMError("quantity has no unit")
+    if to is None:
+        value, code = canonical(quantity.value, unit)
+    else:
+        value, code = convert(quantity.value, unit, to), to
+    values = dict(quantity.__dict__, value=value, unit=code, system=SYSTEM, code=code)
+    return compat.construct(type(quantity), values, compat.fields_set(quantity) | {"value", "unit", "system", "code"})
+
+
+def convert_array(
+    values, units: Sequence[Optional[str]], to: Optional[str] = None
+) -> Tuple[np.ma.MaskedArray, np.ma.MaskedArray]:
+    """Convert `values` (each in the matching unit of `units`) to canonical units or `to`.
+
+    Returns (values, unit codes) as masked arrays of the same shape. Entries
+    whose unit is missing, unknown, or (with `to`) of another dimension come
+    back masked, as do missing values.
+    """
+    values = np.ma.asarray(values, dtype=np.float64)
+    units = np.ma.asarray(units, dtype=object)
+    flat_units = np.ma.filled(units, None).ravel()
+    # one slot per distinct unit string
+    slots: Dict[Optional[str], int] = {}
+    index = np.fromiter((slots.setdefault(u, len(slots)) for u in flat_units), dtype=np.intp, count=len(flat_units))
+    scale = np.full(len(slots), np.nan)
+    shift = np.zeros(len(slots))
+    codes = np.full(len(slots), None, dtype=object)
+    for unit, slot in slots.items():
+        if not isinstance(unit, str):
+            continue
+        try:
+            if to is None:
+                parsed = parse(unit)
+                scale[slot], shift[slot], codes[slot] = parsed.factor, parsed.offset, parsed.canonical
+            else:
+                (scale[slot], shift[slot]), codes[slot] = conversion(unit, to), to
+        except UCUMError:
+            pass
+    converted = np.ma.filled(values, np.nan).ravel() * scale[index] + shift[index]
+    converted = np.ma.masked_invalid(converted.reshape(values.shape))
+    converted[np.ma.getmaskarray(values)] = np.ma.masked
+    codes_out = codes[index].reshape(values.shape)
+    return converted, np.ma.MaskedArray(codes_out, mask=np.ma.getmaskarray(converted))
@@ -0,0 +1,28 @@
+from typing import Iterator, Tuple, Type, TypeVar
+from pydantic import BaseModel # type: ignore
+
+import compat
+
+T = TypeVar("T", bound=BaseModel)
+
+# Generic traversal of a model tree, used to find every element of a given
+# datatype (all Codings, all References, ...) whatever resource it sits in.
+
+
+def iter_elements(node, element_type: Type[T], path: str = "") -> Iterator[Tuple[str, T]]:
+    """Yield (path, element) for every `element_type` instance under `node`.
+
+    Paths use FHIR element names, e.g. `component[1].code.coding[0]`.
+    """
+    if isinstance(node, element_type):
+        yield path, node
+    if isinstance(node, BaseModel):
+        for spec in compat.field_specs(type(node)):
+            value = node.__dict__.get(spec.name)
+            if value is None or isinstance(value, (str, int, float)):
+                continue
+            child = f"{path}.{spec.alias}" if path else spec.alias
+            yield from iter_elements(value, element_type, child)
+    elif isinstance(node, list):
+        for i, item in enumerate(node):
+            yield from iter_elements(item, element_type, f"{path}[{i}]")